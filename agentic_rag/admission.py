@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from agentic_rag.tracing import REGISTRY
+
+
+QUEUE_FULL = "queue_full"
+DEADLINE = "deadline"
+
+
+class Overloaded(Exception):
+    def __init__(self, pool: str, reason: str, status: int, retry_after: int):
+        super().__init__(f"{pool} pool overloaded ({reason})")
+        self.pool = pool
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+
+class AdmissionPool:
+    # Bounded concurrency plus a bounded wait queue. A full queue is rejected at once (429) so
+    # bursts cannot pile up handler threads; a request that waits past its deadline gets 503.
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, timeout: float):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._avg_service = 0.0
+        self._publish()
+
+    def _publish(self) -> None:
+        labels = {"pool": self.name}
+        REGISTRY.set_gauge("agentic_rag_admission_in_flight", self._active, labels)
+        REGISTRY.set_gauge("agentic_rag_admission_queue_depth", self._waiting, labels)
+
+    def retry_after(self) -> int:
+        # Rough time for the current backlog to drain, from the smoothed service time.
+        backlog = self._waiting + self._active
+        return max(1, math.ceil(self._avg_service * backlog / self.max_concurrent))
+
+    def _reject(self, reason: str, status: int) -> Overloaded:
+        REGISTRY.inc("agentic_rag_admission_rejections_total", labels={"pool": self.name, "reason": reason})
+        return Overloaded(self.name, reason, status, self.retry_after())
+
+    def deadline_for(self, timeout: float | None) -> float:
+        # A per-request timeout can only tighten the pool's deadline, never extend it.
+        return time.monotonic() + (self.timeout if timeout is None else min(self.timeout, max(0.0, timeout)))
+
+    @contextmanager
+    def admit(self, deadline: float) -> Iterator[None]:
+        queued = time.perf_counter()
+        with self._cond:
+            if self._active >= self.max_concurrent:
+                if self._waiting >= self.max_queue:
+                    raise self._reject(QUEUE_FULL, 429)
+                self._waiting += 1
+                self._publish()
+                try:
+                    while self._active >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise self._reject(DEADLINE, 503)
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self._active += 1
+            self._publish()
+        started = time.perf_counter()
+        REGISTRY.observe("agentic_rag_admission_wait_seconds", started - queued, {"pool": self.name})
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._cond:
+                self._active -= 1
+                self._avg_service = elapsed if self._avg_service == 0 else 0.8 * self._avg_service + 0.2 * elapsed
+                self._publish()
+                self._cond.notify()
+
+    def acquire_lock(self, lock: threading.Lock, deadline: float) -> None:
+        # Admitted requests still share the pipeline lock; waiting on it counts against the deadline.
+        if not lock.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            raise self._reject(DEADLINE, 503)
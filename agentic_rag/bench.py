@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from agentic_rag.dense import DenseConfig
+from agentic_rag.pipeline import RAGPipeline
+from agentic_rag.utils import tokenize
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+PROGRAMS = (
+    "Solar Storage Pilot", "Grid Balancing Program", "Wind Repowering Study", "Battery Dispatch Review",
+    "Microgrid Rollout", "Demand Response Trial", "Hydro Upgrade Plan", "Rooftop Portfolio Audit",
+)
+SECTIONS = (
+    "Main Contribution", "Assumptions", "Limitations", "Workflow", "Results", "Risks", "Next Steps",
+    "Security Reminder",
+)
+SUBJECTS = (
+    "The pilot", "The team", "The model", "Operations", "Finance", "Asset Management", "The forecast",
+    "The dispatch plan", "Site reporting", "The approval board",
+)
+VERBS = (
+    "reduced", "increased", "stabilized", "tracked", "reconciled", "forecast", "escalated", "reviewed",
+)
+METRICS = (
+    "planning variance", "battery degradation", "curtailment", "cash-flow variance", "capacity factor",
+    "handoff delay", "panel efficiency", "maintenance backlog", "demand estimates", "rework",
+)
+QUALIFIERS = (
+    "compared with the previous quarter", "during each monthly planning cycle", "across both regions",
+    "after the handoff templates were standardized", "when site logs arrived in mixed formats",
+    "beyond the historical p95 range", "before the Monday approval meeting",
+)
+CODENAMES = (
+    "Kestrel", "Heron", "Osprey", "Falcon", "Plover", "Curlew", "Merlin", "Harrier", "Avocet", "Bittern",
+)
+MISS_TEMPLATES = (
+    "What is the CEO phone number?",
+    "Who won the {n} company chess tournament?",
+    "What is the cafeteria menu for week {n}?",
+    "Which airline does the board prefer for trip {n}?",
+)
+
+CHUNK_TOKENS = 130
+OVERLAP_TOKENS = 30
+DOCS_PER_SHARD = 1000
+
+
+@dataclass
+class SyntheticQuery:
+    question: str
+    expected_phrase: str | None  # None marks an out-of-corpus question that should be refused
+
+
+@dataclass
+class SyntheticCorpus:
+    root: str
+    documents: int
+    estimated_chunks: int
+    bytes_written: int
+    queries: list[SyntheticQuery] = field(default_factory=list)
+
+
+def parse_count(value: str) -> int:
+    text = value.strip().lower()
+    scale = 1
+    if text.endswith("k"):
+        scale, text = 1_000, text[:-1]
+    elif text.endswith("m"):
+        scale, text = 1_000_000, text[:-1]
+    count = int(float(text) * scale)
+    if count <= 0:
+        raise ValueError(f"count must be positive: {value}")
+    return count
+
+
+def _sentence(rng: random.Random) -> str:
+    return (
+        f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(METRICS)} by "
+        f"{rng.randint(2, 40)} percent {rng.choice(QUALIFIERS)}."
+    )
+
+
+def _estimate_chunks(token_count: int) -> int:
+    stride = CHUNK_TOKENS - OVERLAP_TOKENS
+    return max(1, math.ceil(max(0, token_count - OVERLAP_TOKENS) / stride))
+
+
+def generate_corpus(
+    out_dir: str,
+    target_chunks: int,
+    seed: int = 7,
+    sections_per_doc: int = 6,
+    facts_per_doc: int = 1,
+) -> SyntheticCorpus:
+    # Documents mirror sample_docs: a titled brief with short "##" sections of plain sentences.
+    # Each document also states a unique fact whose sentence is the label for a generated question.
+    rng = random.Random(seed)
+    root = Path(out_dir)
+    corpus = SyntheticCorpus(root=str(root), documents=0, estimated_chunks=0, bytes_written=0)
+    while corpus.estimated_chunks < target_chunks:
+        doc_id = corpus.documents
+        codename = f"{CODENAMES[doc_id % len(CODENAMES)]}{doc_id}"
+        lines = [f"# {rng.choice(PROGRAMS)} Brief {doc_id}", ""]
+        fact_slots = set(rng.sample(range(sections_per_doc), min(facts_per_doc, sections_per_doc)))
+        for s_idx in range(sections_per_doc):
+            lines.append(f"## {SECTIONS[(doc_id + s_idx) % len(SECTIONS)]}")
+            for _ in range(rng.randint(2, 4)):
+                lines.append(_sentence(rng))
+            if s_idx in fact_slots:
+                metric = rng.choice(METRICS)
+                fact = f"Project {codename} {rng.choice(VERBS)} {metric} by {rng.randint(2, 40)} percent."
+                lines.append(fact)
+                corpus.queries.append(
+                    SyntheticQuery(
+                        question=f"How did Project {codename} change {metric}?",
+                        expected_phrase=fact,
+                    )
+                )
+            lines.append("")
+        text = "\n".join(lines)
+        shard = root / f"shard_{doc_id // DOCS_PER_SHARD:04d}"
+        shard.mkdir(parents=True, exist_ok=True)
+        (shard / f"brief_{doc_id:07d}.txt").write_text(text, encoding="utf-8")
+        corpus.documents += 1
+        corpus.bytes_written += len(text.encode("utf-8"))
+        corpus.estimated_chunks += _estimate_chunks(len(tokenize(text)))
+    return corpus
+
+
+def sample_queries(corpus: SyntheticCorpus, count: int, seed: int = 7, miss_ratio: float = 0.2) -> list[SyntheticQuery]:
+    rng = random.Random(seed + 1)
+    queries: list[SyntheticQuery] = []
+    n_miss = int(round(count * miss_ratio))
+    hits = corpus.queries or []
+    for _ in range(count - n_miss):
+        if hits:
+            queries.append(rng.choice(hits))
+    for i in range(n_miss):
+        template = MISS_TEMPLATES[i % len(MISS_TEMPLATES)]
+        queries.append(SyntheticQuery(question=template.format(n=rng.randint(1, 999)), expected_phrase=None))
+    rng.shuffle(queries)
+    return queries
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q
+    lo = math.floor(pos)
+    hi = math.ceil(pos)
+    if lo == hi:
+        return sorted_values[lo]
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def latency_summary(seconds: list[float]) -> dict[str, float]:
+    ordered = sorted(seconds)
+    ms = 1000.0
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * ms, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * ms, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * ms, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * ms, 3),
+        "max_ms": round(ordered[-1] * ms, 3) if ordered else 0.0,
+    }
+
+
+def peak_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_benchmark(
+    target_chunks: int,
+    questions: int = 200,
+    seed: int = 7,
+    top_k: int = 5,
+    workdir: str | None = None,
+    dense: DenseConfig | None = None,
+) -> dict:
+    with tempfile.TemporaryDirectory(prefix="agentic_rag_bench_") as tmp:
+        base = Path(workdir or tmp) / f"chunks_{target_chunks}"
+        corpus_dir = base / "corpus"
+        index_path = base / "index.json"
+
+        start = time.perf_counter()
+        corpus = generate_corpus(str(corpus_dir), target_chunks, seed=seed)
+        generate_sec = time.perf_counter() - start
+
+        pipeline = RAGPipeline(dense=dense)
+        start = time.perf_counter()
+        stats = pipeline.ingest([str(corpus_dir)])
+        ingest_sec = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pipeline.retriever.warm()
+        build_sec = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pipeline.save(str(index_path))
+        save_sec = time.perf_counter() - start
+        index_bytes = index_path.stat().st_size
+        del pipeline
+
+        start = time.perf_counter()
+        pipeline = RAGPipeline.load(str(index_path), dense=dense)
+        load_sec = time.perf_counter() - start
+        start = time.perf_counter()
+        pipeline.retriever.warm()
+        load_build_sec = time.perf_counter() - start
+
+        latencies: list[float] = []
+        refused = 0
+        for query in sample_queries(corpus, questions, seed=seed):
+            start = time.perf_counter()
+            result = pipeline.ask(query.question, top_k=top_k)
+            latencies.append(time.perf_counter() - start)
+            refused += not result.citations
+
+    return {
+        "target_chunks": target_chunks,
+        "corpus": {
+            "documents": corpus.documents,
+            "chunks": stats["chunks"],
+            "bytes": corpus.bytes_written,
+            "generate_sec": round(generate_sec, 4),
+        },
+        "ingest": {
+            "seconds": round(ingest_sec, 4),
+            "documents_per_sec": round(corpus.documents / ingest_sec, 2) if ingest_sec else None,
+            "chunks_per_sec": round(stats["chunks"] / ingest_sec, 2) if ingest_sec else None,
+            "mb_per_sec": round(corpus.bytes_written / 1e6 / ingest_sec, 3) if ingest_sec else None,
+        },
+        "index": {
+            "build_sec": round(build_sec, 4),
+            "save_sec": round(save_sec, 4),
+            "load_sec": round(load_sec, 4),
+            "load_build_sec": round(load_build_sec, 4),
+            "bytes": index_bytes,
+        },
+        "ask": {**latency_summary(latencies), "refused": refused, "top_k": top_k},
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def run_suite(
+    sizes: list[int],
+    questions: int = 200,
+    seed: int = 7,
+    top_k: int = 5,
+    workdir: str | None = None,
+    dense: DenseConfig | None = None,
+) -> dict:
+    # Sizes run smallest first in one process, so peak RSS is the high-water mark up to that size.
+    runs = [
+        run_benchmark(n, questions=questions, seed=seed, top_k=top_k, workdir=workdir, dense=dense)
+        for n in sorted(sizes)
+    ]
+    return {
+        "benchmark": "agentic_rag",
+        "schema_version": 1,
+        "timestamp": dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "git_commit": _git_commit(),
+        },
+        "params": {
+            "questions": questions,
+            "seed": seed,
+            "top_k": top_k,
+            "dense": asdict(dense) if dense is not None and dense.enabled else None,
+        },
+        "runs": runs,
+    }
+
+
+def write_report(report: dict, output_path: str | None) -> None:
+    if not output_path:
+        return
+    out = Path(output_path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
@@ -1,13 +1,158 @@
 from __future__ import annotations
 
 import argparse
+import itertools
 import json
+import os
+import sys
+from collections.abc import Iterator
 
-from agentic_rag.memory import select_high_signal_memory, write_memories
-from agentic_rag.pipeline import RAGPipeline
-from agentic_rag.sanity import run_sanity
-from agentic_rag.weather import analyze_open_meteo_timeseries
-from agentic_rag.webapp import run_server
+# Subcommand dependencies are imported inside main() so each command only pays for what it uses.
+# --socket defaults to None and resolves to daemon.DEFAULT_SOCKET_PATH where the daemon is used.
+
+
+def _add_rotation_args(parser: argparse.ArgumentParser, prefix: str) -> None:
+    # No limit given: `serve` never rotates, `history --rotate` uses the RotationPolicy defaults.
+    parser.add_argument(
+        f"{prefix}max-mb",
+        dest="rotate_max_mb",
+        type=float,
+        help="Rotate a session's live history file once it reaches this size",
+    )
+    parser.add_argument(
+        f"{prefix}max-age-days",
+        dest="rotate_max_age_days",
+        type=float,
+        help="Rotate a session once its oldest live event is this old",
+    )
+    parser.add_argument(f"{prefix}codec", dest="rotate_codec", choices=["gzip", "lzma"], default="gzip")
+
+
+def _rotation_policy(args: argparse.Namespace, opt_in: bool = False):
+    from agentic_rag.history_archive import RotationPolicy
+
+    if args.rotate_max_mb is None and args.rotate_max_age_days is None:
+        return None if opt_in else RotationPolicy(codec=args.rotate_codec)
+    # Only the limits given apply; the other one never triggers.
+    return RotationPolicy(
+        max_bytes=int(args.rotate_max_mb * 1024 * 1024) if args.rotate_max_mb is not None else sys.maxsize,
+        max_age_seconds=args.rotate_max_age_days * 24 * 3600 if args.rotate_max_age_days is not None else float("inf"),
+        codec=args.rotate_codec,
+    )
+
+
+def _iter_question_records(path: str) -> Iterator[tuple[object, str]]:
+    handle = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line_no, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record_id: object = line_no
+            question = line
+            if line.startswith("{"):
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    item = None
+                if isinstance(item, dict):
+                    record_id = item.get("id", line_no)
+                    question = str(item.get("question", "")).strip()
+            if question:
+                yield record_id, question
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def _iter_message_records(path: str) -> Iterator[str]:
+    handle = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            text = line
+            if line.startswith("{"):
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    item = None
+                if isinstance(item, dict):
+                    text = str(item.get("text") or item.get("message") or item.get("content") or "").strip()
+            if text:
+                yield text
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def _read_weather_queries(path: str) -> tuple[list[object], list]:
+    # Invalid records are reported on stdout right away and left out of the batch.
+    from agentic_rag.weather import WeatherQuery
+
+    ids: list[object] = []
+    queries: list[WeatherQuery] = []
+    handle = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line_no, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record_id: object = line_no
+            try:
+                item = json.loads(line)
+                record_id = item.get("id", line_no)
+                query = WeatherQuery(
+                    latitude=float(item["lat"]),
+                    longitude=float(item["lon"]),
+                    start_date=str(item["start_date"]),
+                    end_date=str(item["end_date"]),
+                )
+            except (ValueError, KeyError, TypeError, AttributeError) as exc:
+                print(json.dumps({"id": record_id, "error": f"Invalid weather input: {exc}"}), flush=True)
+                continue
+            ids.append(record_id)
+            queries.append(query)
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+    return ids, queries
+
+
+def _add_dense_args(parser: argparse.ArgumentParser, query: bool = True) -> None:
+    # ingest only takes the index-build settings; weight and nprobe apply per query.
+    if query:
+        parser.add_argument(
+            "--dense-weight",
+            type=float,
+            default=0.0,
+            help="Blend weight of the hashed dense-vector leg (0 keeps the exact hybrid ranking)",
+        )
+    parser.add_argument("--dense-dim", type=int, default=128)
+    parser.add_argument("--dense-nlist", type=int, default=0, help="IVF cells (0 = about sqrt(chunks))")
+    if query:
+        parser.add_argument("--dense-nprobe", type=int, default=8, help="IVF cells scanned per query")
+
+
+def _dense_config(args: argparse.Namespace):
+    from agentic_rag.dense import DenseConfig
+
+    if args.command == "ingest":
+        return DenseConfig(dim=args.dense_dim, nlist=args.dense_nlist) if args.dense else None
+    return DenseConfig(weight=args.dense_weight, dim=args.dense_dim, nlist=args.dense_nlist, nprobe=args.dense_nprobe)
+
+
+def _add_filter_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--source", action="append", default=[], help="Only search this source file (repeatable)")
+    parser.add_argument("--section", action="append", default=[], help="Only search this section (repeatable)")
+    parser.add_argument("--batch", action="append", default=[], help="Only search this ingest batch (repeatable)")
+
+
+def _chunk_filter(args: argparse.Namespace):
+    from agentic_rag.models import ChunkFilter
+
+    return ChunkFilter.from_dict({"sources": args.source, "sections": args.section, "batches": args.batch})
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -17,22 +162,105 @@ def build_parser() -> argparse.ArgumentParser:
     p_ingest = sub.add_parser("ingest", help="Ingest files and build index")
     p_ingest.add_argument("--paths", nargs="+", required=True, help="File or folder paths")
     p_ingest.add_argument("--index", default="artifacts/index.json")
+    p_ingest.add_argument(
+        "--dedupe-distance",
+        type=int,
+        help="Collapse chunks whose 64-bit SimHash differs in at most this many bits (0-63, default 4)",
+    )
+    p_ingest.add_argument("--no-dedupe", action="store_true", help="Keep near-duplicate chunks")
+    p_ingest.add_argument("--batch", default="", help="Label the ingested chunks for `ask --batch` filtering")
+    p_ingest.add_argument(
+        "--dense",
+        action="store_true",
+        help="Also build the IVF index for `ask --dense-weight` and save it with the postings",
+    )
+    _add_dense_args(p_ingest, query=False)
+    p_ingest.add_argument("--trace", action="store_true", help="Print the per-stage span tree to stderr")
+    p_ingest.add_argument("--profile", action="store_true", help="Capture cProfile/tracemalloc to artifacts/profiles/")
 
     p_ask = sub.add_parser("ask", help="Ask grounded question")
-    p_ask.add_argument("--question", required=True)
+    p_ask_source = p_ask.add_mutually_exclusive_group(required=True)
+    p_ask_source.add_argument("--question")
+    p_ask_source.add_argument(
+        "--questions-file",
+        help="JSONL ({\"question\": ..., \"id\": ...}) or plain-text file, one question per line; '-' for stdin",
+    )
     p_ask.add_argument("--index", default="artifacts/index.json")
     p_ask.add_argument("--top-k", type=int, default=5)
+    p_ask.add_argument("--socket", help="Daemon socket to forward to")
+    p_ask.add_argument("--no-daemon", action="store_true", help="Always answer in-process")
+    _add_dense_args(p_ask)
+    _add_filter_args(p_ask)
+    p_ask.add_argument(
+        "--proximity-weight",
+        type=float,
+        default=0.0,
+        help="Boost for query terms appearing close together (0 keeps the exact hybrid ranking)",
+    )
+    p_ask.add_argument(
+        "--trace",
+        action="store_true",
+        help="Answer in-process and print the per-stage span tree to stderr",
+    )
+    p_ask.add_argument(
+        "--profile",
+        action="store_true",
+        help="Answer in-process under cProfile/tracemalloc and write the profile to artifacts/profiles/",
+    )
 
     p_memory = sub.add_parser("remember", help="Extract and write high-signal memory")
-    p_memory.add_argument("--text", required=True)
+    source = p_memory.add_mutually_exclusive_group(required=True)
+    source.add_argument("--text")
+    source.add_argument(
+        "--from-jsonl",
+        help="Bulk mode: JSONL of messages (text/message/content field, or plain lines); '-' reads stdin",
+    )
+    source.add_argument(
+        "--from-sessions",
+        nargs="*",
+        metavar="SESSION_ID",
+        help="Bulk mode: replay stored session history (all sessions when no ids are given)",
+    )
+    p_memory.add_argument("--workers", type=int, default=None, help="Extraction processes for bulk mode (default: none, extract in-process)")
+    p_memory.add_argument(
+        "--match-contained",
+        action="store_true",
+        help="Also skip summaries contained in a stored one (scans every stored summary per write)",
+    )
     p_memory.add_argument("--user-memory", default="USER_MEMORY.md")
     p_memory.add_argument("--company-memory", default="COMPANY_MEMORY.md")
 
     p_weather = sub.add_parser("weather", help="Open-Meteo analytics")
-    p_weather.add_argument("--lat", required=True, type=float)
-    p_weather.add_argument("--lon", required=True, type=float)
-    p_weather.add_argument("--start-date", required=True)
-    p_weather.add_argument("--end-date", required=True)
+    p_weather.add_argument("--lat", type=float)
+    p_weather.add_argument("--lon", type=float)
+    p_weather.add_argument("--start-date")
+    p_weather.add_argument("--end-date")
+    p_weather.add_argument(
+        "--batch",
+        help="JSONL of {\"lat\", \"lon\", \"start_date\", \"end_date\", \"id\"} locations; '-' for stdin",
+    )
+    p_weather.add_argument("--workers", type=int, default=8, help="Concurrent fetches in batch mode")
+    p_weather.add_argument("--window-days", type=int, default=366, help="Batch mode splits ranges into windows of this size")
+    p_weather.add_argument(
+        "--base-url",
+        default=None,
+        help="Serve both Open-Meteo endpoints from this base URL, e.g. a local weather-stub (env OPEN_METEO_BASE_URL)",
+    )
+    p_weather.add_argument("--http-timeout", type=float, default=12.0)
+    p_weather.add_argument("--http-retries", type=int, default=3, help="Retries for connection errors, 429 and 5xx")
+    p_weather.add_argument("--no-cache", action="store_true", help="Bypass the on-disk daily cache")
+    p_weather.add_argument(
+        "--forecast-ttl-hours",
+        type=float,
+        default=3.0,
+        help="How long cached forecast (non-final) days stay fresh",
+    )
+
+    p_stub = sub.add_parser("weather-stub", help="Local Open-Meteo stand-in with synthetic data")
+    p_stub.add_argument("--host", default="127.0.0.1")
+    p_stub.add_argument("--port", type=int, default=8765)
+    p_stub.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every response")
+    p_stub.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
 
     p_sanity = sub.add_parser("sanity", help="Run end-to-end sanity flow")
     p_sanity.add_argument("--output", default="artifacts/sanity_output.json")
@@ -41,32 +269,222 @@ def build_parser() -> argparse.ArgumentParser:
     p_serve.add_argument("--host", default="127.0.0.1")
     p_serve.add_argument("--port", type=int, default=7860)
     p_serve.add_argument("--index", default="artifacts/index.json")
+    p_serve.add_argument(
+        "--profile-sample-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of /api/ask requests to profile (0-1)",
+    )
+    p_serve.add_argument(
+        "--profile-header",
+        default="X-Profile",
+        help="Requests with this header set to 1/true are always profiled",
+    )
+    p_serve.add_argument("--ask-concurrency", type=int, default=4, help="Ask requests processed at once")
+    p_serve.add_argument("--ask-queue", type=int, default=32, help="Ask requests allowed to wait before 429")
+    p_serve.add_argument("--upload-concurrency", type=int, default=1)
+    p_serve.add_argument("--upload-queue", type=int, default=4)
+    p_serve.add_argument(
+        "--request-timeout",
+        type=float,
+        default=10.0,
+        help="Seconds a request may wait for a slot before 503 (override per request with timeout_ms)",
+    )
+    p_serve.add_argument(
+        "--collections-dir",
+        default="artifacts/collections",
+        help="Named collections live here as <name>.json; --index is the 'default' collection",
+    )
+    p_serve.add_argument(
+        "--max-collection-mb",
+        type=float,
+        default=1024.0,
+        help="Estimated memory budget for loaded collections before LRU eviction",
+    )
+    p_serve.add_argument(
+        "--max-collections",
+        type=int,
+        help="Most collections (including default) that uploads may create; further new names get 409 (default 64)",
+    )
+    p_serve.add_argument(
+        "--preload",
+        nargs="*",
+        default=["default"],
+        help="Collections to load and warm at startup",
+    )
+    p_serve.add_argument(
+        "--history-durability",
+        choices=["none", "fsync"],
+        default="none",
+        help="fsync each history batch before the request returns, or leave flushing to the OS",
+    )
+    p_serve.add_argument(
+        "--history-flush-ms",
+        type=float,
+        default=50.0,
+        help="Longest time a history event waits for its batch to be written",
+    )
+    _add_rotation_args(p_serve, "--history-")
 
     p_hist = sub.add_parser("history", help="Read session history")
     p_hist.add_argument("--session-id", default="default")
+    p_hist.add_argument("--limit", type=int, default=200)
+    p_hist.add_argument("--before", type=int, help="Page cursor: return events before this ordinal")
+    p_hist.add_argument("--socket", help="Daemon socket to forward to")
+    p_hist.add_argument("--no-daemon", action="store_true", help="Always read in-process")
+    p_hist.add_argument(
+        "--rotate",
+        action="store_true",
+        help="Move sessions over the size/age limits into compressed archive segments, then exit",
+    )
+    _add_rotation_args(p_hist, "--")
+
+    p_bench = sub.add_parser("bench", help="Benchmark ingest, index and ask latency on synthetic corpora")
+    p_bench.add_argument(
+        "--chunks",
+        nargs="+",
+        default=["1k"],
+        help="Target corpus sizes in chunks, e.g. 1k 10k 1m",
+    )
+    p_bench.add_argument("--questions", type=int, default=200)
+    p_bench.add_argument("--seed", type=int, default=7)
+    p_bench.add_argument("--top-k", type=int, default=5)
+    p_bench.add_argument("--workdir", help="Keep generated corpora and indexes here instead of a temp dir")
+    p_bench.add_argument("--output", help="Also write the JSON report to this path")
+    _add_dense_args(p_bench)
+
+    p_eval = sub.add_parser("eval", help="Score retrieval backends for recall@k, MRR, latency and exact-ranking parity")
+    p_eval.add_argument("--backends", nargs="+", default=["exact", "default", "bounded"])
+    p_eval.add_argument("--k", type=int, default=5)
+    p_eval.add_argument("--eval-file", default="EVAL_QUESTIONS.md")
+    p_eval.add_argument("--paths", nargs="+", help="Corpus for the EVAL_QUESTIONS suite (defaults to sample_docs)")
+    p_eval.add_argument("--synthetic-chunks", default="0", help="Also evaluate a generated corpus of this size, e.g. 10k")
+    p_eval.add_argument("--synthetic-questions", type=int, default=200)
+    p_eval.add_argument("--seed", type=int, default=7)
+    p_eval.add_argument("--output", help="Also write the JSON report to this path")
+    p_eval.add_argument("--fail-on-mismatch", action="store_true", help="Exit 1 if any backend ranks differently from exact")
+
+    p_daemon = sub.add_parser("daemon", help="Keep the index loaded and serve ask/history over a Unix socket")
+    p_daemon.add_argument("--socket", help="Unix socket to listen on")
+    p_daemon.add_argument("--index", default="artifacts/index.json")
     return parser
 
 
 def main() -> None:
     parser = build_parser()
     args = parser.parse_args()
+    if args.command == "weather" and not args.batch and None in (args.lat, args.lon, args.start_date, args.end_date):
+        parser.error("weather requires --lat, --lon, --start-date and --end-date (or --batch)")
+    if args.command == "ingest" and args.dedupe_distance is not None and not 0 <= args.dedupe_distance < 64:
+        parser.error("--dedupe-distance must be between 0 and 63")
+    if getattr(args, "profile", False):
+        from agentic_rag.pipeline import index_file_version
+        from agentic_rag.profiling import Profiler
+
+        meta = {"command": args.command, "question": getattr(args, "question", None), "index": args.index}
+
+        def run_and_stamp() -> None:
+            _run_traced(args)
+            # Stamped after the run so `ingest --profile` records the index it just wrote.
+            meta["index_version"] = index_file_version(args.index)
+
+        _, record = Profiler().profile_call(f"cli-{args.command}", meta, run_and_stamp)
+        print(f"profile written to {record}", file=sys.stderr)
+        return
+    _run_traced(args)
+
+
+def _run_traced(args: argparse.Namespace) -> None:
+    if getattr(args, "trace", False):
+        from agentic_rag.tracing import format_span_tree, span
+
+        with span(f"cli.{args.command}") as root:
+            _run(args)
+        print(format_span_tree(root), file=sys.stderr)
+        return
+    _run(args)
+
+
+def _run(args: argparse.Namespace) -> None:
 
     if args.command == "ingest":
-        pipeline = RAGPipeline()
-        stats = pipeline.ingest(args.paths)
-        pipeline.save(args.index)
+        from agentic_rag.pipeline import DEDUPE_MAX_DISTANCE, RAGPipeline
+
+        distance = DEDUPE_MAX_DISTANCE if args.dedupe_distance is None else args.dedupe_distance
+        pipeline = RAGPipeline(dedupe_distance=None if args.no_dedupe else distance)
+        stats = pipeline.ingest(args.paths, batch=args.batch)
+        pipeline.save(args.index, dense=_dense_config(args))
         print(json.dumps({"status": "ok", **stats, "index": args.index}, indent=2))
         return
 
     if args.command == "ask":
-        pipeline = RAGPipeline.load(args.index)
-        result = pipeline.ask(args.question, top_k=args.top_k)
+        filters = _chunk_filter(args)
+        # The daemon keeps the index loaded without a proximity boost, so those queries are answered
+        # in-process; dense settings travel with the request.
+        in_process = args.no_daemon or args.trace or args.profile or args.proximity_weight > 0
+        if args.question and not in_process:
+            from agentic_rag.daemon import DEFAULT_SOCKET_PATH, request_daemon
+
+            response = request_daemon(
+                {
+                    "command": "ask",
+                    "question": args.question,
+                    "top_k": args.top_k,
+                    "index": os.path.abspath(args.index),
+                    "filters": filters.to_dict(),
+                    # DenseConfig fields, without importing it on the fast path.
+                    "dense": {
+                        "weight": args.dense_weight,
+                        "dim": args.dense_dim,
+                        "nlist": args.dense_nlist,
+                        "nprobe": args.dense_nprobe,
+                    },
+                },
+                args.socket or DEFAULT_SOCKET_PATH,
+            )
+            if response and "result" in response:
+                print(json.dumps(response["result"], indent=2))
+                return
+        from agentic_rag.pipeline import RAGPipeline
+
+        pipeline = RAGPipeline.load(args.index, dense=_dense_config(args), proximity_weight=args.proximity_weight)
+        if args.questions_file:
+            records, questions = itertools.tee(_iter_question_records(args.questions_file))
+            results = pipeline.ask_batch((q for _, q in questions), top_k=args.top_k, filters=filters)
+            for (record_id, _), result in zip(records, results):
+                print(json.dumps({"id": record_id, **result.to_dict()}), flush=True)
+            return
+        result = pipeline.ask(args.question, top_k=args.top_k, filters=filters)
         print(json.dumps(result.to_dict(), indent=2))
         return
 
     if args.command == "remember":
+        from agentic_rag.memory import extract_bulk, select_high_signal_memory, write_memories
+
+        if args.text is None:
+            if args.from_jsonl is not None:
+                messages = _iter_message_records(args.from_jsonl)
+            else:
+                from agentic_rag.history import iter_session_messages
+
+                messages = iter_session_messages(args.from_sessions or None)
+            candidates, seen = extract_bulk(messages, workers=args.workers)
+            writes = write_memories(candidates, args.user_memory, args.company_memory, args.match_contained)
+            print(
+                json.dumps(
+                    {
+                        "status": "ok",
+                        "messages": seen,
+                        "candidates": len(candidates),
+                        "written": writes,
+                    },
+                    indent=2,
+                )
+            )
+            return
+
         decisions = select_high_signal_memory(args.text)
-        writes = write_memories(decisions, args.user_memory, args.company_memory)
+        writes = write_memories(decisions, args.user_memory, args.company_memory, args.match_contained)
         print(
             json.dumps(
                 {
@@ -80,32 +498,150 @@ def main() -> None:
         return
 
     if args.command == "weather":
+        from agentic_rag.http_client import HttpClient
+        from agentic_rag.weather import analyze_open_meteo_timeseries, analyze_weather_batch, configure_http
+        from agentic_rag.weather_cache import cache_path_for, weather_cache
+
+        base_url = args.base_url or os.environ.get("OPEN_METEO_BASE_URL")
+        configure_http(
+            HttpClient(timeout=args.http_timeout, retries=args.http_retries, pool_size=max(args.workers, 1)),
+            base_url=base_url,
+        )
+        cache = None
+        if not args.no_cache:
+            cache = weather_cache(cache_path_for(base_url), forecast_ttl=args.forecast_ttl_hours * 3600)
+        if args.batch:
+            ids, queries = _read_weather_queries(args.batch)
+            results = analyze_weather_batch(
+                queries,
+                max_workers=args.workers,
+                window_days=args.window_days,
+                use_cache=not args.no_cache,
+                cache=cache,
+            )
+            for record_id, result in zip(ids, results):
+                print(json.dumps({"id": record_id, **result.to_dict()}), flush=True)
+            return
         try:
             result = analyze_open_meteo_timeseries(
                 latitude=args.lat,
                 longitude=args.lon,
                 start_date=args.start_date,
                 end_date=args.end_date,
+                use_cache=not args.no_cache,
+                cache=cache,
             )
             print(json.dumps(result.to_dict(), indent=2))
         except ValueError as exc:
             print(json.dumps({"error": f"Invalid weather input: {exc}"}, indent=2))
         return
 
+    if args.command == "weather-stub":
+        from agentic_rag.open_meteo_stub import run_stub_server
+
+        run_stub_server(host=args.host, port=args.port, latency_ms=args.latency_ms, error_rate=args.error_rate)
+        return
+
     if args.command == "sanity":
+        from agentic_rag.sanity import run_sanity
+
         payload = run_sanity(args.output)
         print(json.dumps(payload, indent=2))
         return
 
     if args.command == "serve":
-        run_server(host=args.host, port=args.port, index_path=args.index)
+        from agentic_rag.collection import DEFAULT_MAX_COLLECTIONS
+        from agentic_rag.webapp import run_server
+
+        run_server(
+            host=args.host,
+            port=args.port,
+            index_path=args.index,
+            profile_sample_rate=args.profile_sample_rate,
+            profile_header=args.profile_header,
+            ask_concurrency=args.ask_concurrency,
+            ask_queue=args.ask_queue,
+            upload_concurrency=args.upload_concurrency,
+            upload_queue=args.upload_queue,
+            request_timeout=args.request_timeout,
+            collections_dir=args.collections_dir,
+            max_collection_bytes=int(args.max_collection_mb * 1024 * 1024),
+            max_collections=DEFAULT_MAX_COLLECTIONS if args.max_collections is None else args.max_collections,
+            preload=args.preload,
+            history_durability=args.history_durability,
+            history_flush_ms=args.history_flush_ms,
+            history_rotation=_rotation_policy(args, opt_in=True),
+        )
+        return
+
+    if args.command == "bench":
+        from agentic_rag.bench import parse_count, run_suite, write_report
+
+        try:
+            sizes = [parse_count(v) for v in args.chunks]
+        except ValueError as exc:
+            print(json.dumps({"error": f"Invalid --chunks value: {exc}"}, indent=2))
+            return
+        report = run_suite(
+            sizes,
+            questions=args.questions,
+            seed=args.seed,
+            top_k=args.top_k,
+            workdir=args.workdir,
+            dense=_dense_config(args),
+        )
+        write_report(report, args.output)
+        print(json.dumps(report, indent=2))
+        return
+
+    if args.command == "eval":
+        from agentic_rag.bench import parse_count, write_report
+        from agentic_rag.evaluation import run_evaluation
+
+        try:
+            synthetic_chunks = parse_count(args.synthetic_chunks) if args.synthetic_chunks != "0" else 0
+            report = run_evaluation(
+                args.backends,
+                k=args.k,
+                eval_file=args.eval_file,
+                paths=args.paths,
+                synthetic_chunks=synthetic_chunks,
+                synthetic_questions=args.synthetic_questions,
+                seed=args.seed,
+            )
+        except ValueError as exc:
+            print(json.dumps({"error": str(exc)}, indent=2))
+            sys.exit(2)
+        write_report(report, args.output)
+        print(json.dumps(report, indent=2))
+        if args.fail_on_mismatch and not report["all_match_exact"]:
+            sys.exit(1)
+        return
+
+    if args.command == "daemon":
+        from agentic_rag.daemon import DEFAULT_SOCKET_PATH, run_daemon
+
+        run_daemon(socket_path=args.socket or DEFAULT_SOCKET_PATH, index_path=args.index)
         return
 
     if args.command == "history":
-        from agentic_rag.history import read_session_history
+        if args.rotate:
+            from agentic_rag.history import rotate_sessions
+
+            print(json.dumps({"rotated": rotate_sessions(_rotation_policy(args))}, indent=2))
+            return
+        if not args.no_daemon:
+            from agentic_rag.daemon import DEFAULT_SOCKET_PATH, request_daemon
+
+            request = {"command": "history", "session_id": args.session_id, "before": args.before, "limit": args.limit}
+            response = request_daemon(request, args.socket or DEFAULT_SOCKET_PATH)
+            if response and "result" in response:
+                print(json.dumps(response["result"], indent=2))
+                return
+        from agentic_rag.history import read_session_page
 
-        events = read_session_history(args.session_id)
-        print(json.dumps({"session_id": args.session_id, "history": events}, indent=2))
+        page = read_session_page(args.session_id, before=args.before, limit=args.limit)
+        print(json.dumps({"session_id": args.session_id, **page}, indent=2))
         return
 
 
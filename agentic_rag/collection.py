@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from agentic_rag.pipeline import RAGPipeline
+from agentic_rag.tracing import REGISTRY, span
+
+
+DEFAULT_COLLECTION = "default"
+COLLECTIONS_DIR = Path("artifacts/collections")
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# Upper bound on collections (on disk or loaded, including default); uploads can't create more.
+DEFAULT_MAX_COLLECTIONS = 64
+_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+
+class UnknownCollection(LookupError):
+    pass
+
+
+class CollectionLimit(Exception):
+    pass
+
+
+class Collection:
+    def __init__(self, name: str, index_path: Path, pipeline: RAGPipeline):
+        self.name = name
+        self.index_path = index_path
+        self.pipeline = pipeline
+        # Serializes ingest/search on this collection only; other collections proceed in parallel.
+        self.lock = threading.Lock()
+        # Requests currently holding this collection (see CollectionManager.use); guarded by the
+        # manager lock. Pinned collections are never evicted.
+        self.in_use = 0
+        self.estimated_bytes = pipeline.memory_estimate()
+        self.last_used = time.time()
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "loaded": True,
+            "chunks": len(self.pipeline.chunks),
+            "estimated_bytes": self.estimated_bytes,
+            "index_version": self.pipeline.index_version,
+            "last_used": round(self.last_used, 3),
+        }
+
+
+class CollectionManager:
+    # Named indexes loaded on first use and kept in LRU order. When the summed memory estimate
+    # exceeds max_bytes, least recently used collections are dropped. Requests take collections
+    # through use(), which pins them for the whole request, so a collection is never evicted
+    # while a request might still write into it.
+    def __init__(
+        self,
+        default_index_path: str,
+        collections_dir: Path | str = COLLECTIONS_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_collections: int = DEFAULT_MAX_COLLECTIONS,
+    ):
+        self.default_index_path = Path(default_index_path)
+        self.collections_dir = Path(collections_dir)
+        self.max_bytes = max_bytes
+        self.max_collections = max(1, max_collections)
+        self._loaded: OrderedDict[str, Collection] = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: dict[str, threading.Lock] = {}
+
+    def index_path(self, name: str) -> Path:
+        if name == DEFAULT_COLLECTION:
+            return self.default_index_path
+        if not _NAME_RE.match(name):
+            raise ValueError(f"invalid collection name: {name!r}")
+        return self.collections_dir / f"{name}.json"
+
+    def names(self) -> list[str]:
+        on_disk = {p.stem for p in self.collections_dir.glob("*.json")} if self.collections_dir.exists() else set()
+        with self._lock:
+            loaded = set(self._loaded)
+        return sorted(on_disk | loaded | {DEFAULT_COLLECTION})
+
+    @contextmanager
+    def use(self, name: str, create: bool = False) -> Iterator[Collection]:
+        collection = self.get(name, create=create, pin=True)
+        try:
+            yield collection
+        finally:
+            with self._lock:
+                collection.in_use -= 1
+                self._evict(keep=name)
+
+    def get(self, name: str, create: bool = False, pin: bool = False) -> Collection:
+        path = self.index_path(name)
+        with self._lock:
+            collection = self._touch(name, pin)
+            if collection is not None:
+                return collection
+            loading = self._loading.setdefault(name, threading.Lock())
+        # Load outside the manager lock so a slow load does not block hits on other collections.
+        with loading:
+            with self._lock:
+                collection = self._touch(name, pin)
+                if collection is not None:
+                    return collection
+            try:
+                if name != DEFAULT_COLLECTION and not path.exists():
+                    if not create:
+                        raise UnknownCollection(name)
+                    if len(self.names()) >= self.max_collections:
+                        raise CollectionLimit(f"collection limit ({self.max_collections}) reached")
+                with span("collection.load"):
+                    collection = Collection(name, path, RAGPipeline.load(str(path)))
+                # Unlabeled: names are client-chosen, so a per-collection series would be unbounded.
+                REGISTRY.inc("agentic_rag_collection_loads_total")
+                with self._lock:
+                    collection.in_use += pin
+                    self._loaded[name] = collection
+                    self._evict(keep=name)
+                return collection
+            finally:
+                with self._lock:
+                    self._loading.pop(name, None)
+
+    def _touch(self, name: str, pin: bool = False) -> Collection | None:
+        collection = self._loaded.get(name)
+        if collection is not None:
+            self._loaded.move_to_end(name)
+            collection.last_used = time.time()
+            collection.in_use += pin
+        return collection
+
+    def resized(self, collection: Collection) -> None:
+        # Called after ingest changes a collection's size.
+        with self._lock:
+            collection.estimated_bytes = collection.pipeline.memory_estimate()
+            self._evict(keep=collection.name)
+
+    def _evict(self, keep: str) -> None:
+        total = sum(c.estimated_bytes for c in self._loaded.values())
+        for name in list(self._loaded):
+            if total <= self.max_bytes:
+                break
+            if name == keep or self._loaded[name].in_use:
+                continue  # pinned collections stay so an upload is never written into an evicted copy
+            total -= self._loaded.pop(name).estimated_bytes
+            REGISTRY.inc("agentic_rag_collection_evictions_total")
+
+    def preload(self, names: list[str]) -> None:
+        for name in names:
+            self.get(name).pipeline.retriever.warm()
+
+    def loaded(self) -> list[Collection]:
+        with self._lock:
+            return list(self._loaded.values())
+
+    def describe(self) -> list[dict]:
+        loaded = {c.name: c for c in self.loaded()}
+        return [
+            loaded[name].to_dict() if name in loaded else {"name": name, "loaded": False}
+            for name in self.names()
+        ]
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+
+# Server-side modules are imported where they are used: `cli ask` imports this module just to
+# talk to a running daemon and should not pay for socketserver, threading or the pipeline.
+
+DEFAULT_SOCKET_PATH = "artifacts/agentic_rag.sock"
+CONNECT_TIMEOUT_SEC = 0.25
+RESPONSE_TIMEOUT_SEC = 120.0
+
+
+def _index_signature(index_path: str) -> tuple[int, int] | None:
+    try:
+        st = os.stat(index_path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class DaemonState:
+    def __init__(self, index_path: str):
+        import threading
+
+        from agentic_rag.pipeline import RAGPipeline
+
+        self.index_path = os.path.abspath(index_path)
+        self.lock = threading.Lock()
+        self.signature = _index_signature(self.index_path)
+        self.pipeline = RAGPipeline.load(self.index_path)
+        # Dense views of the loaded pipeline by DenseConfig fields; they share its scoring caches
+        # and the IVF index saved by `ingest --dense`, so keeping them costs little.
+        self.dense_views: dict[tuple, object] = {}
+
+    def current_pipeline(self):
+        from agentic_rag.pipeline import RAGPipeline
+
+        # A stat per request is cheap and lets `cli ingest` refresh a running daemon.
+        signature = _index_signature(self.index_path)
+        if signature != self.signature:
+            self.pipeline = RAGPipeline.load(self.index_path)
+            self.signature = signature
+            self.dense_views.clear()
+        return self.pipeline
+
+    def pipeline_for(self, dense):
+        from dataclasses import astuple
+
+        pipeline = self.current_pipeline()
+        if not dense.enabled:
+            return pipeline
+        key = astuple(dense)
+        view = self.dense_views.get(key)
+        if view is None:
+            view = self.dense_views[key] = pipeline.with_dense(dense)
+        return view
+
+    def handle(self, request: dict) -> dict:
+        command = request.get("command")
+        if command == "ping":
+            return {"status": "ok", "index": self.index_path}
+        if command == "ask":
+            if os.path.abspath(str(request.get("index", ""))) != self.index_path:
+                return {"error": "index_mismatch", "index": self.index_path}
+            question = str(request.get("question", "")).strip()
+            if not question:
+                return {"error": "question is required"}
+            from agentic_rag.dense import DenseConfig
+            from agentic_rag.models import ChunkFilter
+
+            try:
+                filters = ChunkFilter.from_dict(request.get("filters"))
+                dense = DenseConfig(**(request.get("dense") or {}))
+            except (TypeError, ValueError) as exc:
+                return {"error": str(exc)}
+            with self.lock:
+                pipeline = self.pipeline_for(dense)
+                result = pipeline.ask(question, top_k=int(request.get("top_k", 5)), filters=filters)
+            return {"status": "ok", "result": result.to_dict()}
+        if command == "history":
+            from agentic_rag.history import read_session_page
+
+            session_id = str(request.get("session_id", "default"))
+            before = request.get("before")
+            page = read_session_page(
+                session_id,
+                before=int(before) if before is not None else None,
+                limit=int(request.get("limit", 200)),
+            )
+            return {"status": "ok", "result": {"session_id": session_id, **page}}
+        return {"error": f"unknown command: {command}"}
+
+
+def _make_handler(state: DaemonState):
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            line = self.rfile.readline()
+            try:
+                request = json.loads(line.decode("utf-8") or "{}")
+                response = state.handle(request) if isinstance(request, dict) else {"error": "bad request"}
+            except json.JSONDecodeError:
+                response = {"error": "Invalid JSON request"}
+            except Exception as exc:  # keep the daemon alive for the next caller
+                response = {"error": f"{exc.__class__.__name__}: {exc}"}
+            self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+
+    return Handler
+
+
+def request_daemon(
+    payload: dict,
+    socket_path: str = DEFAULT_SOCKET_PATH,
+    timeout_sec: float = RESPONSE_TIMEOUT_SEC,
+) -> dict | None:
+    # None means "no usable daemon" so callers can fall back to in-process execution.
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT_SEC)
+        sock.connect(socket_path)
+        sock.settimeout(timeout_sec)
+        sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+    except OSError:
+        return None
+    finally:
+        sock.close()
+    try:
+        response = json.loads(line.decode("utf-8"))
+    except json.JSONDecodeError:
+        return None
+    return response if isinstance(response, dict) else None
+
+
+def _raise_interrupt(signum, frame) -> None:
+    raise KeyboardInterrupt
+
+
+def run_daemon(socket_path: str = DEFAULT_SOCKET_PATH, index_path: str = "artifacts/index.json") -> None:
+    import signal
+    import socketserver
+    import threading
+    from pathlib import Path
+
+    if not hasattr(socket, "AF_UNIX"):
+        raise SystemExit("Unix domain sockets are not supported on this platform.")
+    path = Path(socket_path)
+    if path.exists():
+        if request_daemon({"command": "ping"}, socket_path, timeout_sec=CONNECT_TIMEOUT_SEC):
+            raise SystemExit(f"A daemon is already listening on {socket_path}")
+        path.unlink()  # stale socket left behind by a crashed daemon
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    state = DaemonState(index_path)
+    server = socketserver.ThreadingUnixStreamServer(str(path), _make_handler(state))
+    server.daemon_threads = True
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _raise_interrupt)
+    try:
+        os.chmod(path, 0o600)
+        print(f"Daemon listening on {socket_path} (index {state.index_path})", flush=True)
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if path.exists():
+            path.unlink()
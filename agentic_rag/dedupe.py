@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import replace
+
+from agentic_rag.models import DocumentChunk
+from agentic_rag.tracing import REGISTRY
+from agentic_rag.utils import tokenize
+
+
+SHINGLE_SIZE = 3
+MEMO_LIMIT = 200_000
+_LANE_BITS = 16
+_LANE_MASK = (1 << _LANE_BITS) - 1
+# _SPREAD[j][b] puts bit k of digest byte j into its own 16-bit lane (lane 8j + k) of a wide int,
+# so adding one spread value per shingle counts all 64 bit positions at once. Lanes cannot
+# overflow below 65536 shingles per chunk.
+_SPREAD = [[sum(((b >> k) & 1) << (_LANE_BITS * (8 * j + k)) for k in range(8)) for b in range(256)] for j in range(8)]
+
+
+def _spread(shingle: str) -> int:
+    d = hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+    s0, s1, s2, s3, s4, s5, s6, s7 = _SPREAD
+    return s0[d[0]] + s1[d[1]] + s2[d[2]] + s3[d[3]] + s4[d[4]] + s5[d[5]] + s6[d[6]] + s7[d[7]]
+
+
+def simhash(tokens: list[str], memo: dict[str, int] | None = None) -> int:
+    # 64-bit SimHash over word shingles: each bit is set when most shingle hashes have it set.
+    memo = memo if memo is not None else {}
+    if len(tokens) >= SHINGLE_SIZE:
+        shingles = [" ".join(tokens[i : i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    else:
+        shingles = [" ".join(tokens)] if tokens else []
+    if len(memo) > MEMO_LIMIT:
+        memo.clear()
+    total = 0
+    for shingle in shingles:
+        value = memo.get(shingle)
+        if value is None:
+            value = memo[shingle] = _spread(shingle)
+        total += value
+    half = len(shingles) / 2
+    fingerprint = 0
+    for bit in range(64):
+        if ((total >> (_LANE_BITS * bit)) & _LANE_MASK) > half:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def _alias(chunk: DocumentChunk) -> dict:
+    return {
+        "chunk_id": chunk.chunk_id,
+        "source": chunk.source,
+        "section": chunk.section,
+        "start_line": chunk.start_line,
+        "end_line": chunk.end_line,
+        "batch": chunk.batch,
+    }
+
+
+def collapse_near_duplicates(
+    chunks: list[DocumentChunk],
+    max_distance: int,
+) -> tuple[list[DocumentChunk], int]:
+    # Keeps the first chunk of every near-duplicate group (SimHash Hamming distance <=
+    # max_distance) and records the others as its aliases. LSH splits fingerprints into
+    # max_distance + 1 bands, so by pigeonhole any pair within the distance shares a band exactly
+    # and only same-band chunks are compared. Returns (canonical chunks, chunks collapsed).
+    if not 0 <= max_distance < 64:
+        raise ValueError("max_distance must be between 0 and 63")
+    bands = max_distance + 1
+    width = 64 // bands
+    mask = (1 << width) - 1
+    buckets: dict[tuple[int, int], list[int]] = {}
+    fingerprints: list[int] = []
+    kept: list[DocumentChunk] = []
+    memo: dict[str, int] = {}
+    collapsed = 0
+    for chunk in chunks:
+        fingerprint = simhash(tokenize(chunk.text), memo)
+        keys = [(band, (fingerprint >> (band * width)) & mask) for band in range(bands)]
+        match = None
+        for key in keys:
+            for pos in buckets.get(key, ()):
+                if (fingerprints[pos] ^ fingerprint).bit_count() <= max_distance:
+                    match = pos
+                    break
+            if match is not None:
+                break
+        if match is None:
+            for key in keys:
+                buckets.setdefault(key, []).append(len(kept))
+            fingerprints.append(fingerprint)
+            kept.append(chunk)
+            continue
+        canonical = kept[match]
+        known = {canonical.chunk_id} | {a["chunk_id"] for a in canonical.aliases}
+        new_aliases = [a for a in [_alias(chunk), *chunk.aliases] if a["chunk_id"] not in known]
+        if new_aliases:
+            kept[match] = replace(canonical, aliases=canonical.aliases + new_aliases)
+        collapsed += 1
+    REGISTRY.inc("agentic_rag_ingest_collapsed_chunks_total", collapsed)
+    return kept, collapsed
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import heapq
+import math
+import operator
+import zlib
+from array import array
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+
+from agentic_rag.tracing import span
+from agentic_rag.utils import char_ngrams, tokenize
+
+
+TOKEN_WEIGHT = 1.0
+TRIGRAM_WEIGHT = 0.5
+KMEANS_ITERATIONS = 6
+KMEANS_SAMPLE_PER_LIST = 32
+RERANK_FACTOR = 4
+CENTROID_SHORTLIST = 8
+
+
+@dataclass
+class DenseConfig:
+    # weight 0 disables the dense leg entirely, leaving the hybrid ranking bit-identical.
+    weight: float = 0.0
+    dim: int = 128
+    nlist: int = 0  # 0 picks ~sqrt(chunks)
+    nprobe: int = 16
+    candidates: int = 200
+    seed: int = 7
+
+    @property
+    def enabled(self) -> bool:
+        return self.weight > 0
+
+    @property
+    def index_key(self) -> tuple[int, int, int]:
+        # What the IVF index is built from; weight, nprobe and candidates only apply per query.
+        return (self.dim, self.nlist, self.seed)
+
+
+class FeatureHasher:
+    # Signed feature hashing into `dim` buckets; bucket/sign pairs are memoized per feature,
+    # since corpus vocabularies (tokens and trigrams) are small compared to feature occurrences.
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._memo: dict[str, tuple[int, float]] = {}
+
+    def _slot(self, feature: str, weight: float) -> tuple[int, float]:
+        slot = self._memo.get(feature)
+        if slot is None:
+            h = zlib.crc32(feature.encode("utf-8"))
+            slot = self._memo[feature] = (h % self.dim, weight if h & 0x80000000 else -weight)
+        return slot
+
+    def embed(self, tokens: Iterable[str], ngrams: Iterable[str]) -> array:
+        vec = [0.0] * self.dim
+        for token in tokens:
+            bucket, value = self._slot(token, TOKEN_WEIGHT)
+            vec[bucket] += value
+        for gram in ngrams:
+            bucket, value = self._slot("#" + gram, TRIGRAM_WEIGHT)
+            vec[bucket] += value
+        return _normalized(vec)
+
+    def embed_text(self, text: str) -> array:
+        return self.embed(tokenize(text), char_ngrams(text, n=3))
+
+
+def _normalized(vec: list[float]) -> array:
+    norm = math.sqrt(sum(v * v for v in vec))
+    return array("f", [v / norm for v in vec] if norm else vec)
+
+
+def _dot(a, b) -> float:
+    return sum(map(operator.mul, a, b))
+
+
+def sign_code(vec) -> int:
+    # One bit per dimension; Hamming distance between codes tracks the angle between vectors.
+    code = 0
+    for d, value in enumerate(vec):
+        if value > 0:
+            code |= 1 << d
+    return code
+
+
+class IVFIndex:
+    # Inverted-file ANN index over float32 vectors kept in one flat array. Spherical k-means
+    # (run on a sample) splits the corpus into nlist cells; a query probes the nprobe cells with
+    # the closest centroids, shortlists their members by sign-code Hamming distance (an int XOR
+    # and popcount each) and reranks the shortlist by exact cosine. Per-query work is about
+    # nlist + nprobe * N / nlist cheap comparisons instead of N dot products. Codes, centroids
+    # and cell lists may come prebuilt from a saved sidecar, which skips embedding and training.
+    def __init__(
+        self,
+        vectors: Sequence[float],
+        dim: int,
+        nlist: int,
+        seed: int = 7,
+        codes: list[int] | None = None,
+        centroids: list[Sequence[float]] | None = None,
+        lists: list[Sequence[int]] | None = None,
+    ):
+        self.dim = dim
+        self.key = (dim, nlist, seed)  # DenseConfig.index_key this index was built for
+        self.vectors = vectors
+        self.count = len(vectors) // dim
+        self._view = memoryview(vectors)
+        self.codes = codes if codes is not None else [sign_code(self.vector(idx)) for idx in range(self.count)]
+        self.nlist = max(1, min(nlist or round(math.sqrt(self.count)), self.count or 1))
+        if centroids is not None and lists is not None:
+            self.centroids = centroids
+            self.lists = lists
+            return
+        # Imported here so non-dense processes skip it at startup.
+        import random
+
+        with span("dense.train"):
+            self.centroids = self._train(random.Random(seed))
+        with span("dense.assign"):
+            centroid_codes = [sign_code(c) for c in self.centroids]
+            self.lists = [array("I") for _ in self.centroids]
+            for idx in range(self.count):
+                self.lists[self._nearest(idx, self.centroids, centroid_codes)].append(idx)
+
+    def vector(self, idx: int) -> memoryview:
+        return self._view[idx * self.dim : (idx + 1) * self.dim]
+
+    def _nearest(self, idx: int, centroids: list[Sequence[float]], codes: list[int]) -> int:
+        # Hamming distance shortlists a few centroids, exact cosine picks among them: close to
+        # full float assignment at a fraction of the dot products.
+        code = self.codes[idx]
+        shortlist = heapq.nsmallest(CENTROID_SHORTLIST, range(len(codes)), key=lambda c: (code ^ codes[c]).bit_count())
+        vec = self.vector(idx)
+        return max(shortlist, key=lambda c: _dot(centroids[c], vec))
+
+    def _train(self, rng) -> list[array]:
+        if not self.count:
+            return [array("f", [0.0] * self.dim)]
+        sample = rng.sample(range(self.count), min(self.count, self.nlist * KMEANS_SAMPLE_PER_LIST))
+        centroids = [array("f", self.vector(idx)) for idx in sample[: self.nlist]]
+        for _ in range(KMEANS_ITERATIONS):
+            codes = [sign_code(c) for c in centroids]
+            sums = [[0.0] * self.dim for _ in centroids]
+            sizes = [0] * len(centroids)
+            for idx in sample:
+                best = self._nearest(idx, centroids, codes)
+                sizes[best] += 1
+                sums[best] = list(map(operator.add, sums[best], self.vector(idx)))
+            centroids = [
+                _normalized(sums[c]) if sizes[c] else array("f", self.vector(rng.choice(sample)))
+                for c in range(len(centroids))
+            ]
+        return centroids
+
+    def search(self, query: array, nprobe: int, limit: int) -> dict[int, float]:
+        # Returns doc index -> cosine similarity for the best `limit` vectors in the probed cells.
+        if not self.count:
+            return {}
+        cells = heapq.nlargest(
+            min(nprobe, len(self.centroids)), range(len(self.centroids)), key=lambda c: _dot(self.centroids[c], query)
+        )
+        code = sign_code(query)
+        codes = self.codes
+        shortlist = heapq.nsmallest(
+            limit * RERANK_FACTOR,
+            (idx for cell in cells for idx in self.lists[cell]),
+            key=lambda idx: (code ^ codes[idx]).bit_count(),
+        )
+        scored = ((idx, _dot(self.vector(idx), query)) for idx in shortlist)
+        return dict(heapq.nlargest(limit, scored, key=operator.itemgetter(1)))
+
+    def similarities(self, query: array, ids: Iterable[int]) -> dict[int, float]:
+        # Exact cosine for given doc indexes, for filtered searches that skip the cell probe.
+        return {idx: _dot(self.vector(idx), query) for idx in ids}
+
+    def to_part(self) -> tuple[dict, dict]:
+        # Flat sections for the postings sidecar: centroids and cell lists are concatenated (cells
+        # split by an offsets array) and sign codes are packed little-endian, dim bits each.
+        width = _code_bytes(self.dim)
+        centroids = array("f")
+        for centroid in self.centroids:
+            centroids.extend(centroid)
+        members = array("I")
+        offsets = array("I", [0])
+        for cell in self.lists:
+            members.extend(cell)
+            offsets.append(len(members))
+        codes = b"".join(code.to_bytes(width, "little") for code in self.codes)
+        dim, nlist, seed = self.key
+        sections = {
+            "vectors": self.vectors,
+            "centroids": centroids,
+            "members": members,
+            "offsets": offsets,
+            "codes": codes,
+        }
+        return {"dim": dim, "nlist": nlist, "seed": seed}, sections
+
+    @classmethod
+    def from_part(cls, meta: dict, sections: dict) -> "IVFIndex":
+        dim = meta["dim"]
+        vectors = sections["vectors"]
+        count = len(vectors) // dim
+        width = _code_bytes(dim)
+        raw = sections["codes"][0 : count * width]
+        if len(raw) != count * width:
+            raise ValueError("dense codes do not match the vectors")
+        centroids, members, offsets = sections["centroids"], sections["members"], sections["offsets"]
+        return cls(
+            vectors,
+            dim,
+            meta["nlist"],
+            meta["seed"],
+            codes=[int.from_bytes(raw[i : i + width], "little") for i in range(0, len(raw), width)],
+            centroids=[centroids[c : c + dim] for c in range(0, len(centroids), dim)],
+            lists=[members[offsets[c] : offsets[c + 1]] for c in range(len(offsets) - 1)],
+        )
+
+
+def _code_bytes(dim: int) -> int:
+    return (dim + 7) // 8
+
+
+def build_dense_index(
+    hasher: FeatureHasher,
+    features: Iterable[tuple[list[str], set[str]]],
+    nlist: int,
+    seed: int = 7,
+) -> IVFIndex:
+    vectors = array("f")
+    with span("dense.embed"):
+        for tokens, ngrams in features:
+            vectors.extend(hasher.embed(tokens, ngrams))
+    return IVFIndex(vectors, hasher.dim, nlist, seed=seed)
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import re
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from agentic_rag.bench import generate_corpus, latency_summary, sample_queries
+from agentic_rag.pipeline import RAGPipeline
+from agentic_rag.qa import generate_grounded_answer, refusal_threshold
+from agentic_rag.retrieval import HybridRetriever, RetrievalHit
+
+
+SearchFn = Callable[[str, int], list[RetrievalHit]]
+
+# Named retrieval paths the harness can run. Every entry must rank exactly like "exact".
+BACKENDS: dict[str, Callable[[HybridRetriever], SearchFn]] = {
+    "exact": lambda retriever: retriever.search_exact,
+    "default": lambda retriever: retriever.search,
+    "bounded": lambda retriever: lambda question, k: retriever.search(
+        question, top_k=k, min_top_score=refusal_threshold
+    ),
+}
+# Backends that may return no hits when the score upper bound rules out an answer. Parity then
+# means exact-scan-then-threshold: an empty result is only allowed when the exact top score is
+# below refusal_threshold, and any other result must rank exactly like "exact".
+EARLY_REFUSAL_BACKENDS = {"bounded"}
+
+# Relevance labels for EVAL_QUESTIONS.md against sample_docs: a chunk is relevant when it contains
+# one of the phrases.
+SAMPLE_LABELS: dict[str, tuple[str, ...]] = {
+    "summarize the main contribution in 3 bullets.": ("weekly forecasting loop",),
+    "what are the key assumptions or limitations?": (
+        "assumes stable panel efficiency",
+        "tested in only two regions",
+    ),
+    "give one concrete numeric/experimental detail and cite it.": (
+        "18 percent",
+        "2.5 percent",
+        "12 percent",
+    ),
+}
+SAMPLE_PATHS = ["sample_docs/solar_finance_brief.txt", "sample_docs/operations_notes.txt"]
+
+_QUESTION_RE = re.compile(r"^\s*\d+\)\s*[“\"](.+?)[”\"]\s*$")
+_EXPECT_RE = re.compile(r"^\s*-\s*Expect:\s*(.+)$", re.IGNORECASE)
+
+
+@dataclass
+class LabeledQuery:
+    question: str
+    relevant_phrases: tuple[str, ...] = ()
+    expect_refusal: bool = False
+
+
+def load_eval_questions(path: str = "EVAL_QUESTIONS.md") -> list[LabeledQuery]:
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    queries: list[LabeledQuery] = []
+    for i, line in enumerate(lines):
+        match = _QUESTION_RE.match(line)
+        if not match:
+            continue
+        question = match.group(1).replace("’", "'").strip()
+        expect = ""
+        for follow in lines[i + 1 : i + 3]:
+            expect_match = _EXPECT_RE.match(follow)
+            if expect_match:
+                expect = expect_match.group(1).lower()
+                break
+        queries.append(
+            LabeledQuery(
+                question=question,
+                relevant_phrases=SAMPLE_LABELS.get(question.lower(), ()),
+                expect_refusal="refusal" in expect or "cannot find" in expect,
+            )
+        )
+    return queries
+
+
+def synthetic_labeled_queries(corpus_dir: str, target_chunks: int, count: int, seed: int = 7) -> list[LabeledQuery]:
+    corpus = generate_corpus(corpus_dir, target_chunks, seed=seed)
+    return [
+        LabeledQuery(
+            question=q.question,
+            relevant_phrases=(q.expected_phrase,) if q.expected_phrase else (),
+            expect_refusal=q.expected_phrase is None,
+        )
+        for q in sample_queries(corpus, count, seed=seed)
+    ]
+
+
+def _relevant_ids(pipeline: RAGPipeline, phrases: tuple[str, ...], cache: dict) -> set[str]:
+    if phrases not in cache:
+        lowered = [p.lower() for p in phrases]
+        cache[phrases] = {
+            c.chunk_id for c in pipeline.chunks if any(p in c.text.lower() for p in lowered)
+        }
+    return cache[phrases]
+
+
+def evaluate_backend(
+    pipeline: RAGPipeline,
+    queries: list[LabeledQuery],
+    search: SearchFn,
+    k: int = 5,
+    reference: list[list[RetrievalHit]] | None = None,
+    relevance_cache: dict | None = None,
+    early_refusal: bool = False,
+) -> tuple[dict, list[list[RetrievalHit]]]:
+    cache = relevance_cache if relevance_cache is not None else {}
+    latencies: list[float] = []
+    all_hits: list[list[RetrievalHit]] = []
+    recall_sum = 0.0
+    rr_sum = 0.0
+    labeled = 0
+    refusals_expected = refusals_correct = false_refusals = answerable = 0
+    mismatch_count = 0
+    bound_skips = wrong_skips = 0
+    mismatch_examples: list[dict] = []
+    max_score_delta = 0.0
+
+    for qi, query in enumerate(queries):
+        start = time.perf_counter()
+        hits = search(query.question, k)
+        latencies.append(time.perf_counter() - start)
+        all_hits.append(hits)
+        ranked_ids = [h.chunk.chunk_id for h in hits]
+
+        relevant = _relevant_ids(pipeline, query.relevant_phrases, cache) if query.relevant_phrases else set()
+        if relevant:
+            labeled += 1
+            recall_sum += len(relevant & set(ranked_ids)) / len(relevant)
+            for rank, chunk_id in enumerate(ranked_ids, start=1):
+                if chunk_id in relevant:
+                    rr_sum += 1.0 / rank
+                    break
+
+        refused = generate_grounded_answer(query.question, hits).citations == []
+        if query.expect_refusal:
+            refusals_expected += 1
+            refusals_correct += refused
+        else:
+            answerable += 1
+            false_refusals += refused
+
+        if reference is not None:
+            expected = reference[qi]
+            expected_ids = [h.chunk.chunk_id for h in expected]
+            if early_refusal and not hits and expected:
+                threshold = refusal_threshold(query.question)
+                bound_skips += 1
+                if threshold is None or expected[0].score >= threshold:
+                    wrong_skips += 1
+                    if len(mismatch_examples) < 5:
+                        mismatch_examples.append(
+                            {"question": query.question, "got": [], "expected": expected_ids, "wrong_skip": True}
+                        )
+                continue
+            deltas = [abs(a.score - b.score) for a, b in zip(hits, expected)]
+            if deltas:
+                max_score_delta = max(max_score_delta, max(deltas))
+            if ranked_ids != expected_ids:
+                mismatch_count += 1
+                if len(mismatch_examples) < 5:
+                    mismatch_examples.append(
+                        {"question": query.question, "got": ranked_ids, "expected": expected_ids}
+                    )
+
+    report = {
+        "queries": len(queries),
+        "labeled_queries": labeled,
+        f"recall@{k}": round(recall_sum / labeled, 4) if labeled else None,
+        "mrr": round(rr_sum / labeled, 4) if labeled else None,
+        "refusal_accuracy": round(refusals_correct / refusals_expected, 4) if refusals_expected else None,
+        "false_refusal_rate": round(false_refusals / answerable, 4) if answerable else None,
+        "latency": latency_summary(latencies),
+    }
+    if reference is not None:
+        report["parity"] = {
+            "ranking_mismatches": mismatch_count,
+            "matches_exact": mismatch_count == 0 and wrong_skips == 0 and max_score_delta <= 1e-9,
+            "max_score_delta": max_score_delta,
+            "examples": mismatch_examples,
+        }
+        if early_refusal:
+            report["parity"]["bound_skips"] = bound_skips
+            report["parity"]["wrong_skips"] = wrong_skips
+    return report, all_hits
+
+
+def run_evaluation(
+    backends: list[str],
+    k: int = 5,
+    eval_file: str = "EVAL_QUESTIONS.md",
+    paths: list[str] | None = None,
+    synthetic_chunks: int = 0,
+    synthetic_questions: int = 200,
+    seed: int = 7,
+) -> dict:
+    unknown = [b for b in backends if b not in BACKENDS]
+    if unknown:
+        raise ValueError(f"unknown backend(s): {', '.join(unknown)}; choose from {', '.join(BACKENDS)}")
+    suites: list[tuple[str, RAGPipeline, list[LabeledQuery]]] = []
+
+    pipeline = RAGPipeline()
+    pipeline.ingest(paths or SAMPLE_PATHS)
+    suites.append(("eval_questions", pipeline, load_eval_questions(eval_file)))
+
+    with tempfile.TemporaryDirectory(prefix="agentic_rag_eval_") as tmp:
+        if synthetic_chunks > 0:
+            queries = synthetic_labeled_queries(tmp, synthetic_chunks, synthetic_questions, seed=seed)
+            synthetic = RAGPipeline()
+            synthetic.ingest([tmp])
+            suites.append((f"synthetic_{synthetic_chunks}", synthetic, queries))
+
+        report: dict = {"k": k, "backends": backends, "suites": {}}
+        for name, suite_pipeline, queries in suites:
+            suite_pipeline.retriever.warm()
+            cache: dict = {}
+            exact_report, reference = evaluate_backend(
+                suite_pipeline, queries, BACKENDS["exact"](suite_pipeline.retriever), k, relevance_cache=cache
+            )
+            results = {}
+            for backend in backends:
+                if backend == "exact":
+                    results[backend] = exact_report
+                    continue
+                search = BACKENDS[backend](suite_pipeline.retriever)
+                results[backend], _ = evaluate_backend(
+                    suite_pipeline,
+                    queries,
+                    search,
+                    k,
+                    reference=reference,
+                    relevance_cache=cache,
+                    early_refusal=backend in EARLY_REFUSAL_BACKENDS,
+                )
+            report["suites"][name] = {"chunks": len(suite_pipeline.chunks), "results": results}
+    report["all_match_exact"] = all(
+        r.get("parity", {}).get("matches_exact", True)
+        for suite in report["suites"].values()
+        for r in suite["results"].values()
+    )
+    return report
@@ -2,10 +2,43 @@ from __future__ import annotations
 
 import datetime as dt
 import json
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
+from typing import BinaryIO
+
+from agentic_rag.history_archive import (
+    RotationPolicy,
+    archive_dir,
+    archived_events,
+    pending_path,
+    read_archived,
+    seal_pending,
+)
+from agentic_rag.session_catalog import catalog_for
+from agentic_rag.tracing import REGISTRY, span
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
 
 
 SESSIONS_DIR = Path("artifacts/sessions")
+TAIL_BLOCK_BYTES = 64 * 1024
+# Sidecar "<sid>.idx" holds one little-endian uint64 byte offset per event line, so the
+# event with ordinal n starts at offset n*8 in the sidecar. Ordinals are the page cursors.
+_OFFSET = struct.Struct("<Q")
+_append_lock = threading.Lock()
+_LOCK_NAME = ".lock"
+DURABILITY_MODES = ("none", "fsync")
+_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+_rotation: RotationPolicy | None = None
 
 
 def _safe_session_id(session_id: str) -> str:
@@ -13,44 +46,484 @@ def _safe_session_id(session_id: str) -> str:
     return cleaned or "default"
 
 
-def append_session_event(session_id: str, event_type: str, payload: dict) -> dict:
+@contextmanager
+def _sessions_locked() -> Iterator[None]:
+    # Cross-process side of _append_lock (taken after it): `history --rotate` may run next to
+    # `serve`, so live-file appends, reads and rotation also hold an flock on a sidecar file.
     SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
+    with (SESSIONS_DIR / _LOCK_NAME).open("a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def append_session_event(session_id: str, event_type: str, payload: dict) -> dict:
     sid = _safe_session_id(session_id)
     event = {
-        "timestamp": dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "timestamp": dt.datetime.now(dt.timezone.utc).strftime(_TIMESTAMP_FORMAT),
         "type": event_type,
         "payload": payload,
     }
-    out = SESSIONS_DIR / f"{sid}.jsonl"
-    with out.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(event) + "\n")
+    line = (json.dumps(event) + "\n").encode("utf-8")
+    writer = _writer
+    with span("history.append"):
+        if writer is not None:
+            writer.submit(sid, line)
+            return event
+        out = SESSIONS_DIR / f"{sid}.jsonl"
+        with _append_lock, _sessions_locked():
+            # Opened before writing so a first-time catalog bootstrap does not count this event twice.
+            catalog = catalog_for(SESSIONS_DIR)
+            _ensure_offsets(out)
+            with out.open("ab") as log, _offsets_path(out).open("ab") as idx:
+                _append_lines(log, idx, [line])
+                size = log.tell()
+            catalog.record({sid: (1, len(line))})
+            if _rotation is not None and size >= _rotation.max_bytes:
+                _rotate_locked(sid, _rotation)
     return event
 
 
-def read_session_history(session_id: str, limit: int = 200) -> list[dict]:
+def _append_lines(log: BinaryIO, idx: BinaryIO, lines: list[bytes]) -> None:
+    # One write for the whole batch of lines and one for their offsets.
+    offset = log.seek(0, os.SEEK_END)
+    offsets = bytearray()
+    for line in lines:
+        offsets += _OFFSET.pack(offset)
+        offset += len(line)
+    log.write(b"".join(lines))
+    idx.write(bytes(offsets))
+
+
+class HistoryWriter:
+    # Background group commit: events are buffered per session and written by one thread
+    # once max_batch events are pending or flush_interval has passed. With durability="fsync"
+    # each batch is fsynced and submit() waits for its batch, so one fsync covers many requests;
+    # with "none" submit() returns immediately and the OS decides when data reaches disk.
+    def __init__(
+        self,
+        durability: str = "none",
+        flush_interval: float = 0.05,
+        max_batch: int = 256,
+        max_open_files: int = 64,
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {', '.join(DURABILITY_MODES)}")
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, max_batch)
+        self.max_open_files = max(1, max_open_files)
+        self._cond = threading.Condition()
+        self._pending: dict[str, list[bytes]] = {}
+        self._pending_count = 0
+        self._submitted = 0
+        self._committed = 0
+        self._flush_requested = False
+        self._closing = False
+        self._files: OrderedDict[str, tuple[BinaryIO, BinaryIO]] = OrderedDict()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, sid: str, line: bytes) -> None:
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("history writer is closed")
+            self._pending.setdefault(sid, []).append(line)
+            self._pending_count += 1
+            self._submitted += 1
+            seq = self._submitted
+            if self._pending_count == 1 or self._pending_count >= self.max_batch:
+                self._cond.notify_all()  # the first event starts the batch timer, a full batch ends it
+            if self.durability == "fsync":
+                while self._committed < seq:
+                    self._cond.wait()
+
+    def flush(self) -> None:
+        with self._cond:
+            target = self._submitted
+            if self._committed >= target:
+                return
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._committed < target:
+                self._cond.wait()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if self._pending_count < self.max_batch and not (self._flush_requested or self._closing):
+                    self._cond.wait(self.flush_interval)  # let more events join this batch
+                batch, self._pending = self._pending, {}
+                self._pending_count = 0
+                self._flush_requested = False
+                seq = self._submitted
+            if batch:
+                self._write_batch(batch)
+            with self._cond:
+                self._committed = seq
+                self._cond.notify_all()
+                if self._closing and not self._pending:
+                    break
+        with _append_lock:
+            for log, idx in self._files.values():
+                log.close()
+                idx.close()
+            self._files.clear()
+
+    def forget(self, sid: str) -> None:
+        # Caller holds _append_lock; used when rotation replaces the session's live file.
+        for handle in self._files.pop(sid, ()):
+            handle.close()
+
+    def _handles(self, sid: str) -> tuple[BinaryIO, BinaryIO]:
+        handles = self._files.get(sid)
+        if handles is not None:
+            try:
+                current = os.stat(SESSIONS_DIR / f"{sid}.jsonl").st_ino
+            except FileNotFoundError:
+                current = None
+            # Another process (e.g. `history --rotate`) may have moved the live file away.
+            if current == os.fstat(handles[0].fileno()).st_ino:
+                self._files.move_to_end(sid)
+                return handles
+            self.forget(sid)
+        if len(self._files) >= self.max_open_files:
+            _, (old_log, old_idx) = self._files.popitem(last=False)
+            old_log.close()
+            old_idx.close()
+        SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
+        path = SESSIONS_DIR / f"{sid}.jsonl"
+        # Validated once per open; while the handle is cached this process is the writer.
+        idx_path = _ensure_offsets(path)
+        handles = (path.open("ab", buffering=0), idx_path.open("ab", buffering=0))
+        self._files[sid] = handles
+        return handles
+
+    def _write_batch(self, batch: dict[str, list[bytes]]) -> None:
+        written: dict[str, tuple[int, int]] = {}
+        with span("history.flush"), _append_lock, _sessions_locked():
+            catalog = catalog_for(SESSIONS_DIR)
+            for sid, lines in batch.items():
+                try:
+                    log, idx = self._handles(sid)
+                    _append_lines(log, idx, lines)
+                    if self.durability == "fsync":
+                        os.fsync(log.fileno())
+                        os.fsync(idx.fileno())
+                except OSError:
+                    REGISTRY.inc("agentic_rag_history_write_errors_total")
+                    for handle in self._files.pop(sid, ()):
+                        handle.close()
+                    continue
+                written[sid] = (len(lines), sum(len(line) for line in lines))
+                REGISTRY.inc("agentic_rag_history_events_written_total", len(lines))
+                if _rotation is not None and log.tell() >= _rotation.max_bytes:
+                    _rotate_locked(sid, _rotation)
+            if written:
+                catalog.record(written)
+            REGISTRY.inc("agentic_rag_history_batches_total")
+
+
+_writer: HistoryWriter | None = None
+
+
+def configure_rotation(policy: RotationPolicy | None) -> None:
+    global _rotation
+    _rotation = policy
+
+
+def _archive_base(sid: str) -> int:
+    # Ordinal of the live file's first event. Caller holds _append_lock.
+    directory = archive_dir(SESSIONS_DIR, sid)
+    if not directory.exists():
+        return 0
+    if any(directory.glob("pending-*.jsonl")):
+        seal_pending(directory, (_rotation or RotationPolicy()).codec)
+    return archived_events(directory)
+
+
+def _rotate_locked(sid: str, policy: RotationPolicy) -> bool:
+    path = SESSIONS_DIR / f"{sid}.jsonl"
+    if not path.exists() or path.stat().st_size == 0:
+        return False
+    _ensure_offsets(path)  # repairs a torn last line so segment counts match the offsets
+    directory = archive_dir(SESSIONS_DIR, sid)
+    directory.mkdir(parents=True, exist_ok=True)
+    base = _archive_base(sid)
+    if _writer is not None:
+        _writer.forget(sid)
+    # The rename is the commit point; sealing is redone on next access if interrupted.
+    os.replace(path, pending_path(directory, base))
+    _offsets_path(path).unlink(missing_ok=True)
+    seal_pending(directory, policy.codec)
+    REGISTRY.inc("agentic_rag_history_rotations_total")
+    return True
+
+
+def _first_event_age(path: Path) -> float | None:
+    with path.open("rb") as f:
+        first = f.readline()
+    try:
+        stamp = dt.datetime.strptime(json.loads(first)["timestamp"], _TIMESTAMP_FORMAT)
+    except (ValueError, KeyError, TypeError):
+        return None
+    return (dt.datetime.now(dt.timezone.utc) - stamp.replace(tzinfo=dt.timezone.utc)).total_seconds()
+
+
+def rotate_session(session_id: str, policy: RotationPolicy, force: bool = False) -> bool:
     sid = _safe_session_id(session_id)
     path = SESSIONS_DIR / f"{sid}.jsonl"
-    if not path.exists():
-        return []
-    lines = path.read_text(encoding="utf-8").splitlines()
-    if limit > 0:
-        lines = lines[-limit:]
+    flush_history()
+    with _append_lock, _sessions_locked():
+        if not path.exists():
+            return False
+        if not force and path.stat().st_size < policy.max_bytes:
+            age = _first_event_age(path)
+            if age is None or age < policy.max_age_seconds:
+                return False
+        return _rotate_locked(sid, policy)
+
+
+def start_rotation_sweeper(policy: RotationPolicy, interval: float = 600.0) -> threading.Thread:
+    configure_rotation(policy)
+
+    def sweep() -> None:
+        while True:
+            time.sleep(interval)
+            try:
+                rotate_sessions(policy)
+            except OSError:
+                REGISTRY.inc("agentic_rag_history_write_errors_total")
+
+    thread = threading.Thread(target=sweep, name="history-rotation", daemon=True)
+    thread.start()
+    return thread
+
+
+def rotate_sessions(policy: RotationPolicy) -> list[str]:
+    # Size is also checked on every write; this sweep catches idle sessions that aged out.
+    rotated = []
+    cursor = None
+    while True:
+        page = list_session_page(limit=500, cursor=cursor, sort="id", descending=False)
+        for item in page["items"]:
+            if rotate_session(item["session_id"], policy):
+                rotated.append(item["session_id"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return rotated
+
+
+def start_history_writer(**kwargs) -> HistoryWriter:
+    global _writer
+    if _writer is None:
+        _writer = HistoryWriter(**kwargs)
+    return _writer
+
+
+def stop_history_writer() -> None:
+    global _writer
+    writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
+
+
+def flush_history() -> None:
+    writer = _writer
+    if writer is not None:
+        writer.flush()
+
+
+def _offsets_path(path: Path) -> Path:
+    return path.with_suffix(".idx")
+
+
+def _offsets_valid(path: Path, idx_path: Path) -> bool:
+    # Cheap consistency check: the last recorded offset must start the file's final non-blank
+    # line. Blank lines are never indexed (as in _rebuild_offsets), so trailing ones are fine.
+    # Catches sessions written before the sidecar existed and appends interrupted mid-way.
+    try:
+        idx_size = idx_path.stat().st_size
+        size = path.stat().st_size
+    except OSError:
+        return False
+    if idx_size % _OFFSET.size:
+        return False
+    if idx_size == 0:
+        with path.open("rb") as f:
+            data = f.read()
+        return not data.strip() and (not data or data.endswith(b"\n"))
+    with idx_path.open("rb") as idx:
+        idx.seek(idx_size - _OFFSET.size)
+        (last,) = _OFFSET.unpack(idx.read(_OFFSET.size))
+    if last >= size:
+        return False
+    with path.open("rb") as f:
+        if last > 0:
+            f.seek(last - 1)
+            if f.read(1) != b"\n":
+                return False
+        else:
+            f.seek(0)
+        tail = f.read(size - last)
+    line, _, rest = tail.partition(b"\n")
+    return tail.endswith(b"\n") and bool(line.strip()) and not rest.strip()
+
+
+def _rebuild_offsets(path: Path, idx_path: Path) -> None:
+    offsets = bytearray()
+    position = 0
+    torn = False
+    with path.open("rb") as f:
+        for line in f:
+            if line.strip():
+                offsets += _OFFSET.pack(position)
+            position += len(line)
+            torn = not line.endswith(b"\n")
+    if torn:
+        with path.open("ab") as out:
+            out.write(b"\n")  # terminate a torn final line so the next append starts cleanly
+    tmp = idx_path.with_suffix(".idx.tmp")
+    tmp.write_bytes(bytes(offsets))
+    os.replace(tmp, idx_path)
+
+
+def _ensure_offsets(path: Path) -> Path:
+    idx_path = _offsets_path(path)
+    if path.exists() and not _offsets_valid(path, idx_path):
+        _rebuild_offsets(path, idx_path)
+    return idx_path
+
+
+def _parse_lines(data: bytes) -> list[dict]:
     events: list[dict] = []
-    for line in lines:
+    for line in data.splitlines():
         try:
             events.append(json.loads(line))
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, UnicodeDecodeError):
             continue
     return events
 
 
-def list_sessions() -> list[str]:
-    if not SESSIONS_DIR.exists():
+def _tail_bytes(path: Path, lines: int) -> bytes:
+    # Reads fixed-size blocks backwards from EOF until enough newlines are buffered.
+    with path.open("rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        data = b""
+        while position > 0 and data.count(b"\n") <= lines:
+            step = min(TAIL_BLOCK_BYTES, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    if position > 0:
+        data = data.split(b"\n", 1)[1]  # drop the partial first line
+    return b"\n".join(data.splitlines()[-lines:])
+
+
+def read_session_history(session_id: str, limit: int = 200) -> list[dict]:
+    flush_history()
+    sid = _safe_session_id(session_id)
+    if archive_dir(SESSIONS_DIR, sid).exists():
+        # Rotated sessions page by ordinal so reads can continue into the archives.
+        return read_session_page(sid, limit=limit if limit > 0 else 2**62)["history"]
+    path = SESSIONS_DIR / f"{sid}.jsonl"
+    if not path.exists():
         return []
-    files = sorted(
-        [p for p in SESSIONS_DIR.glob("*.jsonl") if p.is_file()],
-        key=lambda p: p.stat().st_mtime,
-        reverse=True,
-    )
-    return [p.stem for p in files]
+    if limit <= 0:
+        return _parse_lines(path.read_bytes())
+    return _parse_lines(_tail_bytes(path, limit))
+
+
+def _read_live(path: Path, idx_path: Path, start: int, end: int, live_total: int, size: int) -> bytes:
+    with idx_path.open("rb") as idx:
+        idx.seek(start * _OFFSET.size)
+        # One extra offset (when present) marks where the range's last line ends.
+        raw = idx.read((min(end + 1, live_total) - start) * _OFFSET.size)
+    offsets = [o for (o,) in _OFFSET.iter_unpack(raw)]
+    with path.open("rb") as f:
+        f.seek(offsets[0])
+        stop = offsets[end - start] if end < live_total else size
+        return f.read(stop - offsets[0])
+
+
+def read_session_page(session_id: str, before: int | None = None, limit: int = 200) -> dict:
+    # Returns events with ordinals [start, before); pass next_before back to page further into the past.
+    # Ordinals run across archived segments and the live file; archives are opened only when
+    # the page reaches below the live file's first ordinal.
+    flush_history()
+    sid = _safe_session_id(session_id)
+    path = SESSIONS_DIR / f"{sid}.jsonl"
+    live = b""
+    # The live slice is read under the lock so a concurrent rotation cannot move it mid-read;
+    # sealed segments are immutable and are read after releasing it.
+    with _append_lock, _sessions_locked():
+        base = _archive_base(sid)
+        live_total = 0
+        if path.exists():
+            idx_path = _ensure_offsets(path)
+            live_total = idx_path.stat().st_size // _OFFSET.size
+        total = base + live_total
+        end = total if before is None else max(0, min(before, total))
+        start = max(0, end - max(1, limit))
+        if end > base and start < end:
+            live = _read_live(path, idx_path, max(start, base) - base, end - base, live_total, path.stat().st_size)
+    if start == end:
+        return {"history": [], "total": total, "next_before": None}
+    events: list[dict] = []
+    if start < base:
+        events += _parse_lines(b"\n".join(read_archived(archive_dir(SESSIONS_DIR, sid), start, min(end, base))))
+    events += _parse_lines(live)
+    return {"history": events, "total": total, "next_before": start or None}
+
+
+def list_sessions(limit: int = 1000) -> list[str]:
+    return [item["session_id"] for item in list_session_page(limit=limit)["items"]]
+
+
+def list_session_page(
+    limit: int = 100,
+    cursor: str | None = None,
+    sort: str = "updated",
+    descending: bool = True,
+) -> dict:
+    flush_history()
+    if not SESSIONS_DIR.exists():
+        return {"items": [], "next_cursor": None}
+    return catalog_for(SESSIONS_DIR).page(limit=limit, cursor=cursor, sort=sort, descending=descending)
+
 
+def iter_session_messages(session_ids: list[str] | None = None, page_size: int = 1000) -> Iterator[str]:
+    # User-authored text in chronological order (memory texts and asked questions), reading
+    # archived segments and the live file page by page; every catalogued session when no ids are given.
+    if session_ids is None:
+        session_ids = []
+        cursor = None
+        while True:
+            page = list_session_page(limit=page_size, cursor=cursor, sort="id", descending=False)
+            session_ids += [item["session_id"] for item in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+    for session_id in session_ids:
+        total = read_session_page(session_id, limit=1)["total"]
+        for start in range(0, total, page_size):
+            end = min(total, start + page_size)
+            for event in read_session_page(session_id, before=end, limit=end - start)["history"]:
+                payload = event.get("payload") or {}
+                field = {"memory": "text", "qa": "question"}.get(event.get("type"))
+                text = str(payload.get(field, "")).strip() if field else ""
+                if text:
+                    yield text
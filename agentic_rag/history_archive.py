@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import gzip
+import json
+import lzma
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+
+ARCHIVE_DIRNAME = "archive"
+MANIFEST = "manifest.json"
+CODECS = {
+    "gzip": (".gz", gzip.compress, gzip.decompress),
+    "lzma": (".xz", lzma.compress, lzma.decompress),
+}
+_SEGMENT_CACHE_SIZE = 8
+
+
+@dataclass
+class RotationPolicy:
+    max_bytes: int = 8 * 1024 * 1024
+    max_age_seconds: float = 7 * 24 * 3600
+    codec: str = "gzip"
+
+    def __post_init__(self) -> None:
+        if self.codec not in CODECS:
+            raise ValueError(f"codec must be one of {', '.join(CODECS)}")
+
+
+def archive_dir(sessions_dir: Path, sid: str) -> Path:
+    return sessions_dir / ARCHIVE_DIRNAME / sid
+
+
+def load_manifest(directory: Path) -> list[dict]:
+    # Segments in ordinal order; each holds events [first, first + count).
+    try:
+        return json.loads((directory / MANIFEST).read_text(encoding="utf-8"))["segments"]
+    except (OSError, ValueError, KeyError):
+        return []
+
+
+def _save_manifest(directory: Path, segments: list[dict]) -> None:
+    tmp = directory / (MANIFEST + ".tmp")
+    tmp.write_text(json.dumps({"segments": segments}, indent=2), encoding="utf-8")
+    os.replace(tmp, directory / MANIFEST)
+
+
+def archived_events(directory: Path) -> int:
+    segments = load_manifest(directory)
+    return segments[-1]["first"] + segments[-1]["count"] if segments else 0
+
+
+def pending_path(directory: Path, base: int) -> Path:
+    return directory / f"pending-{base:012d}.jsonl"
+
+
+def seal_pending(directory: Path, codec: str) -> None:
+    # Compresses rotated-out live files into segments. Rotation renames the live file to
+    # pending-<first ordinal> before anything else, so a crash at any later point is finished
+    # here: a pending file whose segment is already in the manifest is simply removed.
+    segments = load_manifest(directory)
+    for pending in sorted(directory.glob("pending-*.jsonl")):
+        first = int(pending.stem.split("-", 1)[1])
+        if any(s["first"] == first for s in segments):
+            pending.unlink()
+            continue
+        data = pending.read_bytes()
+        lines = [line for line in data.splitlines(keepends=True) if line.strip()]
+        suffix, compress, _ = CODECS[codec]
+        name = f"seg-{first:012d}-{len(lines)}.jsonl{suffix}"
+        tmp = directory / (name + ".tmp")
+        tmp.write_bytes(compress(b"".join(lines)))
+        os.replace(tmp, directory / name)
+        segments.append(
+            {
+                "file": name,
+                "first": first,
+                "count": len(lines),
+                "raw_bytes": len(data),
+                "stored_bytes": (directory / name).stat().st_size,
+                "sealed_at": int(time.time()),
+            }
+        )
+        segments.sort(key=lambda s: s["first"])
+        _save_manifest(directory, segments)
+        pending.unlink()
+
+
+_segment_cache: OrderedDict[tuple[str, int], list[bytes]] = OrderedDict()
+_segment_lock = threading.Lock()
+
+
+def _segment_lines(path: Path) -> list[bytes]:
+    key = (str(path), path.stat().st_mtime_ns)
+    with _segment_lock:
+        lines = _segment_cache.get(key)
+        if lines is not None:
+            _segment_cache.move_to_end(key)
+            return lines
+    decompress = next(d for suffix, _, d in CODECS.values() if path.name.endswith(suffix))
+    lines = decompress(path.read_bytes()).splitlines()
+    with _segment_lock:
+        _segment_cache[key] = lines
+        while len(_segment_cache) > _SEGMENT_CACHE_SIZE:
+            _segment_cache.popitem(last=False)
+    return lines
+
+
+def read_archived(directory: Path, start: int, end: int) -> list[bytes]:
+    # Raw event lines for ordinals [start, end); only segments overlapping the range are opened.
+    out: list[bytes] = []
+    for segment in load_manifest(directory):
+        seg_start = segment["first"]
+        seg_end = seg_start + segment["count"]
+        if seg_end <= start or seg_start >= end:
+            continue
+        lines = _segment_lines(directory / segment["file"])
+        out.extend(lines[max(start, seg_start) - seg_start : min(end, seg_end) - seg_start])
+    return out
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import http.client
+import json
+import random
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+
+from agentic_rag.tracing import REGISTRY
+
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+USER_AGENT = "agentic-rag-bot/1.0"
+
+
+class HttpError(OSError):
+    def __init__(self, status: int, url: str):
+        super().__init__(f"HTTP {status} from {url}")
+        self.status = status
+
+
+class HttpClient:
+    # Small keep-alive pool over http.client: idle connections are kept per host (LIFO, at most
+    # pool_size each) and shared across threads. Connection errors, 429 and 5xx are retried with
+    # full-jitter exponential backoff, honouring Retry-After when the server sends one.
+    def __init__(
+        self,
+        timeout: float = 12.0,
+        retries: int = 3,
+        backoff_base: float = 0.25,
+        backoff_max: float = 8.0,
+        pool_size: int = 16,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self._idle: dict[tuple[str, str], list[http.client.HTTPConnection]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def _checkout(self, scheme: str, netloc: str) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle[(scheme, netloc)]
+            if idle:
+                return idle.pop(), True
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(netloc, timeout=self.timeout), False
+
+    def _checkin(self, scheme: str, netloc: str, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle[(scheme, netloc)]
+            if len(idle) < self.pool_size:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _backoff(self, attempt: int, retry_after: str | None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(self.backoff_max, float(retry_after))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def get(self, url: str) -> bytes:
+        parts = urllib.parse.urlsplit(url)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        attempt = 0
+        while True:
+            conn, reused = self._checkout(parts.scheme, parts.netloc)
+            retry_after = None
+            try:
+                conn.request("GET", path, headers={"User-Agent": USER_AGENT})
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if reused:
+                    continue  # an idle keep-alive connection went stale; not counted as a retry
+                if attempt >= self.retries:
+                    raise
+            else:
+                if resp.will_close:
+                    conn.close()
+                else:
+                    self._checkin(parts.scheme, parts.netloc, conn)
+                if resp.status < 400:
+                    return body
+                if resp.status not in RETRY_STATUSES or attempt >= self.retries:
+                    raise HttpError(resp.status, f"{parts.scheme}://{parts.netloc}{parts.path}")
+                retry_after = resp.getheader("Retry-After")
+            REGISTRY.inc("agentic_rag_http_retries_total", labels={"host": parts.netloc})
+            time.sleep(self._backoff(attempt, retry_after))
+            attempt += 1
+
+    def get_json(self, url: str) -> dict:
+        return json.loads(self.get(url).decode("utf-8"))
+
+    def close(self) -> None:
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn in conns]
+            self._idle.clear()
+        for conn in idle:
+            conn.close()
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-import datetime as dt
 import re
-from pathlib import Path
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
+from agentic_rag.memory_store import memory_file, normalize_summary
 from agentic_rag.models import MemoryWrite
 from agentic_rag.utils import normalize_whitespace
 
@@ -86,29 +88,71 @@ def select_high_signal_memory(user_text: str) -> list[MemoryWrite]:
     return filtered
 
 
-def _append_if_new(path: Path, summary: str, confidence: float) -> bool:
-    existing = path.read_text(encoding="utf-8") if path.exists() else ""
-    if summary.lower() in existing.lower():
-        return False
-    stamp = dt.date.today().isoformat()
-    line = f"- {stamp} | confidence={confidence:.2f} | {summary}\n"
-    with path.open("a", encoding="utf-8") as f:
-        if existing and not existing.endswith("\n"):
-            f.write("\n")
-        f.write(line)
-    return True
+def _target_file(target: str) -> str:
+    return "USER" if target == "USER" else "COMPANY"
 
 
 def write_memories(
     memories: list[MemoryWrite],
     user_memory_path: str = "USER_MEMORY.md",
     company_memory_path: str = "COMPANY_MEMORY.md",
+    match_contained: bool = False,
 ) -> list[dict[str, str]]:
+    # One locked batch per target file; dedupe is against normalized summaries already stored.
+    added: dict[str, set[str]] = {}
+    for target, path in (("USER", user_memory_path), ("COMPANY", company_memory_path)):
+        items = [(m.summary, m.confidence) for m in memories if _target_file(m.target) == target]
+        added[target] = set(memory_file(path).add_many(items, match_contained)) if items else set()
     writes: list[dict[str, str]] = []
-    user_path = Path(user_memory_path)
-    company_path = Path(company_memory_path)
     for mem in memories:
-        target_path = user_path if mem.target == "USER" else company_path
-        if _append_if_new(target_path, mem.summary, mem.confidence):
+        target = _target_file(mem.target)
+        if mem.summary in added[target]:
+            added[target].discard(mem.summary)
             writes.append({"target": mem.target, "summary": mem.summary})
     return writes
+
+
+def extract_bulk(
+    texts: Iterable[str],
+    workers: int | None = None,
+    chunk_size: int = 256,
+) -> tuple[list[MemoryWrite], int]:
+    # Streams messages through extraction and dedupes candidates across the whole input with
+    # the store's rule: target file plus normalized summary (highest confidence wins, first
+    # occurrence keeps its slot). Extraction is a few regexes per message, about as cheap as
+    # pickling the message to a worker, so a plain loop is the default; workers > 1 opts into
+    # a process pool, which only pays off for long messages on several cores.
+    # Returns (candidates, messages seen).
+    best: dict[tuple[str, str], MemoryWrite] = {}
+    seen = 0
+    pool = None
+    try:
+        if workers is not None and workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            results = _pooled(pool, iter(texts), max(1, chunk_size), workers)
+        else:
+            results = map(select_high_signal_memory, texts)
+        for decisions in results:
+            seen += 1
+            for d in decisions:
+                key = (_target_file(d.target), normalize_summary(d.summary))
+                if not key[1]:
+                    continue
+                current = best.get(key)
+                if current is None or d.confidence > current.confidence:
+                    best[key] = d
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return list(best.values()), seen
+
+
+def _pooled(
+    pool: ProcessPoolExecutor, texts: Iterator[str], chunk_size: int, workers: int
+) -> Iterator[list[MemoryWrite]]:
+    # Executor.map submits its whole input up front; feed it one window at a time instead.
+    while True:
+        batch = list(islice(texts, chunk_size * workers))
+        if not batch:
+            return
+        yield from pool.map(select_high_signal_memory, batch, chunksize=chunk_size)
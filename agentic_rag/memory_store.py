@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import json
+import os
+import re
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from agentic_rag.tracing import span
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+
+MEMORY_DIR = Path("artifacts/memory")
+_LINE_RE = re.compile(r"^- (\d{4}-\d{2}-\d{2}) \| confidence=([0-9.]+) \| (.+)$")
+
+
+def normalize_summary(summary: str) -> str:
+    return " ".join(summary.lower().split()).rstrip(" .")
+
+
+def _format_line(record: dict) -> str:
+    return f"- {record['date']} | confidence={record['confidence']:.2f} | {record['summary']}\n"
+
+
+class MemoryFile:
+    # One Markdown memory file backed by an append-only JSONL log (the source of truth) and an
+    # in-memory set of normalized summaries, so dedupe is a set lookup instead of a file scan.
+    # add_many(match_contained=True) also skips summaries contained in a stored one (the old
+    # Markdown substring rule); that scans every stored summary, so it is opt-in.
+    # Writers hold an flock on a sidecar lock file and first replay log records appended by
+    # other processes since their last read; the Markdown file is appended in the same
+    # critical section and regenerated from the log whenever it is missing.
+    def __init__(self, markdown_path: str | Path, memory_dir: Path = MEMORY_DIR):
+        self.markdown_path = Path(markdown_path)
+        digest = hashlib.sha1(str(self.markdown_path.resolve()).encode("utf-8")).hexdigest()[:10]
+        stem = f"{self.markdown_path.stem}-{digest}"
+        memory_dir.mkdir(parents=True, exist_ok=True)
+        self.log_path = memory_dir / f"{stem}.jsonl"
+        self.lock_path = memory_dir / f"{stem}.lock"
+        self._keys: set[str] = set()
+        self._offset = 0
+        self._thread_lock = threading.Lock()
+        with self._locked():
+            if not self.log_path.exists():
+                self._import_markdown()
+            self._catch_up()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._thread_lock, self.lock_path.open("a") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def _import_markdown(self) -> None:
+        # First use: entries already in the Markdown file seed the log.
+        records = []
+        if self.markdown_path.exists():
+            for line in self.markdown_path.read_text(encoding="utf-8").splitlines():
+                match = _LINE_RE.match(line.strip())
+                if match:
+                    date, confidence, summary = match.groups()
+                    records.append({"date": date, "confidence": float(confidence), "summary": summary})
+        tmp = self.log_path.with_suffix(".tmp")
+        tmp.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+        os.replace(tmp, self.log_path)
+
+    def _catch_up(self) -> None:
+        size = self.log_path.stat().st_size
+        if size < self._offset:  # log was replaced; rebuild the index from scratch
+            self._keys.clear()
+            self._offset = 0
+        if size == self._offset:
+            return
+        with self.log_path.open("rb") as f:
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+        complete = data[: data.rfind(b"\n") + 1]  # ignore a record still being written
+        for line in complete.splitlines():
+            try:
+                self._keys.add(normalize_summary(json.loads(line)["summary"]))
+            except (ValueError, KeyError):
+                continue
+        self._offset += len(complete)
+
+    def _header(self) -> str:
+        title = self.markdown_path.stem.replace("_", " ").upper()
+        return f"# {title}\n\n"
+
+    def regenerate_markdown(self) -> None:
+        # Keeps any existing header (everything before the first entry), then rewrites entries.
+        header = self._header()
+        if self.markdown_path.exists():
+            lines = self.markdown_path.read_text(encoding="utf-8").splitlines(keepends=True)
+            kept = []
+            for line in lines:
+                if _LINE_RE.match(line.strip()):
+                    break
+                kept.append(line)
+            header = "".join(kept) or header
+        with self.log_path.open(encoding="utf-8") as f:
+            entries = [_format_line(json.loads(line)) for line in f if line.strip()]
+        if header and not header.endswith("\n"):
+            header += "\n"
+        tmp = self.markdown_path.with_name(self.markdown_path.name + ".tmp")
+        tmp.write_text(header + "".join(entries), encoding="utf-8")
+        os.replace(tmp, self.markdown_path)
+
+    def add_many(self, items: list[tuple[str, float]], match_contained: bool = False) -> list[str]:
+        # items are (summary, confidence); returns the summaries that were new.
+        stamp = dt.date.today().isoformat()
+        with span("memory.write"), self._locked():
+            self._catch_up()
+            records = []
+            for summary, confidence in items:
+                key = normalize_summary(summary)
+                if not key or key in self._keys:
+                    continue
+                if match_contained and any(key in known for known in self._keys):
+                    continue
+                self._keys.add(key)
+                records.append({"date": stamp, "confidence": confidence, "summary": summary})
+            if not records:
+                return []
+            payload = "".join(json.dumps(r) + "\n" for r in records).encode("utf-8")
+            with self.log_path.open("ab") as log:
+                log.write(payload)
+            self._offset += len(payload)
+            if self.markdown_path.exists():
+                with self.markdown_path.open("a", encoding="utf-8") as md:
+                    if md.tell() and not self._ends_with_newline():
+                        md.write("\n")
+                    md.write("".join(_format_line(r) for r in records))
+            else:
+                self.regenerate_markdown()
+            return [r["summary"] for r in records]
+
+    def _ends_with_newline(self) -> bool:
+        with self.markdown_path.open("rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def __contains__(self, summary: str) -> bool:
+        with self._locked():
+            self._catch_up()
+            return normalize_summary(summary) in self._keys
+
+
+_files: dict[str, MemoryFile] = {}
+_files_lock = threading.Lock()
+
+
+def memory_file(markdown_path: str | Path) -> MemoryFile:
+    key = os.path.abspath(markdown_path)
+    with _files_lock:
+        store = _files.get(key)
+        if store is None:
+            store = _files[key] = MemoryFile(markdown_path)
+        return store
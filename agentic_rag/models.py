@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, field
 from typing import Any
 
 
@@ -12,27 +12,93 @@ class DocumentChunk:
     start_line: int
     end_line: int
     text: str
+    # Ingest batch label (an upload or `ingest --batch`); empty when none was given.
+    batch: str = ""
+    # Near-duplicate chunks collapsed into this one at ingest (chunk_id, source, section, lines).
+    aliases: list[dict[str, Any]] = field(default_factory=list)
 
     @property
     def locator(self) -> str:
         return f"{self.section} | lines {self.start_line}-{self.end_line} | {self.chunk_id}"
 
+    def alias_citations(self) -> list[dict[str, str]]:
+        return [
+            {
+                "source": a["source"],
+                "locator": f"{a['section']} | lines {a['start_line']}-{a['end_line']} | {a['chunk_id']}",
+            }
+            for a in self.aliases
+        ]
+
+    def metadata_values(self, key: str) -> set[str]:
+        # Values of source/section/batch for this chunk and the duplicates collapsed into it.
+        values = {getattr(self, key)} | {a.get(key, "") for a in self.aliases}
+        values.discard("")
+        return values
+
     def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+        data = asdict(self)
+        if not self.batch:
+            del data["batch"]
+        if not self.aliases:
+            del data["aliases"]  # keeps index files for duplicate-free corpora unchanged
+        return data
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "DocumentChunk":
         return cls(**data)
 
 
+# ChunkFilter field -> DocumentChunk attribute it matches.
+FILTER_FIELDS = {"sources": "source", "sections": "section", "batches": "batch"}
+
+
+@dataclass(frozen=True)
+class ChunkFilter:
+    # A chunk passes when, for every non-empty field, it has one of the listed values.
+    sources: tuple[str, ...] = ()
+    sections: tuple[str, ...] = ()
+    batches: tuple[str, ...] = ()
+
+    def __bool__(self) -> bool:
+        return bool(self.sources or self.sections or self.batches)
+
+    def matches(self, chunk: DocumentChunk) -> bool:
+        return all(
+            not getattr(self, name) or not chunk.metadata_values(key).isdisjoint(getattr(self, name))
+            for name, key in FILTER_FIELDS.items()
+        )
+
+    def to_dict(self) -> dict[str, list[str]]:
+        return {name: list(getattr(self, name)) for name in FILTER_FIELDS if getattr(self, name)}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | None) -> "ChunkFilter":
+        values: dict[str, tuple[str, ...]] = {}
+        for name in FILTER_FIELDS:
+            raw = (data or {}).get(name)
+            if raw is None:
+                continue
+            if isinstance(raw, str):
+                raw = [raw]
+            if not isinstance(raw, list) or not all(isinstance(v, str) for v in raw):
+                raise ValueError(f"filter '{name}' must be a string or a list of strings")
+            values[name] = tuple(dict.fromkeys(v for v in raw if v))
+        return cls(**values)
+
+
 @dataclass
 class Citation:
     source: str
     locator: str
     snippet: str
+    also_in: list[dict[str, str]] = field(default_factory=list)
 
-    def to_dict(self) -> dict[str, str]:
-        return asdict(self)
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        if not self.also_in:
+            del data["also_in"]
+        return data
 
 
 @dataclass
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+import math
+import random
+import time
+import urllib.parse
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from agentic_rag.weather_cache import day_range
+
+
+MAX_DAYS = 366 * 100
+
+
+def synthetic_temperature(latitude: float, longitude: float, day: str) -> float | None:
+    # Deterministic per (rounded location, day): a seasonal cycle plus hash noise, with about 1%
+    # of days null so missing-day handling is exercised too.
+    seed = zlib.crc32(f"{latitude:.2f},{longitude:.2f},{day}".encode("ascii"))
+    if seed % 97 == 0:
+        return None
+    date = dt.date.fromisoformat(day)
+    season = math.cos(2 * math.pi * (date.timetuple().tm_yday - 200) / 365.25)
+    base = 27.0 - 0.45 * abs(latitude)
+    amplitude = 0.25 * abs(latitude) * (1 if latitude >= 0 else -1)
+    noise = (seed % 10_000) / 10_000 * 6.0 - 3.0
+    return round(base + amplitude * season + noise, 1)
+
+
+def make_handler(latency: float = 0.0, error_rate: float = 0.0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+        def log_message(self, format: str, *args) -> None:
+            return
+
+        def _reply(self, code: int, data: dict) -> None:
+            payload = json.dumps(data).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            if code == 503:
+                self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self) -> None:
+            parsed = urllib.parse.urlparse(self.path)
+            if parsed.path not in ("/v1/archive", "/v1/forecast"):
+                self._reply(404, {"error": True, "reason": "Not found"})
+                return
+            if latency:
+                time.sleep(latency)
+            if error_rate and random.random() < error_rate:
+                self._reply(503, {"error": True, "reason": "Injected failure"})
+                return
+            query = dict(urllib.parse.parse_qsl(parsed.query))
+            try:
+                latitude = float(query["latitude"])
+                longitude = float(query["longitude"])
+                days = day_range(dt.date.fromisoformat(query["start_date"]), dt.date.fromisoformat(query["end_date"]))
+            except (KeyError, ValueError) as exc:
+                self._reply(400, {"error": True, "reason": f"Invalid parameters: {exc}"})
+                return
+            if not days or len(days) > MAX_DAYS:
+                self._reply(400, {"error": True, "reason": "Invalid date range"})
+                return
+            self._reply(
+                200,
+                {
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "timezone": "GMT",
+                    "daily_units": {"time": "iso8601", "temperature_2m_mean": "°C"},
+                    "daily": {
+                        "time": days,
+                        "temperature_2m_mean": [synthetic_temperature(latitude, longitude, d) for d in days],
+                    },
+                },
+            )
+
+    return Handler
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8765, latency_ms: float = 0.0, error_rate: float = 0.0):
+    return ThreadingHTTPServer((host, port), make_handler(latency_ms / 1000.0, error_rate))
+
+
+def run_stub_server(host: str = "127.0.0.1", port: int = 8765, latency_ms: float = 0.0, error_rate: float = 0.0) -> None:
+    server = make_server(host, port, latency_ms, error_rate)
+    print(f"Open-Meteo stand-in running at http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
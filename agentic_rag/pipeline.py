@@ -1,29 +1,119 @@
 from __future__ import annotations
 
+import copy
+import itertools
 import json
+import zlib
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
-from agentic_rag.chunking import chunk_documents
-from agentic_rag.ingestion import ingest_paths
-from agentic_rag.models import DocumentChunk, QAResult
-from agentic_rag.qa import generate_grounded_answer
-from agentic_rag.retrieval import HybridRetriever
+from agentic_rag.dense import DenseConfig, IVFIndex
+from agentic_rag.models import ChunkFilter, DocumentChunk, QAResult
+from agentic_rag.positional import PositionalIndex
+from agentic_rag.postings import CompressedPostings, load_sidecar, save_sidecar
+from agentic_rag.qa import AnswerStream, generate_grounded_answer, refusal_threshold, stream_grounded_answer
+from agentic_rag.retrieval import HybridRetriever, RetrievalHit
+from agentic_rag.tracing import REGISTRY, span
+
+
+# Measured on synthetic corpora with warm scoring caches (compressed postings, trigram sets).
+BYTES_PER_TEXT_CHAR = 56
+# SimHash Hamming distance (of 64 bits) at which ingest collapses chunks as near-duplicates.
+DEDUPE_MAX_DISTANCE = 4
+
+
+def index_file_version(index_path: str | Path) -> str | None:
+    try:
+        st = Path(index_path).stat()
+    except OSError:
+        return None
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+
+def postings_path(index_path: str | Path) -> Path:
+    return Path(index_path).with_suffix(".postings")
+
+
+def chunks_digest(chunks: list[DocumentChunk]) -> str:
+    # Ties a postings sidecar to the exact chunk ids and texts it was built from.
+    crc = 0
+    for chunk in chunks:
+        crc = zlib.crc32(chunk.text.encode("utf-8"), zlib.crc32(chunk.chunk_id.encode("utf-8"), crc))
+    return f"{len(chunks):x}-{crc:08x}"
 
 
 class RAGPipeline:
-    def __init__(self, chunks: list[DocumentChunk] | None = None):
+    def __init__(
+        self,
+        chunks: list[DocumentChunk] | None = None,
+        index_version: str = "unsaved",
+        dense: DenseConfig | None = None,
+        dedupe_distance: int | None = DEDUPE_MAX_DISTANCE,
+        proximity_weight: float = 0.0,
+        postings: CompressedPostings | None = None,
+        positions: PositionalIndex | None = None,
+        dense_index: IVFIndex | None = None,
+    ):
         self.chunks = chunks or []
-        self.retriever = HybridRetriever(self.chunks)
+        # None disables near-duplicate collapsing at ingest.
+        self.dedupe_distance = dedupe_distance
+        self.retriever = HybridRetriever(
+            self.chunks, dense, proximity_weight, postings=postings, positions=positions, dense_index=dense_index
+        )
+        # Identifies the loaded or saved index file (mtime/size) for profiles and logs.
+        self.index_version = index_version
+
+    def memory_estimate(self) -> int:
+        estimate = BYTES_PER_TEXT_CHAR * sum(len(c.text) for c in self.chunks)
+        if self.retriever.dense.enabled:
+            # float32 vectors plus one inverted-list entry per chunk.
+            estimate += len(self.chunks) * (4 * self.retriever.dense.dim + 8)
+        return estimate
+
+    def with_dense(self, dense: DenseConfig) -> "RAGPipeline":
+        # Same chunks and scoring caches, another dense leg (see HybridRetriever.with_dense).
+        if dense == self.retriever.dense:
+            return self
+        view = copy.copy(self)
+        view.retriever = self.retriever.with_dense(dense)
+        return view
+
+    def ingest(self, paths: list[str], append: bool = False, batch: str = "") -> dict[str, int]:
+        # Imported here so query-only callers (cli ask, daemon) skip file discovery and hashing modules.
+        from agentic_rag.chunking import chunk_documents
+        from agentic_rag.dedupe import collapse_near_duplicates
+        from agentic_rag.ingestion import ingest_paths
 
-    def ingest(self, paths: list[str], append: bool = False) -> dict[str, int]:
-        docs = ingest_paths(paths)
-        new_chunks = chunk_documents(docs)
+        with span("ingest"):
+            with span("ingest.load"):
+                docs = ingest_paths(paths)
+            with span("ingest.chunk"):
+                new_chunks = chunk_documents(docs)
+            if batch:
+                for chunk in new_chunks:
+                    chunk.batch = batch
+            stats = self._merge_chunks(new_chunks, append)
+            if self.dedupe_distance is not None:
+                with span("ingest.dedupe"):
+                    self.chunks, stats["collapsed_chunks"] = collapse_near_duplicates(
+                        self.chunks, self.dedupe_distance
+                    )
+                stats["chunks"] = len(self.chunks)
+            with span("ingest.index_build"):
+                self.retriever = HybridRetriever(self.chunks, self.retriever.dense, self.retriever.proximity_weight)
+        self.index_version = "unsaved"
+        REGISTRY.inc("agentic_rag_ingested_documents_total", len(docs))
+        return {"documents": len(docs), **stats}
+
+    def _merge_chunks(self, new_chunks: list[DocumentChunk], append: bool) -> dict[str, int]:
         if append:
             existing_index = {c.chunk_id: i for i, c in enumerate(self.chunks)}
             replaced = 0
             added = 0
             for chunk in new_chunks:
                 if chunk.chunk_id in existing_index:
+                    previous = self.chunks[existing_index[chunk.chunk_id]]
+                    chunk.aliases = previous.aliases  # re-ingesting a canonical chunk keeps its duplicates
                     self.chunks[existing_index[chunk.chunk_id]] = chunk
                     replaced += 1
                 else:
@@ -33,9 +123,7 @@ class RAGPipeline:
             self.chunks = new_chunks
             replaced = 0
             added = len(new_chunks)
-        self.retriever = HybridRetriever(self.chunks)
         return {
-            "documents": len(docs),
             "new_chunks": len(new_chunks),
             "added_chunks": added,
             "replaced_chunks": replaced,
@@ -43,21 +131,88 @@ class RAGPipeline:
             "append_mode": append,
         }
 
-    def ask(self, question: str, top_k: int = 5) -> QAResult:
-        hits = self.retriever.search(question, top_k=top_k)
-        return generate_grounded_answer(question, hits)
+    def ask(self, question: str, top_k: int = 5, filters: ChunkFilter | None = None) -> QAResult:
+        REGISTRY.inc("agentic_rag_questions_total")
+        with span("ask"):
+            # Questions that provably cannot reach the answer threshold come back without hits.
+            hits = self.retriever.search(question, top_k=top_k, filters=filters, min_top_score=refusal_threshold)
+            return generate_grounded_answer(question, hits)
+
+    def ask_stream(
+        self,
+        question: str,
+        top_k: int = 5,
+        filters: ChunkFilter | None = None,
+    ) -> tuple[list[RetrievalHit], AnswerStream]:
+        REGISTRY.inc("agentic_rag_questions_total")
+        hits = self.retriever.search(question, top_k=top_k, filters=filters, min_top_score=refusal_threshold)
+        return hits, stream_grounded_answer(question, hits)
+
+    def ask_batch(
+        self,
+        questions: Iterable[str],
+        top_k: int = 5,
+        filters: ChunkFilter | None = None,
+    ) -> Iterator[QAResult]:
+        # tee keeps both sides lazy so answers can be streamed while questions are still being read.
+        pending, queries = itertools.tee(questions)
+        results = self.retriever.search_batch(queries, top_k=top_k, filters=filters, min_top_score=refusal_threshold)
+        for question, hits in zip(pending, results):
+            REGISTRY.inc("agentic_rag_questions_total")
+            yield generate_grounded_answer(question, hits)
 
-    def save(self, index_path: str = "artifacts/index.json") -> None:
+    def save(self, index_path: str = "artifacts/index.json", dense: DenseConfig | None = None) -> None:
+        # The IVF index for `dense` (or the retriever's own, when dense is enabled) is saved too.
         path = Path(index_path)
         path.parent.mkdir(parents=True, exist_ok=True)
-        payload = {"chunks": [c.to_dict() for c in self.chunks]}
-        path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        with span("save"):
+            with span("save.serialize"):
+                payload = json.dumps({"chunks": [c.to_dict() for c in self.chunks]}, indent=2)
+            with span("save.write"):
+                path.write_text(payload, encoding="utf-8")
+            with span("save.postings"):
+                # Postings, positions and dense vectors share one sidecar so a loaded index never
+                # re-tokenizes text or retrains IVF cells.
+                parts = {
+                    "postings": self.retriever.postings_index().to_part(),
+                    "positions": self.retriever.positional_index().to_part(),
+                }
+                if dense is None and self.retriever.dense.enabled:
+                    dense = self.retriever.dense
+                if dense is not None:
+                    parts["dense"] = self.retriever.dense_index(dense).to_part()
+                save_sidecar(postings_path(path), chunks_digest(self.chunks), parts)
+        self.index_version = index_file_version(path) or "unsaved"
 
     @classmethod
-    def load(cls, index_path: str = "artifacts/index.json") -> "RAGPipeline":
+    def load(
+        cls,
+        index_path: str = "artifacts/index.json",
+        dense: DenseConfig | None = None,
+        proximity_weight: float = 0.0,
+    ) -> "RAGPipeline":
         path = Path(index_path)
         if not path.exists():
-            return cls(chunks=[])
-        data = json.loads(path.read_text(encoding="utf-8"))
-        chunks = [DocumentChunk.from_dict(d) for d in data.get("chunks", [])]
-        return cls(chunks=chunks)
+            return cls(chunks=[], dense=dense, proximity_weight=proximity_weight)
+        with span("index.load"):
+            version = index_file_version(path) or "unsaved"
+            data = json.loads(path.read_text(encoding="utf-8"))
+            chunks = [DocumentChunk.from_dict(d) for d in data.get("chunks", [])]
+        with span("index.load_postings"):
+            # A missing or stale sidecar just means postings are rebuilt on first search.
+            factories = {
+                "postings": CompressedPostings.from_part,
+                "positions": PositionalIndex.from_part,
+                "dense": IVFIndex.from_part,
+            }
+            parts = load_sidecar(postings_path(path), chunks_digest(chunks), factories) or {}
+        REGISTRY.inc("agentic_rag_postings_sidecar_loads_total" if parts else "agentic_rag_postings_sidecar_misses_total")
+        return cls(
+            chunks=chunks,
+            index_version=version,
+            dense=dense,
+            proximity_weight=proximity_weight,
+            postings=parts.get("postings"),
+            positions=parts.get("positions"),
+            dense_index=parts.get("dense"),
+        )
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import re
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import accumulate
+
+from agentic_rag.postings import decode_varints, encode_varint
+from agentic_rag.utils import STOPWORDS, WORD_RE
+
+
+PHRASE_RE = re.compile(r'"([^"]+)"')
+
+
+def decode_positions(gaps: bytes) -> list[int]:
+    # Gaps below 128 are single bytes, so an all-ASCII run is its own decoded gap list.
+    return list(accumulate(gaps if gaps.isascii() else decode_varints(gaps)))
+
+
+def word_positions(text: str) -> Iterator[tuple[int, str]]:
+    # (position, token) for the tokens `tokenize` keeps. Positions count every word, stopwords
+    # included, so "capacity of factor" is not mistaken for "capacity factor".
+    for pos, word in enumerate(WORD_RE.findall(text)):
+        token = word.lower()
+        if token not in STOPWORDS:
+            yield pos, token
+
+
+def phrase_terms(phrase: str) -> list[tuple[int, str]]:
+    return list(word_positions(phrase))
+
+
+def query_phrases(query: str) -> list[list[tuple[int, str]]]:
+    # Quoted parts of a query as (offset, token) lists; all-stopword phrases are dropped.
+    return [terms for terms in map(phrase_terms, PHRASE_RE.findall(query)) if terms]
+
+
+def phrase_starts(terms: list[tuple[int, str]], positions: dict[str, Iterable[int]]) -> set[int]:
+    # Word positions where every term of the phrase sits at its offset.
+    starts: set[int] | None = None
+    for offset, token in terms:
+        found = {pos - offset for pos in positions.get(token, ())}
+        starts = found if starts is None else starts & found
+        if not starts:
+            return set()
+    return starts or set()
+
+
+def min_distance(a: list[int], b: list[int]) -> int:
+    # Smallest |x - y| over two ascending position lists, by a linear merge.
+    i = j = 0
+    best = None
+    while i < len(a) and j < len(b):
+        gap = a[i] - b[j]
+        if gap == 0:
+            return 0
+        if best is None or abs(gap) < best:
+            best = abs(gap)
+        if gap < 0:
+            i += 1
+        else:
+            j += 1
+    return best if best is not None else 0
+
+
+class PositionalIndex:
+    # Token positions per (token, posting slot). Slots follow HybridRetriever postings order
+    # (ascending doc index). Positions are gap-encoded varints in one bytes blob, tokens laid out
+    # one after another; each token owns a run of slot offsets into it (plus one shared end
+    # sentinel), so one document's positions decode on their own and a saved index maps in place.
+    def __init__(self, terms: dict[str, list[int]], offsets: Sequence[int], data: bytes):
+        self._terms = terms  # token -> [first slot, slot count]
+        # Memoryviews slice without copying; a loaded index passes views and a window into the map.
+        self._offsets = memoryview(offsets) if isinstance(offsets, array) else offsets
+        self._data = data
+
+    @classmethod
+    def build(cls, texts: Iterable[str]) -> "PositionalIndex":
+        blobs: dict[str, bytearray] = {}
+        starts: dict[str, array] = {}
+        for text in texts:
+            per_doc: dict[str, list[int]] = {}
+            for pos, token in word_positions(text):
+                per_doc.setdefault(token, []).append(pos)
+            for token, plist in per_doc.items():
+                blob = blobs.get(token)
+                if blob is None:
+                    blob = blobs[token] = bytearray()
+                    starts[token] = array("I")
+                starts[token].append(len(blob))
+                prev = 0
+                for pos in plist:
+                    gap = pos - prev
+                    if gap < 0x80:
+                        blob.append(gap)
+                    else:
+                        encode_varint(blob, gap)
+                    prev = pos
+        terms: dict[str, list[int]] = {}
+        offsets = array("Q")
+        data = bytearray()
+        for token in sorted(blobs):
+            terms[token] = [len(offsets), len(starts[token])]
+            base = len(data)
+            offsets.extend(base + start for start in starts[token])
+            data += blobs[token]
+        offsets.append(len(data))  # end sentinel: slot i spans offsets[i]:offsets[i + 1]
+        if len(data) < 1 << 32:
+            offsets = array("I", offsets)
+        return cls(terms, offsets, bytes(data))
+
+    def token_data(self, token: str) -> tuple[bytes, Sequence[int]]:
+        # The shared blob and this token's slot offsets (one more than its slot count).
+        first, count = self._terms[token]
+        return self._data, self._offsets[first : first + count + 1]
+
+    def positions(self, token: str, slot: int) -> list[int]:
+        blob, offsets = self.token_data(token)
+        return decode_positions(blob[offsets[slot] : offsets[slot + 1]])
+
+    def nbytes(self) -> int:
+        return len(self._data) + len(self._offsets) * self._offsets.itemsize
+
+    def to_part(self) -> tuple[dict, dict]:
+        return {"terms": self._terms}, {"offsets": self._offsets, "data": self._data}
+
+    @classmethod
+    def from_part(cls, meta: dict, sections: dict) -> "PositionalIndex":
+        return cls(meta["terms"], sections["offsets"], sections["data"])
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from itertools import accumulate
+from pathlib import Path
+
+
+BLOCK_SIZE = 128
+SIDECAR_MAGIC = b"ARPOST2\n"
+_HEADER_LEN = struct.Struct("<Q")
+# Skip-table columns, one entry per block (block_doc_offset has one extra end sentinel).
+_BLOCK_ARRAYS = ("block_last_doc", "block_doc_offset", "block_tf_offset", "block_max_tf", "block_min_len")
+
+
+def encode_varint(buf: bytearray, value: int) -> None:
+    # LEB128: 7 bits per byte, high bit set on every byte but the last.
+    while value >= 0x80:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def decode_varints(data: bytes, start: int = 0, end: int | None = None) -> list[int]:
+    values: list[int] = []
+    value = shift = 0
+    for byte in data[start:end]:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
+
+
+def _encode_run(buf: bytearray, values: list[int]) -> None:
+    if max(values) < 0x80:
+        buf += bytes(values)  # one byte per value, no continuation bits
+    else:
+        for value in values:
+            encode_varint(buf, value)
+
+
+def _decode_run(data: bytes) -> Sequence[int]:
+    # A run without continuation bytes is already its own list of small ints.
+    return data if data.isascii() else decode_varints(data)
+
+
+class CompressedPostings:
+    # Inverted index over ascending doc indexes. Each term's postings are cut into blocks of
+    # BLOCK_SIZE; a block holds gap-encoded varint doc ids followed by varint term frequencies.
+    # The skip table keeps, per block, the last doc id, both byte offsets, the largest tf and
+    # the shortest doc length, so lookups jump to the one block that can hold a doc and score
+    # bounds come from block maxima without decoding. Doc lengths are stored as small ints.
+    # All arrays are flat, so a saved file is used in place through mmap.
+    def __init__(
+        self,
+        terms: dict[str, list[int]],
+        blocks: dict[str, Sequence[int]],
+        doc_lengths: Sequence[int],
+        data: "bytes | _Window",
+    ):
+        self._terms = terms  # token -> [first block, block count, document frequency]
+        self._block_last_doc = blocks["block_last_doc"]
+        self._block_doc_offset = blocks["block_doc_offset"]
+        self._block_tf_offset = blocks["block_tf_offset"]
+        self._block_max_tf = blocks["block_max_tf"]
+        self._block_min_len = blocks["block_min_len"]
+        self.doc_lengths = doc_lengths
+        self._data = data
+
+    @classmethod
+    def build(cls, doc_tokens: Iterable[list[str]]) -> "CompressedPostings":
+        docs: dict[str, array] = {}
+        tfs: dict[str, array] = {}
+        lengths = array("I")
+        for idx, tokens in enumerate(doc_tokens):
+            lengths.append(len(tokens))
+            for token, freq in Counter(tokens).items():
+                if token not in docs:
+                    docs[token] = array("I")
+                    tfs[token] = array("I")
+                docs[token].append(idx)
+                tfs[token].append(freq)
+        terms: dict[str, list[int]] = {}
+        blocks: dict[str, array] = {name: array("I") for name in _BLOCK_ARRAYS}
+        data = bytearray()
+        for token in sorted(docs):
+            token_docs, token_tfs = docs[token], tfs[token]
+            terms[token] = [len(blocks["block_last_doc"]), (len(token_docs) + BLOCK_SIZE - 1) // BLOCK_SIZE, len(token_docs)]
+            prev = 0
+            for start in range(0, len(token_docs), BLOCK_SIZE):
+                block_docs = token_docs[start : start + BLOCK_SIZE]
+                block_tfs = token_tfs[start : start + BLOCK_SIZE].tolist()
+                gaps = [block_docs[0] - prev, *(b - a for a, b in zip(block_docs, block_docs[1:]))]
+                prev = block_docs[-1]
+                blocks["block_last_doc"].append(prev)
+                blocks["block_doc_offset"].append(len(data))
+                _encode_run(data, gaps)
+                blocks["block_tf_offset"].append(len(data))
+                _encode_run(data, block_tfs)
+                blocks["block_max_tf"].append(max(block_tfs))
+                blocks["block_min_len"].append(min(lengths[idx] for idx in block_docs))
+        blocks["block_doc_offset"].append(len(data))
+        doc_lengths = array("H", lengths) if not lengths or max(lengths) < 1 << 16 else lengths
+        return cls(terms, blocks, doc_lengths, bytes(data))
+
+    def __contains__(self, token: str) -> bool:
+        return token in self._terms
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_lengths)
+
+    def df(self, token: str) -> int:
+        term = self._terms.get(token)
+        return term[2] if term else 0
+
+    def document_frequencies(self) -> dict[str, int]:
+        return {token: term[2] for token, term in self._terms.items()}
+
+    def _block(self, block: int, first: int) -> tuple[list[int], Sequence[int]]:
+        doc_offset = self._block_doc_offset[block]
+        tf_offset = self._block_tf_offset[block]
+        base = self._block_last_doc[block - 1] if block > first else 0
+        docs = list(accumulate(_decode_run(self._data[doc_offset:tf_offset]), initial=base))
+        docs.pop(0)
+        return docs, _decode_run(self._data[tf_offset : self._block_doc_offset[block + 1]])
+
+    def entries(self, token: str) -> Iterator[tuple[int, int]]:
+        # (doc index, tf) in doc order.
+        term = self._terms.get(token)
+        if term is None:
+            return
+        first, count, _ = term
+        for block in range(first, first + count):
+            yield from zip(*self._block(block, first))
+
+    def docs(self, token: str) -> Iterator[int]:
+        term = self._terms.get(token)
+        if term is None:
+            return
+        first, count, _ = term
+        for block in range(first, first + count):
+            yield from self._block(block, first)[0]
+
+    def intersect(self, token: str, ids: Sequence[int]) -> Iterator[tuple[int, int, int]]:
+        # (row in ids, posting slot, tf) for each of the ascending `ids` the term occurs in.
+        # The skip table finds the block that can hold each id; other blocks are never decoded.
+        term = self._terms.get(token)
+        if term is None:
+            return
+        first, count, _ = term
+        end = first + count
+        last_doc = self._block_last_doc
+        block = first
+        decoded = -1
+        block_docs: list[int] = []
+        block_tfs: Sequence[int] = ()
+        for row, idx in enumerate(ids):
+            if last_doc[block] < idx:
+                block = bisect_left(last_doc, idx, block + 1, end)
+                if block == end:
+                    return
+            if block != decoded:
+                block_docs, block_tfs = self._block(block, first)
+                decoded = block
+            pos = bisect_left(block_docs, idx)
+            if pos < len(block_docs) and block_docs[pos] == idx:
+                yield row, (block - first) * BLOCK_SIZE + pos, block_tfs[pos]
+
+    def block_bounds(self, token: str) -> Iterator[tuple[int, int]]:
+        # (largest tf, shortest doc length) per block: enough to bound BM25 impact per block.
+        term = self._terms.get(token)
+        if term is None:
+            return
+        first, count, _ = term
+        for block in range(first, first + count):
+            yield self._block_max_tf[block], self._block_min_len[block]
+
+    def nbytes(self) -> int:
+        arrays = [getattr(self, f"_{name}") for name in _BLOCK_ARRAYS] + [self.doc_lengths]
+        return len(self._data) + sum(len(a) * a.itemsize for a in arrays)
+
+    def to_part(self) -> tuple[dict, dict]:
+        sections = {name: getattr(self, f"_{name}") for name in _BLOCK_ARRAYS}
+        sections["doc_lengths"] = self.doc_lengths
+        sections["data"] = self._data
+        return {"terms": self._terms}, sections
+
+    @classmethod
+    def from_part(cls, meta: dict, sections: dict) -> "CompressedPostings":
+        return cls(meta["terms"], sections, sections["doc_lengths"], sections["data"])
+
+
+def _section_size(values) -> int:
+    return len(values) if isinstance(values, (bytes, _Window)) else len(values) * values.itemsize
+
+
+def save_sidecar(path: str | Path, digest: str, parts: dict[str, tuple[dict, dict]]) -> None:
+    # Layout: magic, header length, JSON header (per named part: its metadata plus each section's
+    # typecode, offset and size), then the raw sections, each 8-byte aligned so they can be cast
+    # in place. Parts are (metadata, sections) pairs from to_part().
+    layout: dict[str, dict] = {}
+    offset = 0
+    for name, (meta, sections) in parts.items():
+        placed = {}
+        for key, values in sections.items():
+            if isinstance(values, (bytes, _Window)):
+                typecode = "bytes"
+            else:
+                typecode = values.typecode if isinstance(values, array) else values.format
+            size = _section_size(values)
+            placed[key] = [typecode, offset, size]
+            offset += size + (-size % 8)
+        layout[name] = {"meta": meta, "sections": placed}
+    header = json.dumps(
+        {"digest": digest, "byteorder": sys.byteorder, "parts": layout}, separators=(",", ":")
+    ).encode("utf-8")
+    header += b" " * (-(len(SIDECAR_MAGIC) + _HEADER_LEN.size + len(header)) % 8)
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as handle:
+        handle.write(SIDECAR_MAGIC + _HEADER_LEN.pack(len(header)) + header)
+        for _, sections in parts.values():
+            for values in sections.values():
+                raw = values[0 : len(values)] if isinstance(values, (bytes, _Window)) else values.tobytes()
+                handle.write(raw + b"\0" * (-len(raw) % 8))
+    tmp.replace(path)
+
+
+def load_sidecar(
+    path: str | Path,
+    digest: str,
+    factories: dict[str, Callable[[dict, dict], object]],
+) -> dict[str, object] | None:
+    # Maps a saved sidecar and builds each part named in `factories` from its metadata and
+    # sections (casted memoryviews, or a _Window for byte blobs). Parts missing from the file are
+    # left out; None when it is missing, unreadable, corrupt or built from other chunks.
+    try:
+        with open(path, "rb") as handle:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    view = sections = loaded = None
+    try:
+        if mapped[: len(SIDECAR_MAGIC)] != SIDECAR_MAGIC:
+            raise ValueError("not a postings sidecar")
+        (header_len,) = _HEADER_LEN.unpack_from(mapped, len(SIDECAR_MAGIC))
+        body = len(SIDECAR_MAGIC) + _HEADER_LEN.size + header_len
+        header = json.loads(mapped[len(SIDECAR_MAGIC) + _HEADER_LEN.size : body])
+        if header.get("digest") != digest or header.get("byteorder") != sys.byteorder:
+            raise ValueError("sidecar built from other chunks")
+        view = memoryview(mapped)
+        loaded = {}
+        for name, part in header["parts"].items():
+            factory = factories.get(name)
+            if factory is None:
+                continue
+            sections = {}
+            for key, (typecode, offset, size) in part["sections"].items():
+                start = body + offset
+                if start + size > len(mapped):
+                    raise ValueError(f"truncated section {name}.{key}")
+                if typecode == "bytes":
+                    # Slicing the mmap returns bytes, so blobs decode straight from the page cache.
+                    sections[key] = _Window(mapped, start, size)
+                else:
+                    sections[key] = view[start : start + size].cast(typecode)
+            loaded[name] = factory(part["meta"], sections)
+        return loaded
+    except (AttributeError, KeyError, TypeError, ValueError, struct.error):
+        pass
+    # Closed outside the handler: the traceback keeps frames (and their exported views) alive.
+    view = sections = loaded = None
+    mapped.close()
+    return None
+
+
+class _Window:
+    # Byte slices of one mmap section shifted by its offset, so blob offsets stay file-independent.
+    def __init__(self, mapped: mmap.mmap, offset: int, size: int):
+        self._mapped = mapped
+        self._offset = offset
+        self._size = size
+
+    def __getitem__(self, key: slice) -> bytes:
+        return self._mapped[self._offset + key.start : self._offset + key.stop]
+
+    def __len__(self) -> int:
+        return self._size
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import cProfile
+import datetime as dt
+import json
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+
+PROFILE_DIR = Path("artifacts/profiles")
+PROFILE_HEADER = "X-Profile"
+TRUTHY = {"1", "true", "yes", "on"}
+
+
+def _function_label(func: tuple[str, int, str]) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name  # built-in
+    return f"{filename}:{line}({name})"
+
+
+def _top_functions(profile: cProfile.Profile, limit: int) -> list[dict[str, Any]]:
+    stats = pstats.Stats(profile)
+    rows = []
+    for func, (cc, ncalls, tottime, cumtime, _callers) in stats.stats.items():  # type: ignore[attr-defined]
+        rows.append(
+            {
+                "function": _function_label(func),
+                "ncalls": ncalls,
+                "tottime_ms": round(tottime * 1000, 3),
+                "cumtime_ms": round(cumtime * 1000, 3),
+            }
+        )
+    rows.sort(key=lambda r: r["tottime_ms"], reverse=True)
+    return rows[:limit]
+
+
+def _top_allocations(snapshot: tracemalloc.Snapshot, limit: int) -> list[dict[str, Any]]:
+    return [
+        {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+class Profiler:
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        header: str = PROFILE_HEADER,
+        output_dir: Path | str = PROFILE_DIR,
+        top_n: int = 25,
+        max_profiles: int = 200,
+    ):
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.header = header
+        self.output_dir = Path(output_dir)
+        self.top_n = top_n
+        self.max_profiles = max_profiles
+        # cProfile hooks and tracemalloc are process-wide, so only one call is profiled at a time.
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+
+    def should_profile(self, header_value: str | None = None) -> bool:
+        if header_value and header_value.strip().lower() in TRUTHY:
+            return True
+        return self.sample_rate > 0 and self._rng.random() < self.sample_rate
+
+    def profile_call(
+        self,
+        label: str,
+        meta: dict[str, Any],
+        fn: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any,
+    ) -> tuple[Any, Path | None]:
+        if not self._lock.acquire(blocking=False):
+            return fn(*args, **kwargs), None  # another request holds the profiler; run unprofiled
+        try:
+            was_tracing = tracemalloc.is_tracing()
+            if not was_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            profile.enable()
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                duration = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot()
+                if not was_tracing:
+                    tracemalloc.stop()
+            path = self._write(label, meta, profile, snapshot, duration, peak)
+            return result, path
+        finally:
+            self._lock.release()
+
+    def _write(
+        self,
+        label: str,
+        meta: dict[str, Any],
+        profile: cProfile.Profile,
+        snapshot: tracemalloc.Snapshot,
+        duration: float,
+        peak: int,
+    ) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        safe_label = "".join(ch for ch in label if ch.isalnum() or ch in ("-", "_")) or "profile"
+        stem = f"{stamp}-{safe_label}-{uuid.uuid4().hex[:6]}"
+        profile.dump_stats(str(self.output_dir / f"{stem}.prof"))
+        record = {
+            "id": stem,
+            "label": label,
+            "timestamp": stamp,
+            "duration_ms": round(duration * 1000, 3),
+            "peak_traced_bytes": peak,
+            "pstats_file": f"{stem}.prof",
+            **meta,
+            "top_functions": _top_functions(profile, self.top_n),
+            "top_allocations": _top_allocations(snapshot, 10),
+        }
+        path = self.output_dir / f"{stem}.json"
+        path.write_text(json.dumps(record, indent=2), encoding="utf-8")
+        self._prune()
+        return path
+
+    def _prune(self) -> None:
+        records = sorted(self.output_dir.glob("*.json"))
+        for old in records[: max(0, len(records) - self.max_profiles)]:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".prof").unlink(missing_ok=True)
+
+
+def list_profiles(output_dir: Path | str = PROFILE_DIR, limit: int = 20, top_n: int = 15) -> dict[str, Any]:
+    directory = Path(output_dir)
+    if not directory.exists():
+        return {"profiles": [], "top_functions": []}
+    profiles = []
+    totals: dict[str, dict[str, float]] = {}
+    # File names start with a UTC timestamp, so reverse name order is newest first.
+    for path in sorted(directory.glob("*.json"), reverse=True)[: max(1, limit)]:
+        try:
+            record = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            continue
+        for row in record.get("top_functions", []):
+            agg = totals.setdefault(row["function"], {"tottime_ms": 0.0, "cumtime_ms": 0.0, "profiles": 0})
+            agg["tottime_ms"] += row.get("tottime_ms", 0.0)
+            agg["cumtime_ms"] += row.get("cumtime_ms", 0.0)
+            agg["profiles"] += 1
+        record.pop("top_allocations", None)
+        record["top_functions"] = record.get("top_functions", [])[:5]
+        profiles.append(record)
+    top = sorted(
+        ({"function": name, **{k: round(v, 3) for k, v in agg.items()}} for name, agg in totals.items()),
+        key=lambda r: r["tottime_ms"],
+        reverse=True,
+    )
+    return {"profiles": profiles, "top_functions": top[:top_n]}
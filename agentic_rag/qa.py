@@ -1,13 +1,22 @@
 from __future__ import annotations
 
 import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 
 from agentic_rag.models import Citation, QAResult
 from agentic_rag.retrieval import RetrievalHit
+from agentic_rag.tracing import span
 from agentic_rag.utils import normalize_whitespace, sentence_split, tokenize
 
 _HEADING_MARKER_RE = re.compile(r"#{1,6}\s*")
 
+REFUSAL_ANSWER = "I cannot find this in the uploaded documents. Please add more relevant files."
+ANSWER_HEADER = "Based on the uploaded documents:"
+# Top-hit scores below these always refuse (sensitive questions need the stronger grounding).
+MIN_ANSWER_SCORE = 0.08
+STRONG_GROUNDING_SCORE = 0.12
+
 
 INJECTION_PATTERNS = (
     "ignore previous instructions",
@@ -40,7 +49,7 @@ def _has_strong_grounding(question_tokens: list[str], hits: list[RetrievalHit])
     top = hits[0]
     chunk_tokens = set(tokenize(top.chunk.text))
     overlap = len(set(question_tokens) & chunk_tokens)
-    return overlap > 0 and top.score >= 0.12
+    return overlap > 0 and top.score >= STRONG_GROUNDING_SCORE
 
 
 def _contains_numeric_request(question: str) -> bool:
@@ -53,51 +62,58 @@ def _contains_sensitive_request(question: str) -> bool:
     return any(term in lowered for term in SENSITIVE_QUERY_TERMS)
 
 
-def generate_grounded_answer(question: str, hits: list[RetrievalHit]) -> QAResult:
-    q_tokens = tokenize(question)
-    if not hits:
-        return QAResult(
-            question=question,
-            answer="I cannot find this in the uploaded documents. Please add more relevant files.",
-            citations=[],
-        )
+def refusal_threshold(question: str) -> float | None:
+    # Score that the top hit must reach for stream_grounded_answer to possibly answer, or None
+    # when even a low-scoring hit can be answered (numeric questions).
+    if _contains_sensitive_request(question):
+        return STRONG_GROUNDING_SCORE
+    if not _contains_numeric_request(question):
+        return MIN_ANSWER_SCORE
+    return None
 
-    if _contains_sensitive_request(question) and not _has_strong_grounding(q_tokens, hits):
-        return QAResult(
-            question=question,
-            answer="I cannot find this in the uploaded documents. Please add more relevant files.",
-            citations=[],
-        )
 
-    if hits[0].score < 0.08 and not _contains_numeric_request(question):
-        return QAResult(
-            question=question,
-            answer="I cannot find this in the uploaded documents. Please add more relevant files.",
-            citations=[],
-        )
+@dataclass
+class AnswerStream:
+    question: str
+    refused: bool
+    citations: list[Citation]
+    bullets: Iterator[str]
+
+
+def format_answer(bullets: Iterable[str]) -> str:
+    return ANSWER_HEADER + "\n" + "\n".join(f"- {b}" for b in bullets)
+
+
+def _refuse(question: str) -> AnswerStream:
+    return AnswerStream(question=question, refused=True, citations=[], bullets=iter(()))
+
 
-    candidate_sentences: list[tuple[float, str]] = []
-    for hit in hits:
-        for sentence in sentence_split(hit.chunk.text):
-            if _is_malicious_sentence(sentence):
-                continue
-            rel = _sentence_relevance(q_tokens, sentence)
-            if rel > 0:
-                candidate_sentences.append((0.7 * rel + 0.3 * hit.score, sentence))
-
-    candidate_sentences.sort(key=lambda x: x[0], reverse=True)
-    selected = [s for _, s in candidate_sentences[:3]]
+def _iter_selected_sentences(question: str, q_tokens: list[str], hits: list[RetrievalHit]) -> Iterator[str]:
+    selected: list[str] = []
+    numeric_sentences: list[str] = []
     if _contains_numeric_request(question):
-        numeric_sentences = []
         for hit in hits:
             for sentence in sentence_split(hit.chunk.text):
                 if any(ch.isdigit() for ch in sentence):
                     numeric_sentences.append(sentence)
-        if numeric_sentences:
-            selected = numeric_sentences[:3]
+    if numeric_sentences:
+        selected = numeric_sentences[:3]
+    else:
+        candidate_sentences: list[tuple[float, str]] = []
+        for hit in hits:
+            for sentence in sentence_split(hit.chunk.text):
+                if _is_malicious_sentence(sentence):
+                    continue
+                rel = _sentence_relevance(q_tokens, sentence)
+                if rel > 0:
+                    candidate_sentences.append((0.7 * rel + 0.3 * hit.score, sentence))
+        candidate_sentences.sort(key=lambda x: x[0], reverse=True)
+        selected = [s for _, s in candidate_sentences[:3]]
+    yield from selected
 
     # Pad to at least 3 sentences from top chunks when candidates are sparse.
-    if len(selected) < 3:
+    count = len(selected)
+    if count < 3:
         seen = {normalize_whitespace(s) for s in selected}
         for hit in hits:
             for sentence in sentence_split(hit.chunk.text):
@@ -105,18 +121,29 @@ def generate_grounded_answer(question: str, hits: list[RetrievalHit]) -> QAResul
                     continue
                 clean = normalize_whitespace(sentence)
                 if clean not in seen and len(clean) > 20:
-                    selected.append(clean)
+                    yield clean
                     seen.add(clean)
-                    if len(selected) >= 3:
+                    count += 1
+                    if count >= 3:
                         break
-            if len(selected) >= 3:
+            if count >= 3:
                 break
 
-    if not selected:
-        selected = [normalize_whitespace(hits[0].chunk.text)[:280]]
+    if count == 0:
+        yield normalize_whitespace(hits[0].chunk.text)[:280]
 
-    lines = [f"- {_HEADING_MARKER_RE.sub('', normalize_whitespace(s)).strip()}" for s in selected]
-    answer = "Based on the uploaded documents:\n" + "\n".join(lines)
+
+def stream_grounded_answer(question: str, hits: list[RetrievalHit]) -> AnswerStream:
+    # Refusal and citations are decided up front; bullets are produced lazily as they are selected.
+    q_tokens = tokenize(question)
+    if not hits:
+        return _refuse(question)
+
+    if _contains_sensitive_request(question) and not _has_strong_grounding(q_tokens, hits):
+        return _refuse(question)
+
+    if hits[0].score < MIN_ANSWER_SCORE and not _contains_numeric_request(question):
+        return _refuse(question)
 
     citations: list[Citation] = []
     for hit in hits[:2]:
@@ -126,6 +153,20 @@ def generate_grounded_answer(question: str, hits: list[RetrievalHit]) -> QAResul
                 source=hit.chunk.source,
                 locator=hit.chunk.locator,
                 snippet=snippet,
+                also_in=hit.chunk.alias_citations(),
             )
         )
-    return QAResult(question=question, answer=answer, citations=citations)
+    bullets = (
+        _HEADING_MARKER_RE.sub("", normalize_whitespace(s)).strip()
+        for s in _iter_selected_sentences(question, q_tokens, hits)
+    )
+    return AnswerStream(question=question, refused=False, citations=citations, bullets=bullets)
+
+
+def generate_grounded_answer(question: str, hits: list[RetrievalHit]) -> QAResult:
+    with span("answer"):
+        stream = stream_grounded_answer(question, hits)
+        if stream.refused:
+            return QAResult(question=question, answer=REFUSAL_ANSWER, citations=[])
+        answer = format_answer(stream.bullets)
+        return QAResult(question=question, answer=answer, citations=stream.citations)
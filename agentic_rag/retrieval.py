@@ -1,29 +1,123 @@
 from __future__ import annotations
 
+import copy
+import heapq
 import math
+import re
+from array import array
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator
 from dataclasses import dataclass
 
-from agentic_rag.models import DocumentChunk
+from agentic_rag.dense import DenseConfig, FeatureHasher, IVFIndex, build_dense_index
+from agentic_rag.models import FILTER_FIELDS, ChunkFilter, DocumentChunk
+from agentic_rag.postings import CompressedPostings
+from agentic_rag.positional import PositionalIndex, decode_positions, min_distance, phrase_starts, query_phrases, word_positions
+from agentic_rag.tracing import REGISTRY, span
 from agentic_rag.utils import char_ngrams, jaccard, token_counts, tokenize
 
 
+BM25_K1 = 1.5
+BM25_B = 0.75
+# A metadata value matching fewer than 1 in this many chunks keeps a sorted id array instead of
+# a bitmap (8 bytes per id vs. one bit per chunk).
+SPARSE_BITMAP_RATIO = 64
+# Slack for float rounding when comparing a score upper bound against a refusal threshold.
+BOUND_MARGIN = 1e-6
+# With a proximity weight, this many top hits are rescored before the final top_k cut.
+PROXIMITY_DEPTH = 50
+
+_NONZERO_BYTE_RE = re.compile(rb"[^\x00]")
+_BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+def _bitmap_ids(bitmap: int) -> list[int]:
+    # Set bit positions in ascending order. Zero bytes are skipped inside the regex engine, so
+    # Python-level work follows the number of matching chunks rather than the corpus size.
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    return [m.start() * 8 + bit for m in _NONZERO_BYTE_RE.finditer(data) for bit in _BYTE_BITS[data[m.start()]]]
+
+
+def _ids_bitmap(ids, n_docs: int) -> int:
+    buf = bytearray((n_docs + 7) // 8)
+    for idx in ids:
+        buf[idx >> 3] |= 1 << (idx & 7)
+    return int.from_bytes(buf, "little")
+
+
 @dataclass
 class RetrievalHit:
     chunk: DocumentChunk
     score: float
     lexical_score: float
     semantic_score: float
+    dense_score: float = 0.0
+    proximity_score: float = 0.0
+
+
+@dataclass
+class _PreparedQuery:
+    tokens: list[str]
+    token_set: set[str]
+    ngrams: set[str]
+    vector: object = None
 
 
 class HybridRetriever:
-    def __init__(self, chunks: list[DocumentChunk]):
+    def __init__(
+        self,
+        chunks: list[DocumentChunk],
+        dense: DenseConfig | None = None,
+        proximity_weight: float = 0.0,
+        postings: CompressedPostings | None = None,
+        positions: PositionalIndex | None = None,
+        dense_index: IVFIndex | None = None,
+    ):
         self.chunks = chunks
-        self.doc_tokens = [tokenize(c.text) for c in chunks]
+        self.dense = dense or DenseConfig()
+        # 0 keeps the exact hybrid ranking; positions are only built for phrases or proximity
+        # (or when saving), unless they come prebuilt from a saved sidecar.
+        self.proximity_weight = proximity_weight
+        self._positions = positions
+        self._doc_index: dict[str, int] | None = None
+        # Score upper-bound state, filled on demand: per-token BM25 impact bound, the corpus
+        # trigram vocabulary and the distinct per-chunk trigram counts (ascending).
+        self._max_impact: dict[str, float] = {}
+        self._corpus_ngrams: set[str] | None = None
+        self._ngram_sizes: list[int] = []
+        self._dense_index: IVFIndex | None = None
+        self._hasher: FeatureHasher | None = None
+        # Built (or loaded) IVF indexes by DenseConfig.index_key, shared with with_dense() views.
+        self._dense_indexes: dict[tuple[int, int, int], IVFIndex] = {}
+        if dense_index is not None:
+            self._dense_indexes[dense_index.key] = dense_index
         self.df: dict[str, int] = {}
         self.avg_doc_len = 0.0
+        # Postings may come prebuilt (a saved sidecar); otherwise they are built with the other
+        # scoring caches on first search, so ingest-only runs don't pay for them.
+        self._postings = postings
+        self._doc_tokens: list[list[str]] | None = None
+        self._scoring_ready = False
+        self._doc_ngrams: list[set[str]] = []
+        self._length_norms: list[float] = []
+        self._idf: dict[str, float] = {}
+        # attribute -> value -> bitmap int (or sorted id array when sparse); built on first filter.
+        self._metadata: dict[str, dict[str, int | array]] | None = None
         self._build_stats()
 
+    @property
+    def doc_tokens(self) -> list[list[str]]:
+        # Token lists are only kept until the postings exist; search_exact re-tokenizes on demand.
+        if self._doc_tokens is None:
+            self._doc_tokens = [tokenize(c.text) for c in self.chunks]
+        return self._doc_tokens
+
     def _build_stats(self) -> None:
+        if self._postings is not None:
+            self.df = self._postings.document_frequencies()
+            lengths = self._postings.doc_lengths
+            self.avg_doc_len = sum(lengths) / len(lengths) if len(lengths) else 0.0
+            return
         if not self.doc_tokens:
             self.avg_doc_len = 0.0
             return
@@ -35,14 +129,243 @@ class HybridRetriever:
                 self.df[t] = self.df.get(t, 0) + 1
         self.avg_doc_len = total_len / len(self.doc_tokens)
 
+    def warm(self) -> None:
+        self._ensure_scoring_cache()
+
+    def _ensure_scoring_cache(self) -> None:
+        if self._scoring_ready:
+            return
+        with span("retrieval.index_build"):
+            self._build_scoring_cache()
+
+    def _length_norm(self, length: int) -> float:
+        return BM25_K1 * (1 - BM25_B + BM25_B * (length / self.avg_doc_len))
+
+    def postings_index(self) -> CompressedPostings:
+        if self._postings is None:
+            self._postings = CompressedPostings.build(self.doc_tokens)
+        return self._postings
+
+    def _build_scoring_cache(self) -> None:
+        postings = self.postings_index()
+        self._doc_ngrams = [char_ngrams(c.text, n=3) for c in self.chunks]
+        if self.avg_doc_len:
+            self._length_norms = [self._length_norm(length) for length in postings.doc_lengths]
+        n_docs = len(self.chunks)
+        self._idf = {
+            token: math.log(1 + (n_docs - df + 0.5) / (df + 0.5)) for token, df in self.df.items()
+        }
+        if self.dense.enabled:
+            self._hasher = FeatureHasher(self.dense.dim)
+            self._dense_index = self.dense_index()
+        self._doc_tokens = None
+        self._scoring_ready = True
+
+    def dense_index(self, dense: DenseConfig | None = None) -> IVFIndex:
+        # The IVF index for `dense` (default: this retriever's config), loaded from a sidecar or
+        # embedded from the token lists and trigram sets rather than re-parsing text.
+        dense = dense or self.dense
+        index = self._dense_indexes.get(dense.index_key)
+        if index is None:
+            ngrams = self._doc_ngrams or (char_ngrams(c.text, n=3) for c in self.chunks)
+            index = build_dense_index(FeatureHasher(dense.dim), zip(self.doc_tokens, ngrams), dense.nlist, dense.seed)
+            self._dense_indexes[dense.index_key] = index
+            if self._scoring_ready:
+                self._doc_tokens = None
+        return index
+
+    def with_dense(self, dense: DenseConfig) -> "HybridRetriever":
+        # A retriever over the same chunks and scoring caches with another dense leg, so one loaded
+        # index (the daemon's) can answer queries with and without dense scoring.
+        if dense == self.dense:
+            return self
+        self._ensure_scoring_cache()
+        view = copy.copy(self)
+        view.dense = dense
+        view._hasher = FeatureHasher(dense.dim) if dense.enabled else None
+        view._dense_index = self.dense_index(dense) if dense.enabled else None
+        return view
+
+    def _build_metadata_index(self) -> dict[str, dict[str, int | array]]:
+        members: dict[str, dict[str, list[int]]] = {key: {} for key in FILTER_FIELDS.values()}
+        for idx, chunk in enumerate(self.chunks):
+            for key, by_value in members.items():
+                for value in chunk.metadata_values(key):
+                    by_value.setdefault(value, []).append(idx)
+        n_docs = len(self.chunks)
+        return {
+            key: {
+                value: array("l", ids) if len(ids) * SPARSE_BITMAP_RATIO < n_docs else _ids_bitmap(ids, n_docs)
+                for value, ids in by_value.items()
+            }
+            for key, by_value in members.items()
+        }
+
+    def filter_ids(self, filters: ChunkFilter) -> list[int]:
+        # OR within a field, AND across fields, on int bitmaps; returns matching doc indexes ascending.
+        if self._metadata is None:
+            self._metadata = self._build_metadata_index()
+        n_docs = len(self.chunks)
+        allowed = (1 << n_docs) - 1
+        for name, key in FILTER_FIELDS.items():
+            values = getattr(filters, name)
+            if not values:
+                continue
+            field_bits = 0
+            sparse: list[int] = []
+            for value in values:
+                entry = self._metadata[key].get(value, 0)
+                if isinstance(entry, array):
+                    sparse.extend(entry)
+                else:
+                    field_bits |= entry
+            if sparse:
+                field_bits |= _ids_bitmap(sparse, n_docs)
+            allowed &= field_bits
+        return _bitmap_ids(allowed)
+
+    def positional_index(self) -> PositionalIndex:
+        if self._positions is None:
+            with span("retrieval.positions_build"):
+                self._positions = PositionalIndex.build(c.text for c in self.chunks)
+        return self._positions
+
+    def _doc_positions(self, token: str, idx: int) -> list[int]:
+        for _, slot, _ in self._postings.intersect(token, (idx,)):  # type: ignore[union-attr]
+            return self.positional_index().positions(token, slot)
+        return []
+
+    def _phrase_ids(self, phrases: list[list[tuple[int, str]]], within: list[int] | None) -> list[int]:
+        # Doc indexes containing every quoted phrase. Postings are merge-joined rarest token
+        # first into flat columns (doc index, then the posting slot of each token), so positions
+        # are decoded only for documents holding all of the phrase's tokens.
+        postings = self._postings
+        assert postings is not None
+        ids = within
+        for terms in phrases:
+            tokens = sorted({token for _, token in terms}, key=postings.df)
+            if any(token not in postings for token in tokens):
+                return []
+            docs = ids
+            slots: list[list[int]] = []
+            for token in tokens:
+                if docs is None:
+                    docs = list(postings.docs(token))
+                    slots.append(list(range(len(docs))))
+                    continue
+                rows: list[int] = []
+                column: list[int] = []
+                for row, slot, _ in postings.intersect(token, docs):
+                    rows.append(row)
+                    column.append(slot)
+                if len(rows) < len(docs):
+                    docs = [docs[row] for row in rows]
+                    slots = [[col[row] for row in rows] for col in slots]
+                slots.append(column)
+                if not docs:
+                    return []
+            assert docs is not None
+            if len(terms) > 1:
+                positional = self.positional_index()
+                checks = [
+                    (offset, *positional.token_data(token), slots[tokens.index(token)]) for offset, token in terms
+                ]
+                matched: list[int] = []
+                for row, idx in enumerate(docs):
+                    starts: set[int] | None = None
+                    for offset, blob, offsets, column in checks:
+                        slot = column[row]
+                        found = {pos - offset for pos in decode_positions(blob[offsets[slot] : offsets[slot + 1]])}
+                        starts = found if starts is None else starts & found
+                        if not starts:
+                            break
+                    if starts:
+                        matched.append(idx)
+                docs = matched
+            if not docs:
+                return []
+            ids = docs
+        return ids if ids is not None else []
+
+    def _apply_proximity(self, query_tokens: list[str], hits: list[RetrievalHit], top_k: int) -> list[RetrievalHit]:
+        # Boost = weight * mean over adjacent query-token pairs of 1 / word distance in the chunk
+        # (1.0 when every pair appears side by side), then re-sort the rescored pool.
+        pairs = [(a, b) for a, b in zip(query_tokens, query_tokens[1:]) if a != b]
+        if not pairs:
+            return hits[:top_k]
+        if self._doc_index is None:
+            self._doc_index = {c.chunk_id: idx for idx, c in enumerate(self.chunks)}
+        for hit in hits:
+            idx = self._doc_index[hit.chunk.chunk_id]
+            positions: dict[str, list[int]] = {}
+            total = 0.0
+            for a, b in pairs:
+                for token in (a, b):
+                    if token not in positions:
+                        positions[token] = self._doc_positions(token, idx)
+                if positions[a] and positions[b]:
+                    total += 1.0 / max(1, min_distance(positions[a], positions[b]))
+            hit.proximity_score = total / len(pairs)
+            hit.score += self.proximity_weight * hit.proximity_score
+        hits.sort(key=lambda h: h.score, reverse=True)
+        return hits[:top_k]
+
+    def _token_max_impact(self, token: str) -> float:
+        # Largest tf over the shortest length, per postings block: at least any real impact.
+        impact = self._max_impact.get(token)
+        if impact is None:
+            idf = self._idf.get(token)
+            impact = 0.0
+            if idf is not None and self.avg_doc_len:
+                impact = max(
+                    idf * ((f * (BM25_K1 + 1)) / (f + self._length_norm(length)))
+                    for f, length in self._postings.block_bounds(token)  # type: ignore[union-attr]
+                )
+            self._max_impact[token] = impact
+        return impact
+
+    def _trigram_bound(self, q_ngrams: set[str]) -> float:
+        if not q_ngrams:
+            return 0.0
+        if self._corpus_ngrams is None:
+            self._corpus_ngrams = set().union(*self._doc_ngrams)
+            self._ngram_sizes = sorted({len(d) for d in self._doc_ngrams if d})
+        inter = len(q_ngrams & self._corpus_ngrams)
+        if not inter:
+            return 0.0
+        # Jaccard is i / (q + d - i) with i <= min(inter, d): for chunk sizes d >= inter it falls as
+        # d grows, below inter it is at most d / q, so the nearest sizes on either side bound it.
+        q_len = len(q_ngrams)
+        sizes = self._ngram_sizes
+        pos = bisect_left(sizes, inter)
+        bound = 0.0
+        if pos < len(sizes):
+            bound = inter / (q_len + sizes[pos] - inter)
+        if pos > 0:
+            bound = max(bound, sizes[pos - 1] / q_len)
+        return bound
+
+    def _score_upper_bound(self, query: _PreparedQuery) -> float:
+        # No chunk can score above this: each query token's largest BM25 impact, the share of query
+        # tokens found anywhere in the corpus, a trigram Jaccard bound and the full dense and
+        # proximity weights. Needs only corpus-level statistics, never per-chunk scoring.
+        self._ensure_scoring_cache()
+        lexical = sum(self._token_max_impact(token) for token in query.tokens)
+        q_size = len(query.token_set)
+        coverage = sum(1 for token in query.token_set if token in self.df) / q_size if q_size else 0.0
+        bound = 0.60 * lexical + 0.30 * self._trigram_bound(query.ngrams) + 0.10 * coverage
+        if self._dense_index is not None:
+            bound += self.dense.weight
+        return bound + self.proximity_weight
+
     def _bm25(self, query_tokens: list[str], doc_tokens: list[str]) -> float:
         if not query_tokens or not doc_tokens or self.avg_doc_len == 0.0:
             return 0.0
         tf = token_counts(doc_tokens)
         score = 0.0
-        n_docs = len(self.doc_tokens)
-        k1 = 1.5
-        b = 0.75
+        n_docs = len(self.chunks)
+        k1 = BM25_K1
+        b = BM25_B
         doc_len = len(doc_tokens)
         for token in query_tokens:
             df = self.df.get(token, 0)
@@ -56,11 +379,250 @@ class HybridRetriever:
             score += idf * ((f * (k1 + 1)) / denom)
         return score
 
-    def search(self, query: str, top_k: int = 5) -> list[RetrievalHit]:
+    def _score_prepared(self, query: _PreparedQuery, top_k: int) -> list[RetrievalHit]:
+        assert self._postings is not None
+        if self._dense_index is not None:
+            return self._score_candidates(query, top_k)
+        n_docs = len(self.chunks)
+        lexical = [0.0] * n_docs
+        overlap = [0] * n_docs
+        with span("retrieval.bm25"):
+            if self.avg_doc_len:
+                # Accumulate per query token in query order so sums match a per-document BM25 loop.
+                for token in query.tokens:
+                    idf = self._idf.get(token)
+                    if idf is None:
+                        continue
+                    for idx, f in self._postings.entries(token):
+                        lexical[idx] += idf * ((f * (BM25_K1 + 1)) / (f + self._length_norms[idx]))
+            for token in query.token_set:
+                for idx in self._postings.docs(token):
+                    overlap[idx] += 1
+
+        semantic = [0.0] * n_docs
+        with span("retrieval.trigram"):
+            q_ngrams = query.ngrams
+            if q_ngrams and top_k > 0:
+                self._trigram_scores(query, lexical, overlap, semantic, top_k)
+
+        with span("retrieval.sort"):
+            q_size = len(query.token_set)
+            scores = [
+                0.60 * lexical[idx] + 0.30 * semantic[idx] + 0.10 * (overlap[idx] / q_size if q_size else 0.0)
+                for idx in range(n_docs)
+            ]
+            # nlargest is documented as equivalent to a stable reverse sort, so ties keep corpus order.
+            ranked = heapq.nlargest(top_k, range(n_docs), key=scores.__getitem__)
+        return [
+            RetrievalHit(
+                chunk=self.chunks[idx],
+                score=scores[idx],
+                lexical_score=lexical[idx],
+                semantic_score=semantic[idx],
+            )
+            for idx in ranked
+        ]
+
+    def _trigram_scores(
+        self, query: _PreparedQuery, lexical: list[float], overlap: list[int], semantic: list[float], top_k: int
+    ) -> None:
+        # MaxScore over the trigram leg: chunks are visited by descending BM25 + overlap score, and
+        # once the top_k full scores beat everything left plus the trigram Jaccard bound, no other
+        # chunk can enter the top_k, so the scan stops. Skipped chunks keep a semantic score of 0,
+        # which only lowers scores already below the cut. The scan falls back to every chunk when
+        # the bound never clears (e.g. queries with no indexed token).
+        q_ngrams = query.ngrams
+        q_len = len(q_ngrams)
+        q_size = len(query.token_set)
+        slack = 0.30 * self._trigram_bound(q_ngrams) + BOUND_MARGIN
+        partial = {idx: 0.60 * lexical[idx] + 0.10 * (count / q_size) for idx, count in enumerate(overlap) if count}
+        best: list[float] = []
+        for idx in sorted(partial, key=partial.__getitem__, reverse=True):
+            if len(best) == top_k and partial[idx] + slack < best[0]:
+                break
+            d_ngrams = self._doc_ngrams[idx]
+            if d_ngrams:
+                inter = len(q_ngrams & d_ngrams)
+                semantic[idx] = inter / (q_len + len(d_ngrams) - inter)
+            score = 0.60 * lexical[idx] + 0.30 * semantic[idx] + 0.10 * (overlap[idx] / q_size)
+            if len(best) < top_k:
+                heapq.heappush(best, score)
+            elif score > best[0]:
+                heapq.heapreplace(best, score)
+        # Chunks sharing no query token score at most the trigram bound.
+        if len(best) == top_k and slack < best[0]:
+            REGISTRY.inc("agentic_rag_retrieval_trigram_pruned_total")
+            return
+        for idx, d_ngrams in enumerate(self._doc_ngrams):
+            if d_ngrams and idx not in partial:
+                inter = len(q_ngrams & d_ngrams)
+                semantic[idx] = inter / (q_len + len(d_ngrams) - inter)
+
+    def _score_candidates(self, query: _PreparedQuery, top_k: int) -> list[RetrievalHit]:
+        # Dense mode: only the ANN hits and the best `candidates` chunks by BM25 and token overlap
+        # are scored, so the trigram leg never scans the corpus (or every chunk sharing a common
+        # token). Candidates get the usual hybrid score plus weight * cosine; chunks outside the
+        # candidate set are not ranked.
+        assert self._postings is not None and self._dense_index is not None
+        lexical: dict[int, float] = {}
+        overlap: dict[int, int] = {}
+        with span("retrieval.bm25"):
+            if self.avg_doc_len:
+                for token in query.tokens:
+                    idf = self._idf.get(token)
+                    if idf is None:
+                        continue
+                    for idx, f in self._postings.entries(token):
+                        lexical[idx] = lexical.get(idx, 0.0) + idf * ((f * (BM25_K1 + 1)) / (f + self._length_norms[idx]))
+            for token in query.token_set:
+                for idx in self._postings.docs(token):
+                    overlap[idx] = overlap.get(idx, 0) + 1
+        with span("retrieval.dense"):
+            dense = self._dense_index.search(query.vector, self.dense.nprobe, self.dense.candidates)
+        q_size = len(query.token_set)
+        leaders = heapq.nlargest(
+            self.dense.candidates,
+            overlap,
+            key=lambda idx: 0.60 * lexical.get(idx, 0.0) + 0.10 * overlap[idx] / q_size,
+        )
+        candidates = sorted(dense.keys() | set(leaders))
+
+        semantic: dict[int, float] = {}
+        with span("retrieval.trigram"):
+            q_ngrams = query.ngrams
+            if q_ngrams:
+                q_len = len(q_ngrams)
+                for idx in candidates:
+                    d_ngrams = self._doc_ngrams[idx]
+                    if d_ngrams:
+                        inter = len(q_ngrams & d_ngrams)
+                        semantic[idx] = inter / (q_len + len(d_ngrams) - inter)
+
+        with span("retrieval.sort"):
+            weight = self.dense.weight
+            scores = {
+                idx: 0.60 * lexical.get(idx, 0.0)
+                + 0.30 * semantic.get(idx, 0.0)
+                + 0.10 * (overlap.get(idx, 0) / q_size if q_size else 0.0)
+                + weight * max(0.0, dense.get(idx, 0.0))
+                for idx in candidates
+            }
+            ranked = heapq.nlargest(top_k, candidates, key=scores.__getitem__)
+        return [
+            RetrievalHit(
+                chunk=self.chunks[idx],
+                score=scores[idx],
+                lexical_score=lexical.get(idx, 0.0),
+                semantic_score=semantic.get(idx, 0.0),
+                dense_score=dense.get(idx, 0.0),
+            )
+            for idx in ranked
+        ]
+
+    def _subset_postings(self, token: str, ids: list[int], allowed: set[int]) -> Iterator[tuple[int, int]]:
+        # Postings of `token` restricted to `ids`, in doc order. Short lists are scanned; when the
+        # list is longer than the subset each id is located through the block skip table instead.
+        df = self._postings.df(token)  # type: ignore[union-attr]
+        if not df:
+            return
+        if df <= len(ids):
+            yield from (entry for entry in self._postings.entries(token) if entry[0] in allowed)
+            return
+        for row, _, f in self._postings.intersect(token, ids):
+            yield ids[row], f
+
+    def _score_subset(self, query: _PreparedQuery, ids: list[int], top_k: int) -> list[RetrievalHit]:
+        # Filtered search: only the allowed chunks are scored, with the same per-document arithmetic
+        # (and corpus-wide idf) as the full scan, so the ranking equals the unfiltered one
+        # restricted to the subset. In dense mode every allowed chunk gets its exact cosine.
+        assert self._postings is not None
+        allowed = set(ids)
+        lexical: dict[int, float] = {}
+        overlap: dict[int, int] = {}
+        with span("retrieval.bm25"):
+            if self.avg_doc_len:
+                for token in query.tokens:
+                    idf = self._idf.get(token)
+                    if idf is None:
+                        continue
+                    for idx, f in self._subset_postings(token, ids, allowed):
+                        lexical[idx] = lexical.get(idx, 0.0) + idf * ((f * (BM25_K1 + 1)) / (f + self._length_norms[idx]))
+            for token in query.token_set:
+                for idx, _ in self._subset_postings(token, ids, allowed):
+                    overlap[idx] = overlap.get(idx, 0) + 1
+
+        semantic: dict[int, float] = {}
+        with span("retrieval.trigram"):
+            q_ngrams = query.ngrams
+            if q_ngrams:
+                q_len = len(q_ngrams)
+                for idx in ids:
+                    d_ngrams = self._doc_ngrams[idx]
+                    if d_ngrams:
+                        inter = len(q_ngrams & d_ngrams)
+                        semantic[idx] = inter / (q_len + len(d_ngrams) - inter)
+
+        dense: dict[int, float] = {}
+        if self._dense_index is not None:
+            with span("retrieval.dense"):
+                dense = self._dense_index.similarities(query.vector, ids)
+
+        with span("retrieval.sort"):
+            q_size = len(query.token_set)
+            scores = {
+                idx: 0.60 * lexical.get(idx, 0.0)
+                + 0.30 * semantic.get(idx, 0.0)
+                + 0.10 * (overlap.get(idx, 0) / q_size if q_size else 0.0)
+                for idx in ids
+            }
+            if dense:
+                weight = self.dense.weight
+                for idx in ids:
+                    scores[idx] += weight * max(0.0, dense[idx])
+            ranked = heapq.nlargest(top_k, ids, key=scores.__getitem__)
+        return [
+            RetrievalHit(
+                chunk=self.chunks[idx],
+                score=scores[idx],
+                lexical_score=lexical.get(idx, 0.0),
+                semantic_score=semantic.get(idx, 0.0),
+                dense_score=dense.get(idx, 0.0),
+            )
+            for idx in ranked
+        ]
+
+    def _rank(self, query: str, prepared: _PreparedQuery, ids: list[int] | None, top_k: int) -> list[RetrievalHit]:
+        depth = max(top_k, PROXIMITY_DEPTH) if self.proximity_weight > 0 else top_k
+        # Quoted phrases restrict scoring to the chunks that contain them.
+        subset = ids
+        phrases = query_phrases(query) if '"' in query else []
+        if phrases:
+            with span("retrieval.phrase"):
+                subset = self._phrase_ids(phrases, ids)
+        if subset is None:
+            hits = self._score_prepared(prepared, depth)
+        else:
+            hits = self._score_subset(prepared, subset, depth)
+        if self.proximity_weight > 0:
+            with span("retrieval.proximity"):
+                hits = self._apply_proximity(prepared.tokens, hits, top_k)
+        return hits
+
+    def search_exact(self, query: str, top_k: int = 5, filters: ChunkFilter | None = None) -> list[RetrievalHit]:
+        # Reference per-document scan with no caches; agentic_rag.evaluation checks faster paths against it.
         q_tokens = tokenize(query)
         q_ngrams = char_ngrams(query, n=3)
+        phrases = query_phrases(query)
         hits: list[RetrievalHit] = []
         for chunk, doc_toks in zip(self.chunks, self.doc_tokens):
+            if filters and not filters.matches(chunk):
+                continue
+            if phrases:
+                positions: dict[str, list[int]] = {}
+                for pos, token in word_positions(chunk.text):
+                    positions.setdefault(token, []).append(pos)
+                if not all(phrase_starts(terms, positions) for terms in phrases):
+                    continue
             lexical = self._bm25(q_tokens, doc_toks)
             semantic = jaccard(q_ngrams, char_ngrams(chunk.text, n=3))
             coverage = 0.0
@@ -79,3 +641,50 @@ class HybridRetriever:
         hits.sort(key=lambda h: h.score, reverse=True)
         return hits[:top_k]
 
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        filters: ChunkFilter | None = None,
+        min_top_score: Callable[[str], float | None] | None = None,
+    ) -> list[RetrievalHit]:
+        return next(self.search_batch([query], top_k=top_k, filters=filters, min_top_score=min_top_score))
+
+    def search_batch(
+        self,
+        queries: Iterable[str],
+        top_k: int = 5,
+        filters: ChunkFilter | None = None,
+        min_top_score: Callable[[str], float | None] | None = None,
+    ) -> Iterator[list[RetrievalHit]]:
+        # min_top_score(query) gives a score the top hit must reach to be of any use; queries whose
+        # upper bound proves no chunk can reach it yield [] without scoring a single chunk.
+        self._ensure_scoring_cache()
+        ids = None
+        if filters:
+            with span("retrieval.filter"):
+                ids = self.filter_ids(filters)
+        memo: dict[str, list[RetrievalHit]] = {}
+        for query in queries:
+            if query not in memo:
+                with span("retrieval"):
+                    with span("retrieval.tokenize"):
+                        tokens = tokenize(query)
+                        ngrams = char_ngrams(query, n=3)
+                        prepared = _PreparedQuery(
+                            tokens=tokens,
+                            token_set=set(tokens),
+                            ngrams=ngrams,
+                            vector=self._hasher.embed(tokens, ngrams) if self._hasher is not None else None,
+                        )
+                    threshold = min_top_score(query) if min_top_score is not None else None
+                    unreachable = False
+                    if threshold is not None:
+                        with span("retrieval.bound"):
+                            unreachable = self._score_upper_bound(prepared) + BOUND_MARGIN < threshold
+                    if unreachable:
+                        REGISTRY.inc("agentic_rag_retrieval_bound_skips_total")
+                        memo[query] = []
+                    else:
+                        memo[query] = self._rank(query, prepared, ids, top_k)
+            yield memo[query]
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+CATALOG_FILE = "catalog.sqlite3"
+SORT_COLUMNS = {"updated": "updated_ns", "events": "events", "bytes": "bytes", "id": "session_id"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    updated_ns INTEGER NOT NULL,
+    events INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_ns, session_id);
+CREATE INDEX IF NOT EXISTS sessions_events ON sessions (events, session_id);
+CREATE INDEX IF NOT EXISTS sessions_bytes ON sessions (bytes, session_id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+class SessionCatalog:
+    # One row per session, upserted on every history write so listing is an indexed range
+    # query instead of a directory scan. Pages use keyset cursors "<sort value>:<session id>".
+    def __init__(self, sessions_dir: Path):
+        self.sessions_dir = Path(sessions_dir)
+        self.sessions_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.sessions_dir / CATALOG_FILE), timeout=5.0, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._bootstrap()
+
+    def _bootstrap(self) -> None:
+        # Sessions written before the catalog existed are scanned once, then never again.
+        with self._lock, self._conn:
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = 'bootstrapped'").fetchone():
+                return
+            rows = []
+            for path in self.sessions_dir.glob("*.jsonl"):
+                st = path.stat()
+                with path.open("rb") as f:
+                    events = sum(1 for line in f if line.strip())
+                rows.append((path.stem, st.st_mtime_ns, events, st.st_size))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO sessions (session_id, updated_ns, events, bytes) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('bootstrapped', ?)", (str(time.time_ns()),))
+
+    def record(self, updates: dict[str, tuple[int, int]]) -> None:
+        # updates: session id -> (events added, bytes added); one transaction per history batch.
+        now = time.time_ns()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO sessions (session_id, updated_ns, events, bytes) VALUES (?, ?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    updated_ns = excluded.updated_ns,
+                    events = events + excluded.events,
+                    bytes = bytes + excluded.bytes
+                """,
+                [(sid, now, events, size) for sid, (events, size) in updates.items()],
+            )
+
+    def page(self, limit: int = 100, cursor: str | None = None, sort: str = "updated", descending: bool = True) -> dict:
+        column = SORT_COLUMNS.get(sort)
+        if column is None:
+            raise ValueError(f"sort must be one of {', '.join(SORT_COLUMNS)}")
+        op, direction = ("<", "DESC") if descending else (">", "ASC")
+        params: list = []
+        where = ""
+        if cursor:
+            value, _, sid = cursor.partition(":")
+            key = value if column == "session_id" else int(value)
+            where = f"WHERE ({column}, session_id) {op} (?, ?)"
+            params += [key, sid]
+        params.append(max(1, limit))
+        query = (
+            f"SELECT session_id, updated_ns, events, bytes FROM sessions {where} "
+            f"ORDER BY {column} {direction}, session_id {direction} LIMIT ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        items = [
+            {"session_id": sid, "updated_ns": updated, "events": events, "bytes": size}
+            for sid, updated, events, size in rows
+        ]
+        next_cursor = None
+        if len(rows) == max(1, limit):
+            last = items[-1]
+            next_cursor = f"{last[column]}:{last['session_id']}"
+        return {"items": items, "next_cursor": next_cursor}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_catalogs: dict[str, SessionCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def catalog_for(sessions_dir: Path) -> SessionCatalog:
+    key = os.path.abspath(sessions_dir)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = SessionCatalog(Path(sessions_dir))
+        return catalog
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+STAGE_METRIC = "agentic_rag_stage_seconds"
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    duration: float = 0.0
+    children: list["Span"] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "ms": round(self.duration * 1000, 3),
+            "children": [c.to_dict() for c in self.children],
+        }
+
+
+@dataclass
+class _Histogram:
+    counts: list[int]
+    total: float = 0.0
+    count: int = 0
+
+
+class MetricsRegistry:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms: dict[str, dict[LabelKey, _Histogram]] = {}
+        self._counters: dict[str, dict[LabelKey, float]] = {}
+        self._gauges: dict[str, dict[LabelKey, float]] = {}
+
+    @staticmethod
+    def _key(labels: dict[str, str] | None) -> LabelKey:
+        return tuple(sorted((labels or {}).items()))
+
+    def observe(self, name: str, value: float, labels: dict[str, str] | None = None) -> None:
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = _Histogram(counts=[0] * (len(self.buckets) + 1))
+            hist.counts[slot] += 1
+            hist.total += value
+            hist.count += 1
+
+    def inc(self, name: str, value: float = 1.0, labels: dict[str, str] | None = None) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, labels: dict[str, str] | None = None) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = float(value)
+
+    def render_prometheus(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_labels(key)} {_number(value)}")
+            for name in sorted(self._gauges):
+                lines.append(f"# TYPE {name} gauge")
+                for key, value in sorted(self._gauges[name].items()):
+                    lines.append(f"{name}{_labels(key)} {_number(value)}")
+            for name in sorted(self._histograms):
+                lines.append(f"# TYPE {name} histogram")
+                for key, hist in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, hist.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(key, le=repr(bound))} {cumulative}")
+                    lines.append(f"{name}_bucket{_labels(key, le='+Inf')} {hist.count}")
+                    lines.append(f"{name}_sum{_labels(key)} {_number(hist.total)}")
+                    lines.append(f"{name}_count{_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(key: LabelKey, le: str | None = None) -> str:
+    pairs = list(key) + ([("le", le)] if le is not None else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+REGISTRY = MetricsRegistry()
+_current_span: ContextVar[Span | None] = ContextVar("agentic_rag_current_span", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[Span]:
+    # Spans always feed the stage histogram; the tree is only kept when an outer span holds it.
+    # Do not yield from a generator while a span is open: generators share the caller's context.
+    parent = _current_span.get()
+    current = Span(name=name, start=time.perf_counter())
+    if parent is not None:
+        parent.children.append(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    finally:
+        current.duration = time.perf_counter() - current.start
+        _current_span.reset(token)
+        REGISTRY.observe(STAGE_METRIC, current.duration, {"stage": name})
+
+
+def format_span_tree(root: Span) -> str:
+    lines: list[str] = []
+    _format_group(root.name, [root], 0, lines)
+    return "\n".join(lines)
+
+
+def _format_group(name: str, spans: list[Span], depth: int, lines: list[str]) -> None:
+    # Sibling spans with the same name (e.g. one per batch question) collapse into one line.
+    total_ms = sum(s.duration for s in spans) * 1000
+    label = f"{name} {total_ms:.3f}ms"
+    if len(spans) > 1:
+        label += f" (x{len(spans)}, avg {total_ms / len(spans):.3f}ms)"
+    lines.append("  " * depth + label)
+    grouped: dict[str, list[Span]] = {}
+    for s in spans:
+        for child in s.children:
+            grouped.setdefault(child.name, []).append(child)
+    for child_name, children in grouped.items():
+        _format_group(child_name, children, depth + 1, lines)
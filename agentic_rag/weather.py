@@ -1,12 +1,26 @@
 from __future__ import annotations
 
 import datetime as dt
-import json
-import statistics
+import math
+import os
 import urllib.parse
-import urllib.request
+from array import array
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
+from agentic_rag.http_client import HttpClient
+from agentic_rag.tracing import REGISTRY, span
+from agentic_rag.weather_cache import WeatherCache, cache_path_for, day_range, missing_runs, weather_cache
+
+
+ARCHIVE_HOST = "https://archive-api.open-meteo.com"
+FORECAST_HOST = "https://api.open-meteo.com"
+DAILY_VARIABLE = "temperature_2m_mean"
+ARCHIVE_SETTLE_DAYS = 7
+DEFAULT_WINDOW_DAYS = 366
+DEFAULT_BATCH_WORKERS = 8
+
 
 @dataclass
 class WeatherAnalytics:
@@ -32,56 +46,133 @@ class WeatherAnalytics:
         }
 
 
-def _safe_get_json(url: str, timeout_sec: int = 12) -> dict:
-    req = urllib.request.Request(url, headers={"User-Agent": "agentic-rag-bot/1.0"})
-    with urllib.request.urlopen(req, timeout=timeout_sec) as resp:
-        payload = resp.read().decode("utf-8")
-    return json.loads(payload)
+@dataclass
+class WeatherQuery:
+    latitude: float
+    longitude: float
+    start_date: str
+    end_date: str
 
+    def __post_init__(self) -> None:
+        dt.date.fromisoformat(self.start_date)
+        dt.date.fromisoformat(self.end_date)
 
-def analyze_open_meteo_timeseries(
-    latitude: float,
-    longitude: float,
-    start_date: str,
-    end_date: str,
-) -> WeatherAnalytics:
-    today = dt.date.today()
-    end = dt.date.fromisoformat(end_date)
-    endpoint = "https://archive-api.open-meteo.com/v1/archive"
-    if end > today:
-        endpoint = "https://api.open-meteo.com/v1/forecast"
 
+@dataclass
+class RunningStats:
+    # Welford's single-pass mean/variance; numerically stable without keeping the values.
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def pstdev(self) -> float:
+        return math.sqrt(self.m2 / self.count) if self.count > 1 else 0.0
+
+
+_client = HttpClient()
+_base_url: str | None = os.environ.get("OPEN_METEO_BASE_URL") or None
+
+
+def configure_http(client: HttpClient | None = None, base_url: str | None = None) -> None:
+    # base_url (e.g. a local stand-in server) replaces both Open-Meteo hosts; paths are kept.
+    global _client, _base_url
+    if client is not None:
+        _client = client
+    _base_url = base_url.rstrip("/") if base_url else None
+
+
+def _fetch_daily(latitude: float, longitude: float, start: str, end: str) -> dict[str, float | None]:
+    endpoint = f"{_base_url or ARCHIVE_HOST}/v1/archive"
+    if dt.date.fromisoformat(end) > dt.date.today():
+        endpoint = f"{_base_url or FORECAST_HOST}/v1/forecast"
     params = {
         "latitude": str(latitude),
         "longitude": str(longitude),
-        "start_date": start_date,
-        "end_date": end_date,
+        "start_date": start,
+        "end_date": end,
         "timezone": "auto",
-        "daily": "temperature_2m_mean",
+        "daily": DAILY_VARIABLE,
     }
-    url = f"{endpoint}?{urllib.parse.urlencode(params)}"
-    try:
-        data = _safe_get_json(url)
-    except Exception as exc:
-        return WeatherAnalytics(
-            location=f"{latitude},{longitude}",
-            start_date=start_date,
-            end_date=end_date,
-            missing_days=0,
-            mean_temperature=0.0,
-            volatility=0.0,
-            anomaly_days=[],
-            explanation=f"Open-Meteo request failed: {exc.__class__.__name__}.",
-        )
-
+    data = _client.get_json(f"{endpoint}?{urllib.parse.urlencode(params)}")
     daily = data.get("daily", {})
     times = daily.get("time", []) or []
-    temps = daily.get("temperature_2m_mean", []) or []
-    pairs = [(d, t) for d, t in zip(times, temps)]
-    valid = [(d, t) for d, t in pairs if isinstance(t, (int, float))]
-    missing = len(pairs) - len(valid)
+    temps = daily.get(DAILY_VARIABLE, []) or []
+    return {d: (t if isinstance(t, (int, float)) else None) for d, t in zip(times, temps)}
+
 
-    if not valid:
+def _collect_daily(
+    latitude: float,
+    longitude: float,
+    start_date: str,
+    end_date: str,
+    use_cache: bool,
+    cache: WeatherCache | None,
+) -> dict[str, float | None]:
+    days = day_range(dt.date.fromisoformat(start_date), dt.date.fromisoformat(end_date))
+    values: dict[str, float | None] = {}
+    if use_cache:
+        cache = cache or weather_cache(cache_path_for(_base_url))
+        values = cache.lookup(latitude, longitude, DAILY_VARIABLE, start_date, end_date)
+        REGISTRY.inc("agentic_rag_weather_cache_days_total", len(values), labels={"result": "hit"})
+        REGISTRY.inc("agentic_rag_weather_cache_days_total", len(days) - len(values), labels={"result": "miss"})
+    # Only the uncached gaps are requested; archive values older than the reanalysis delay
+    # are final and cached forever, everything else expires after the cache TTL.
+    today = dt.date.today()
+    settled = (today - dt.timedelta(days=ARCHIVE_SETTLE_DAYS)).isoformat()
+    for run_start, run_end in missing_runs(days, values):
+        with span("weather.fetch"):
+            fetched = _fetch_daily(latitude, longitude, run_start, run_end)
+        if use_cache:
+            archived = dt.date.fromisoformat(run_end) <= today  # same rule _fetch_daily uses
+            cache.store(latitude, longitude, DAILY_VARIABLE, fetched, settled if archived else None)
+        values.update(fetched)
+    return values
+
+
+def _failed(latitude: float, longitude: float, start_date: str, end_date: str, exc: Exception) -> WeatherAnalytics:
+    return WeatherAnalytics(
+        location=f"{latitude},{longitude}",
+        start_date=start_date,
+        end_date=end_date,
+        missing_days=0,
+        mean_temperature=0.0,
+        volatility=0.0,
+        anomaly_days=[],
+        explanation=f"Open-Meteo request failed: {exc.__class__.__name__}.",
+    )
+
+
+def _summarize(
+    latitude: float,
+    longitude: float,
+    start_date: str,
+    end_date: str,
+    values: dict[str, float | None],
+) -> WeatherAnalytics:
+    # One pass accumulates the statistics; anomalies then rescan a compact array of the valid readings.
+    days = day_range(dt.date.fromisoformat(start_date), dt.date.fromisoformat(end_date))
+    stats = RunningStats()
+    readings = array("d")
+    positions = array("l")
+    missing = 0
+    for pos, day in enumerate(days):
+        if day not in values:
+            continue
+        temp = values[day]
+        if temp is None:
+            missing += 1
+            continue
+        stats.add(temp)
+        readings.append(temp)
+        positions.append(pos)
+
+    if not stats.count:
         return WeatherAnalytics(
             location=f"{latitude},{longitude}",
             start_date=start_date,
@@ -93,18 +184,17 @@ def analyze_open_meteo_timeseries(
             explanation="No valid temperature records were returned by Open-Meteo for this range.",
         )
 
-    temp_values = [t for _, t in valid]
-    mean_t = statistics.mean(temp_values)
-    vol = statistics.pstdev(temp_values) if len(temp_values) > 1 else 0.0
+    mean_t = stats.mean
+    vol = stats.pstdev()
     anomaly_days: list[str] = []
     if vol > 0:
-        for day, temp in valid:
+        for pos, temp in zip(positions, readings):
             z = abs((temp - mean_t) / vol)
             if z >= 2.0:
-                anomaly_days.append(day)
+                anomaly_days.append(days[pos])
 
     explanation = (
-        f"Analyzed {len(valid)} daily observations. "
+        f"Analyzed {stats.count} daily observations. "
         f"Average temperature was {mean_t:.2f}C with volatility {vol:.2f}. "
         f"Missing days: {missing}. "
         f"Anomaly days (|z|>=2): {', '.join(anomaly_days) if anomaly_days else 'none'}."
@@ -119,3 +209,62 @@ def analyze_open_meteo_timeseries(
         anomaly_days=anomaly_days,
         explanation=explanation,
     )
+
+
+def analyze_open_meteo_timeseries(
+    latitude: float,
+    longitude: float,
+    start_date: str,
+    end_date: str,
+    use_cache: bool = True,
+    cache: WeatherCache | None = None,
+) -> WeatherAnalytics:
+    WeatherQuery(latitude, longitude, start_date, end_date)  # validates the dates
+    try:
+        values = _collect_daily(latitude, longitude, start_date, end_date, use_cache, cache)
+    except Exception as exc:
+        return _failed(latitude, longitude, start_date, end_date, exc)
+    return _summarize(latitude, longitude, start_date, end_date, values)
+
+
+def _windows(start_date: str, end_date: str, window_days: int) -> list[tuple[str, str]]:
+    start = dt.date.fromisoformat(start_date)
+    end = dt.date.fromisoformat(end_date)
+    out = []
+    while start <= end:
+        stop = min(end, start + dt.timedelta(days=max(1, window_days) - 1))
+        out.append((start.isoformat(), stop.isoformat()))
+        start = stop + dt.timedelta(days=1)
+    return out
+
+
+def analyze_weather_batch(
+    queries: Iterable[WeatherQuery],
+    max_workers: int = DEFAULT_BATCH_WORKERS,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    use_cache: bool = True,
+    cache: WeatherCache | None = None,
+) -> Iterator[WeatherAnalytics]:
+    # Long ranges are split into windows and every (location, window) fetch runs on a bounded
+    # thread pool sharing the pooled HTTP client; results are yielded in input order as each
+    # location completes.
+    queries = list(queries)
+    if use_cache and cache is None:
+        cache = weather_cache(cache_path_for(_base_url))
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        pending = [
+            [
+                pool.submit(_collect_daily, q.latitude, q.longitude, ws, we, use_cache, cache)
+                for ws, we in _windows(q.start_date, q.end_date, window_days)
+            ]
+            for q in queries
+        ]
+        for query, futures in zip(queries, pending):
+            values: dict[str, float | None] = {}
+            try:
+                for future in futures:
+                    values.update(future.result())
+            except Exception as exc:
+                yield _failed(query.latitude, query.longitude, query.start_date, query.end_date, exc)
+                continue
+            yield _summarize(query.latitude, query.longitude, query.start_date, query.end_date, values)
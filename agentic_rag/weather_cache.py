@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+CACHE_PATH = Path("artifacts/weather/cache.sqlite3")
+DEFAULT_FORECAST_TTL = 3 * 3600.0
+COORD_DECIMALS = 2  # ~1 km, well below the Open-Meteo grid spacing
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily (
+    lat_key INTEGER NOT NULL,
+    lon_key INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    variable TEXT NOT NULL,
+    value REAL,
+    expires_at REAL,
+    PRIMARY KEY (lat_key, lon_key, variable, day)
+);
+"""
+
+
+def cache_path_for(base_url: str | None) -> Path:
+    # A stand-in server gets its own cache file so synthetic data never mixes with real data.
+    if not base_url:
+        return CACHE_PATH
+    digest = hashlib.sha1(base_url.rstrip("/").encode("utf-8")).hexdigest()[:10]
+    return CACHE_PATH.with_name(f"cache-{digest}.sqlite3")
+
+
+def _coord_key(value: float) -> int:
+    return round(value * 10**COORD_DECIMALS)
+
+
+def day_range(start: dt.date, end: dt.date) -> list[str]:
+    return [dt.date.fromordinal(o).isoformat() for o in range(start.toordinal(), end.toordinal() + 1)]
+
+
+def missing_runs(days: list[str], cached: dict) -> list[tuple[str, str]]:
+    # Contiguous (start, end) spans of days absent from the cache, so each gap is one request.
+    runs: list[tuple[str, str]] = []
+    run_start = prev = None
+    for day in days:
+        if day in cached:
+            if run_start is not None:
+                runs.append((run_start, prev))
+                run_start = None
+            continue
+        if run_start is None:
+            run_start = day
+        prev = day
+    if run_start is not None:
+        runs.append((run_start, prev))
+    return runs
+
+
+class WeatherCache:
+    # Daily values keyed by rounded coordinates and day. Settled archive days never expire
+    # (expires_at NULL); forecast days and archive days still null upstream expire after the TTL.
+    def __init__(self, path: Path | str = CACHE_PATH, forecast_ttl: float = DEFAULT_FORECAST_TTL):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.forecast_ttl = forecast_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def lookup(self, latitude: float, longitude: float, variable: str, start: str, end: str) -> dict[str, float | None]:
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT day, value FROM daily
+                WHERE lat_key = ? AND lon_key = ? AND variable = ? AND day BETWEEN ? AND ?
+                  AND (expires_at IS NULL OR expires_at > ?)
+                """,
+                (_coord_key(latitude), _coord_key(longitude), variable, start, end, time.time()),
+            ).fetchall()
+        return dict(rows)
+
+    def store(
+        self,
+        latitude: float,
+        longitude: float,
+        variable: str,
+        values: dict[str, float | None],
+        permanent_before: str | None,
+    ) -> None:
+        # Days earlier than permanent_before with a real value are kept forever.
+        expires = time.time() + self.forecast_ttl
+        lat_key, lon_key = _coord_key(latitude), _coord_key(longitude)
+        rows = [
+            (
+                lat_key,
+                lon_key,
+                day,
+                variable,
+                value,
+                None if permanent_before and day < permanent_before and value is not None else expires,
+            )
+            for day, value in values.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO daily (lat_key, lon_key, day, variable, value, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def purge_expired(self) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM daily WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            ).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_caches: dict[str, WeatherCache] = {}
+_caches_lock = threading.Lock()
+
+
+def weather_cache(path: Path | str = CACHE_PATH, forecast_ttl: float | None = None) -> WeatherCache:
+    key = os.path.abspath(path)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = WeatherCache(path, DEFAULT_FORECAST_TTL)
+        if forecast_ttl is not None:
+            cache.forecast_ttl = forecast_ttl
+        return cache
@@ -1,27 +1,89 @@
 from __future__ import annotations
 
 import json
-import threading
+import math
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
 from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from urllib.parse import parse_qs, urlparse
 
-from agentic_rag.history import append_session_event, list_sessions, read_session_history
+from agentic_rag.admission import AdmissionPool, Overloaded
+from agentic_rag.collection import (
+    COLLECTIONS_DIR,
+    DEFAULT_COLLECTION,
+    DEFAULT_MAX_BYTES,
+    DEFAULT_MAX_COLLECTIONS,
+    Collection,
+    CollectionLimit,
+    CollectionManager,
+    UnknownCollection,
+)
+from agentic_rag.history import (
+    append_session_event,
+    list_session_page,
+    read_session_page,
+    start_history_writer,
+    start_rotation_sweeper,
+    stop_history_writer,
+)
+from agentic_rag.history_archive import RotationPolicy
 from agentic_rag.memory import select_high_signal_memory, write_memories
-from agentic_rag.pipeline import RAGPipeline
+from agentic_rag.models import ChunkFilter
+from agentic_rag.profiling import PROFILE_HEADER, Profiler, list_profiles
+from agentic_rag.qa import REFUSAL_ANSWER, format_answer
+from agentic_rag.tracing import REGISTRY
 
 
 INDEX_PATH = "artifacts/index.json"
 UPLOAD_DIR = Path("artifacts/uploads")
+MAX_BATCH_QUESTIONS = 5000
+TIMEOUT_HEADER = "X-Request-Timeout-Ms"
+# Metric labels only use known routes so arbitrary 404 paths can't grow the series count.
+ROUTES = {
+    "/",
+    "/metrics",
+    "/api/sessions",
+    "/api/history",
+    "/api/upload",
+    "/api/ask",
+    "/api/ask/stream",
+    "/api/ask_batch",
+    "/api/memory",
+    "/api/profiles",
+    "/api/collections",
+}
 WEB_ROOT = Path(__file__).parent / "web"
 
 
+def default_pools(
+    ask_concurrency: int = 4,
+    ask_queue: int = 32,
+    upload_concurrency: int = 1,
+    upload_queue: int = 4,
+    timeout: float = 10.0,
+) -> dict[str, AdmissionPool]:
+    return {
+        "ask": AdmissionPool("ask", ask_concurrency, ask_queue, timeout),
+        "upload": AdmissionPool("upload", upload_concurrency, upload_queue, timeout),
+    }
+
+
 class AppState:
-    def __init__(self, index_path: str):
+    def __init__(
+        self,
+        index_path: str,
+        profiler: Profiler | None = None,
+        pools: dict[str, AdmissionPool] | None = None,
+        collections: CollectionManager | None = None,
+    ):
         self.index_path = index_path
-        self.pipeline = RAGPipeline.load(index_path)
-        self.lock = threading.Lock()
+        self.collections = collections or CollectionManager(index_path)
+        self.profiler = profiler or Profiler()
+        self.pools = pools or default_pools()
 
 
 def _json_response(handler: BaseHTTPRequestHandler, data: dict, code: int = 200) -> None:
@@ -33,37 +95,232 @@ def _json_response(handler: BaseHTTPRequestHandler, data: dict, code: int = 200)
     handler.wfile.write(payload)
 
 
+def _sse_event(handler: BaseHTTPRequestHandler, event: str, data: object) -> None:
+    payload = f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+    handler.wfile.write(payload)
+    handler.wfile.flush()
+
+
 def _read_json(handler: BaseHTTPRequestHandler) -> dict:
     length = int(handler.headers.get("Content-Length", "0"))
     raw = handler.rfile.read(length).decode("utf-8") if length > 0 else "{}"
     return json.loads(raw or "{}")
 
 
+class InvalidTimeout(ValueError):
+    pass
+
+
+def _request_timeout(handler: BaseHTTPRequestHandler, body: dict) -> float | None:
+    # Client timeouts may only shorten the pool deadline (AdmissionPool.deadline_for clamps them).
+    raw = body.get("timeout_ms", handler.headers.get(TIMEOUT_HEADER))
+    if raw is None:
+        return None
+    try:
+        timeout_ms = float(raw)
+    except (TypeError, ValueError):
+        raise InvalidTimeout(f"timeout_ms must be a number, got {raw!r}") from None
+    if not math.isfinite(timeout_ms) or timeout_ms <= 0:
+        raise InvalidTimeout("timeout_ms must be a positive, finite number of milliseconds")
+    return timeout_ms / 1000.0
+
+
 def _safe_name(filename: str) -> str:
     raw = Path(filename).name
     keep = "".join(ch for ch in raw if ch.isalnum() or ch in ("-", "_", ".", " "))
     return keep.strip() or "uploaded.txt"
 
 
-def _write_uploaded_files(files: list[dict]) -> list[str]:
-    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+def _write_uploaded_files(files: list[dict], collection: str = DEFAULT_COLLECTION) -> list[str]:
+    upload_dir = UPLOAD_DIR if collection == DEFAULT_COLLECTION else UPLOAD_DIR / collection
+    upload_dir.mkdir(parents=True, exist_ok=True)
     saved: list[str] = []
     for item in files:
         name = _safe_name(str(item.get("name", "uploaded.txt")))
         content = str(item.get("content", ""))
-        out = UPLOAD_DIR / name
+        out = upload_dir / name
         out.write_text(content, encoding="utf-8")
         saved.append(str(out))
     return saved
 
 
+def _upload_batch_id() -> str:
+    return f"upload-{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{os.urandom(2).hex()}"
+
+
+def _batch_questions(items: list) -> list[tuple[object, str]]:
+    questions: list[tuple[object, str]] = []
+    for i, item in enumerate(items):
+        if isinstance(item, dict):
+            record_id = item.get("id", i)
+            question = str(item.get("question", "")).strip()
+        else:
+            record_id = i
+            question = str(item).strip()
+        if question:
+            questions.append((record_id, question))
+    return questions
+
+
+def _render_metrics(state: AppState) -> bytes:
+    loaded = state.collections.loaded()
+    REGISTRY.set_gauge("agentic_rag_collections_loaded", len(loaded))
+    for collection in loaded:
+        labels = {"collection": collection.name}
+        pipeline = collection.pipeline
+        REGISTRY.set_gauge("agentic_rag_index_chunks", len(pipeline.chunks), labels)
+        REGISTRY.set_gauge("agentic_rag_index_terms", len(pipeline.retriever.df), labels)
+        REGISTRY.set_gauge("agentic_rag_collection_estimated_bytes", collection.estimated_bytes, labels)
+        try:
+            index_bytes = os.path.getsize(collection.index_path)
+        except OSError:
+            index_bytes = 0
+        REGISTRY.set_gauge("agentic_rag_index_bytes", index_bytes, labels)
+    return REGISTRY.render_prometheus().encode("utf-8")
+
+
 def make_handler(state: AppState):
     class Handler(BaseHTTPRequestHandler):
         def log_message(self, fmt: str, *args) -> None:
             return
 
+        def send_response(self, code, message=None) -> None:
+            self._status = int(code)
+            super().send_response(code, message)
+
+        def _maybe_profiled(self, label: str, collection: Collection, meta: dict, fn, *args):
+            profiler = state.profiler
+            if not profiler.should_profile(self.headers.get(profiler.header)):
+                return fn(*args)
+            meta = {**meta, "collection": collection.name, "index_version": collection.pipeline.index_version}
+            result, _ = profiler.profile_call(label, meta, fn, *args)
+            return result
+
+        @contextmanager
+        def _admitted(self, pool_name: str, body: dict) -> Iterator[float]:
+            pool = state.pools[pool_name]
+            deadline = pool.deadline_for(_request_timeout(self, body))
+            with pool.admit(deadline):
+                yield deadline
+
+        @contextmanager
+        def _pipeline_lock(self, pool_name: str, collection: Collection, deadline: float) -> Iterator[None]:
+            state.pools[pool_name].acquire_lock(collection.lock, deadline)
+            try:
+                yield
+            finally:
+                collection.lock.release()
+
+        def _collection_name(self, body: dict) -> str | None:
+            params = parse_qs(urlparse(self.path).query)
+            name = str(body.get("collection") or params.get("collection", [DEFAULT_COLLECTION])[0]).strip()
+            try:
+                state.collections.index_path(name or DEFAULT_COLLECTION)
+            except ValueError as exc:
+                _json_response(self, {"error": str(exc)}, code=400)
+                return None
+            return name or DEFAULT_COLLECTION
+
+        def _chunk_filter(self, body: dict) -> ChunkFilter | None:
+            raw = body.get("filters")
+            try:
+                if raw is not None and not isinstance(raw, dict):
+                    raise ValueError("filters must be an object with sources/sections/batches")
+                return ChunkFilter.from_dict(raw)
+            except ValueError as exc:
+                _json_response(self, {"error": str(exc)}, code=400)
+                return None
+
+        def _overloaded(self, exc: Overloaded) -> None:
+            payload = json.dumps({"error": str(exc), "reason": exc.reason}).encode("utf-8")
+            self.send_response(exc.status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Retry-After", str(exc.retry_after))
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _stream_answer(self, session_id: str, question: str, hits, stream) -> None:
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            try:
+                _sse_event(
+                    self,
+                    "hits",
+                    [
+                        {
+                            "source": h.chunk.source,
+                            "locator": h.chunk.locator,
+                            "score": round(h.score, 4),
+                            "lexical_score": round(h.lexical_score, 4),
+                            "semantic_score": round(h.semantic_score, 4),
+                        }
+                        for h in hits
+                    ],
+                )
+                _sse_event(self, "citations", [c.to_dict() for c in stream.citations])
+                bullets: list[str] = []
+                for bullet in stream.bullets:
+                    bullets.append(bullet)
+                    _sse_event(self, "bullet", bullet)
+                answer = REFUSAL_ANSWER if stream.refused else format_answer(bullets)
+                payload = {
+                    "question": question,
+                    "answer": answer,
+                    "citations": [c.to_dict() for c in stream.citations],
+                }
+                _sse_event(self, "done", payload)
+            except (BrokenPipeError, ConnectionResetError):
+                return  # client went away; nothing to record
+            append_session_event(session_id, "qa", payload)
+
+        def _record_request(self, method: str, started: float) -> None:
+            route = urlparse(self.path).path
+            if route not in ROUTES:
+                route = "other"
+            labels = {"method": method, "route": route, "status": str(getattr(self, "_status", 0))}
+            REGISTRY.inc("agentic_rag_http_requests_total", labels=labels)
+            REGISTRY.observe(
+                "agentic_rag_http_request_seconds",
+                time.perf_counter() - started,
+                {"method": method, "route": route},
+            )
+
         def do_GET(self) -> None:  # noqa: N802
+            started = time.perf_counter()
+            try:
+                self._handle_get()
+            finally:
+                self._record_request("GET", started)
+
+        def do_POST(self) -> None:  # noqa: N802
+            started = time.perf_counter()
+            try:
+                self._handle_post()
+            except Overloaded as exc:
+                self._overloaded(exc)
+            except UnknownCollection as exc:
+                _json_response(self, {"error": f"unknown collection: {exc}"}, code=404)
+            except InvalidTimeout as exc:
+                _json_response(self, {"error": str(exc)}, code=400)
+            except CollectionLimit as exc:
+                _json_response(self, {"error": str(exc)}, code=409)
+            finally:
+                self._record_request("POST", started)
+
+        def _handle_get(self) -> None:
             parsed = urlparse(self.path)
+            if parsed.path == "/metrics":
+                body = _render_metrics(state)
+                self.send_response(HTTPStatus.OK)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
             if parsed.path == "/":
                 html = (WEB_ROOT / "index.html").read_bytes()
                 self.send_response(HTTPStatus.OK)
@@ -72,18 +329,47 @@ def make_handler(state: AppState):
                 self.end_headers()
                 self.wfile.write(html)
                 return
+            if parsed.path == "/api/collections":
+                _json_response(self, {"collections": state.collections.describe()})
+                return
+            if parsed.path == "/api/profiles":
+                params = parse_qs(parsed.query)
+                try:
+                    limit = int(params.get("limit", ["20"])[0])
+                except ValueError:
+                    limit = 20
+                _json_response(self, list_profiles(state.profiler.output_dir, limit=limit))
+                return
             if parsed.path == "/api/sessions":
-                _json_response(self, {"sessions": list_sessions()})
+                params = parse_qs(parsed.query)
+                try:
+                    page = list_session_page(
+                        limit=min(max(1, int(params.get("limit", ["100"])[0])), 1000),
+                        cursor=params.get("cursor", [None])[0],
+                        sort=params.get("sort", ["updated"])[0],
+                        descending=params.get("order", ["desc"])[0] != "asc",
+                    )
+                except ValueError as exc:
+                    _json_response(self, {"error": str(exc)}, code=400)
+                    return
+                sessions = [item["session_id"] for item in page["items"]]
+                _json_response(self, {"sessions": sessions, **page})
                 return
             if parsed.path == "/api/history":
                 params = parse_qs(parsed.query)
                 session_id = params.get("session_id", ["default"])[0]
-                history = read_session_history(session_id)
-                _json_response(self, {"session_id": session_id, "history": history})
+                try:
+                    before = int(params["before"][0]) if params.get("before") else None
+                    limit = int(params.get("limit", ["200"])[0])
+                except ValueError:
+                    _json_response(self, {"error": "before and limit must be integers"}, code=400)
+                    return
+                page = read_session_page(session_id, before=before, limit=min(max(1, limit), 1000))
+                _json_response(self, {"session_id": session_id, **page})
                 return
             _json_response(self, {"error": "Not found"}, code=404)
 
-        def do_POST(self) -> None:  # noqa: N802
+        def _handle_post(self) -> None:
             parsed = urlparse(self.path)
             try:
                 body = _read_json(self)
@@ -96,11 +382,23 @@ def make_handler(state: AppState):
                 if not isinstance(files, list) or len(files) == 0:
                     _json_response(self, {"error": "files[] is required"}, code=400)
                     return
-                paths = _write_uploaded_files(files)
-                with state.lock:
-                    stats = state.pipeline.ingest(paths, append=True)
-                    state.pipeline.save(state.index_path)
-                _json_response(self, {"status": "ok", "saved_paths": paths, "stats": stats})
+                name = self._collection_name(body)
+                if name is None:
+                    return
+                # Every upload is tagged with a batch label so later questions can be limited to it.
+                batch = str(body.get("batch") or "").strip() or _upload_batch_id()
+                with self._admitted("upload", body) as deadline:
+                    # Pinned until the ingest is saved, so eviction can't orphan the copy being written.
+                    with state.collections.use(name, create=True) as collection:
+                        paths = _write_uploaded_files(files, name)
+                        with self._pipeline_lock("upload", collection, deadline):
+                            stats = collection.pipeline.ingest(paths, append=True, batch=batch)
+                            collection.pipeline.save(str(collection.index_path))
+                        state.collections.resized(collection)
+                _json_response(
+                    self,
+                    {"status": "ok", "collection": name, "batch": batch, "saved_paths": paths, "stats": stats},
+                )
                 return
 
             if parsed.path == "/api/ask":
@@ -109,13 +407,74 @@ def make_handler(state: AppState):
                 if not question:
                     _json_response(self, {"error": "question is required"}, code=400)
                     return
-                with state.lock:
-                    result = state.pipeline.ask(question)
-                payload = result.to_dict()
-                append_session_event(session_id, "qa", payload)
+                name = self._collection_name(body)
+                filters = self._chunk_filter(body) if name is not None else None
+                if filters is None:
+                    return
+                with self._admitted("ask", body) as deadline, state.collections.use(name) as collection:
+                    with self._pipeline_lock("ask", collection, deadline):
+                        result = self._maybe_profiled(
+                            "api-ask",
+                            collection,
+                            {"question": question},
+                            lambda: collection.pipeline.ask(question, filters=filters),
+                        )
+                    payload = result.to_dict()
+                    append_session_event(session_id, "qa", payload)
                 _json_response(self, payload)
                 return
 
+            if parsed.path == "/api/ask/stream":
+                question = str(body.get("question", "")).strip()
+                session_id = str(body.get("session_id", "default")).strip() or "default"
+                if not question:
+                    _json_response(self, {"error": "question is required"}, code=400)
+                    return
+                name = self._collection_name(body)
+                filters = self._chunk_filter(body) if name is not None else None
+                if filters is None:
+                    return
+                with self._admitted("ask", body) as deadline, state.collections.use(name) as collection:
+                    # Admission and retrieval happen before the 200 so overload still gets a 429/503.
+                    with self._pipeline_lock("ask", collection, deadline):
+                        hits, stream = collection.pipeline.ask_stream(question, filters=filters)
+                    self._stream_answer(session_id, question, hits, stream)
+                return
+
+            if parsed.path == "/api/ask_batch":
+                items = body.get("questions", [])
+                session_id = str(body.get("session_id", "default")).strip() or "default"
+                if not isinstance(items, list) or len(items) == 0:
+                    _json_response(self, {"error": "questions[] is required"}, code=400)
+                    return
+                if len(items) > MAX_BATCH_QUESTIONS:
+                    _json_response(
+                        self,
+                        {"error": f"at most {MAX_BATCH_QUESTIONS} questions per batch"},
+                        code=400,
+                    )
+                    return
+                questions = _batch_questions(items)
+                name = self._collection_name(body)
+                filters = self._chunk_filter(body) if name is not None else None
+                if filters is None:
+                    return
+                with self._admitted("ask", body) as deadline, state.collections.use(name) as collection:
+                    with self._pipeline_lock("ask", collection, deadline):
+                        answers = self._maybe_profiled(
+                            "api-ask-batch",
+                            collection,
+                            {"question": questions[0][1] if questions else "", "batch_size": len(questions)},
+                            lambda: list(collection.pipeline.ask_batch((q for _, q in questions), filters=filters)),
+                        )
+                results = []
+                for (record_id, _), result in zip(questions, answers):
+                    payload = result.to_dict()
+                    append_session_event(session_id, "qa", payload)
+                    results.append({"id": record_id, **payload})
+                _json_response(self, {"results": results})
+                return
+
             if parsed.path == "/api/memory":
                 text = str(body.get("text", "")).strip()
                 session_id = str(body.get("session_id", "default")).strip() or "default"
@@ -123,8 +482,7 @@ def make_handler(state: AppState):
                     _json_response(self, {"error": "text is required"}, code=400)
                     return
                 decisions = select_high_signal_memory(text)
-                with state.lock:
-                    writes = write_memories(decisions)
+                writes = write_memories(decisions)
                 event_payload = {
                     "text": text,
                     "decisions": [d.to_dict() for d in decisions],
@@ -139,9 +497,38 @@ def make_handler(state: AppState):
     return Handler
 
 
-def run_server(host: str = "127.0.0.1", port: int = 7860, index_path: str = INDEX_PATH) -> None:
-    state = AppState(index_path=index_path)
+def run_server(
+    host: str = "127.0.0.1",
+    port: int = 7860,
+    index_path: str = INDEX_PATH,
+    profile_sample_rate: float = 0.0,
+    profile_header: str = PROFILE_HEADER,
+    ask_concurrency: int = 4,
+    ask_queue: int = 32,
+    upload_concurrency: int = 1,
+    upload_queue: int = 4,
+    request_timeout: float = 10.0,
+    collections_dir: str = str(COLLECTIONS_DIR),
+    max_collection_bytes: int = DEFAULT_MAX_BYTES,
+    max_collections: int = DEFAULT_MAX_COLLECTIONS,
+    preload: list[str] | None = None,
+    history_durability: str = "none",
+    history_flush_ms: float = 50.0,
+    history_rotation: RotationPolicy | None = None,
+) -> None:
+    profiler = Profiler(sample_rate=profile_sample_rate, header=profile_header)
+    pools = default_pools(ask_concurrency, ask_queue, upload_concurrency, upload_queue, request_timeout)
+    collections = CollectionManager(index_path, collections_dir, max_collection_bytes, max_collections)
+    collections.preload([DEFAULT_COLLECTION] if preload is None else preload)
+    state = AppState(index_path=index_path, profiler=profiler, pools=pools, collections=collections)
     server = ThreadingHTTPServer((host, port), make_handler(state))
+    start_history_writer(durability=history_durability, flush_interval=history_flush_ms / 1000.0)
+    if history_rotation is not None:
+        # Rotation is opt-in: without a size or age limit session logs are left as they are.
+        start_rotation_sweeper(history_rotation)
     print(f"Web UI running at http://{host}:{port}")
-    server.serve_forever()
+    try:
+        server.serve_forever()
+    finally:
+        stop_history_writer()
 
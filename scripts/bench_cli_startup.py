@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SAMPLE_DOCS = ROOT / "sample_docs"
+
+# Each entry runs a real subcommand in a fresh interpreter against scratch paths, so the timing
+# covers interpreter start, imports, argument parsing and the command's own cold work.
+COMMANDS = {
+    "python": ["-c", "pass"],
+    "help": ["-m", "agentic_rag", "--help"],
+    "ingest": ["-m", "agentic_rag", "ingest", "--paths", str(SAMPLE_DOCS), "--index", "{tmp}/index.json"],
+    "ask": [
+        "-m", "agentic_rag", "ask", "--no-daemon", "--index", "{tmp}/index.json",
+        "--question", "What are the key assumptions or limitations?",
+    ],
+    "history": ["-m", "agentic_rag", "history", "--no-daemon", "--session-id", "bench"],
+    "remember": [
+        "-m", "agentic_rag", "remember", "--text", "I prefer weekly summaries on Mondays.",
+        "--user-memory", "{tmp}/USER_MEMORY.md", "--company-memory", "{tmp}/COMPANY_MEMORY.md",
+    ],
+    # Invalid dates fail validation before any network call, leaving only startup cost.
+    "weather": [
+        "-m", "agentic_rag", "weather", "--lat", "0", "--lon", "0",
+        "--start-date", "invalid", "--end-date", "invalid",
+    ],
+}
+
+
+def _run(argv: list[str], cwd: str, env: dict, importtime: bool = False) -> tuple[float, str]:
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + argv
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=cwd, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} exited with {proc.returncode}: {proc.stderr[-400:]}")
+    return elapsed, proc.stderr
+
+
+def _imported_modules(stderr: str) -> list[str]:
+    modules = []
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "imported package" not in line:
+            modules.append(line.rsplit("|", 1)[1].strip())
+    return modules
+
+
+def measure(repeat: int) -> dict:
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # Warm the bytecode cache and build the index that `ask` reads.
+        for argv in COMMANDS.values():
+            _run([a.format(tmp=tmp) for a in argv], tmp, env)
+        for name, argv in COMMANDS.items():
+            argv = [a.format(tmp=tmp) for a in argv]
+            timings = [_run(argv, tmp, env)[0] * 1000 for _ in range(repeat)]
+            modules = _imported_modules(_run(argv, tmp, env, importtime=True)[1])
+            results[name] = {
+                "median_ms": round(statistics.median(timings), 2),
+                "min_ms": round(min(timings), 2),
+                "max_ms": round(max(timings), 2),
+                "modules_imported": len(modules),
+                "agentic_rag_modules": sorted({m for m in modules if m.startswith("agentic_rag")}),
+            }
+    return results
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> list[str]:
+    failures = []
+    floor = current.get("python", {}).get("median_ms", 0.0)
+    for name, stats in current.items():
+        base = baseline.get(name)
+        if not base or name == "python":
+            continue
+        # Compare time above the bare interpreter so machine noise in Python startup cancels out.
+        cur_cost = stats["median_ms"] - floor
+        base_cost = base["median_ms"] - baseline.get("python", {}).get("median_ms", 0.0)
+        if base_cost > 0 and cur_cost > base_cost * (1 + max_regression):
+            failures.append(f"{name}: {cur_cost:.1f}ms over interpreter vs baseline {base_cost:.1f}ms")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure CLI cold-start wall time per subcommand")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="Allowed fractional slowdown")
+    args = parser.parse_args()
+
+    results = measure(max(1, args.repeat))
+    payload = {"python": sys.version.split()[0], "repeat": args.repeat, "commands": results}
+    if args.output:
+        out = Path(args.output)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    print(json.dumps(payload, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8")).get("commands", {})
+        failures = compare(results, baseline, args.max_regression)
+        if failures:
+            print("STARTUP_REGRESSION: " + "; ".join(failures), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from agentic_rag.http_client import HttpClient  # noqa: E402
+from agentic_rag.open_meteo_stub import make_server  # noqa: E402
+from agentic_rag.weather import WeatherQuery, analyze_weather_batch, configure_http  # noqa: E402
+from agentic_rag.weather_cache import WeatherCache  # noqa: E402
+
+# Runs the batch weather path against the local Open-Meteo stand-in, so throughput can be
+# measured offline: a cold pass (every window fetched) and a warm pass (served from the cache).
+
+
+def _sites(count: int, start: str, end: str) -> list[WeatherQuery]:
+    return [WeatherQuery(-60 + (i * 7.3) % 120, -170 + (i * 13.1) % 340, start, end) for i in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark batch weather analytics against the local stand-in")
+    parser.add_argument("--sites", type=int, default=200)
+    parser.add_argument("--start-date", default="2016-01-01")
+    parser.add_argument("--end-date", default="2024-12-31")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--window-days", type=int, default=366)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Simulated server latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503s, to exercise retries")
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    server = make_server(port=0, latency_ms=args.latency_ms, error_rate=args.error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = HttpClient(retries=5, backoff_base=0.01, pool_size=args.workers)
+    configure_http(client, base_url=f"http://127.0.0.1:{server.server_port}")
+    queries = _sites(args.sites, args.start_date, args.end_date)
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = WeatherCache(Path(tmp) / "cache.sqlite3")
+        for phase in ("cold", "warm"):
+            start = time.perf_counter()
+            out = list(
+                analyze_weather_batch(
+                    queries, max_workers=args.workers, window_days=args.window_days, cache=cache
+                )
+            )
+            elapsed = time.perf_counter() - start
+            failed = sum(1 for r in out if r.explanation.startswith("Open-Meteo request failed"))
+            results[phase] = {
+                "seconds": round(elapsed, 3),
+                "sites_per_second": round(len(out) / elapsed, 1) if elapsed else None,
+                "failed": failed,
+            }
+        cache.close()
+    client.close()
+    server.shutdown()
+    payload = {"sites": args.sites, "workers": args.workers, "window_days": args.window_days, **results}
+    if args.output:
+        out_path = Path(args.output)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    print(json.dumps(payload, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,24 @@
 import json
 import sys
+import tempfile
 import threading
 import time
 import urllib.request
+from dataclasses import asdict
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
+from agentic_rag.bench import generate_corpus, sample_queries
+from agentic_rag.collection import CollectionLimit, CollectionManager
+from agentic_rag.daemon import DaemonState
+from agentic_rag.dense import DenseConfig, IVFIndex
 from agentic_rag.memory import select_high_signal_memory, write_memories
-from agentic_rag.pipeline import RAGPipeline
+from agentic_rag.models import MemoryWrite
+from agentic_rag.pipeline import RAGPipeline, chunks_digest, postings_path
+from agentic_rag.postings import load_sidecar
 from agentic_rag.sanity import run_sanity
+from agentic_rag.tracing import REGISTRY
 from agentic_rag.weather import analyze_open_meteo_timeseries
 from agentic_rag.webapp import run_server
 
@@ -36,6 +45,13 @@ def _get(path: str, port: int) -> tuple[str, str]:
         return resp.headers.get("Content-Type", ""), resp.read().decode("utf-8")
 
 
+def _counter_value(name: str) -> float:
+    for line in REGISTRY.render_prometheus().splitlines():
+        if line.startswith(name + " "):
+            return float(line.split()[1])
+    return 0.0
+
+
 def main() -> None:
     results: list[dict] = []
 
@@ -69,6 +85,79 @@ def main() -> None:
         results,
     )
 
+    # Trigram pruning keeps top-k rankings identical to the exact per-chunk scan
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = generate_corpus(f"{tmp}/corpus", 300, seed=3)
+        synthetic = RAGPipeline()
+        synthetic.ingest([f"{tmp}/corpus"])
+        pruned_before = _counter_value("agentic_rag_retrieval_trigram_pruned_total")
+        mismatched = [
+            query.question
+            for query in sample_queries(corpus, 20, seed=3)
+            if [(h.chunk.chunk_id, h.score) for h in synthetic.retriever.search(query.question, top_k=5)]
+            != [(h.chunk.chunk_id, h.score) for h in synthetic.retriever.search_exact(query.question, top_k=5)]
+        ]
+        _assert(
+            "trigram_pruning_parity",
+            not mismatched and _counter_value("agentic_rag_retrieval_trigram_pruned_total") > pruned_before,
+            f"mismatched={mismatched[:2]}",
+            results,
+        )
+
+    # The IVF index is saved in the postings sidecar and the daemon answers dense asks from it
+    with tempfile.TemporaryDirectory() as tmp:
+        dense = DenseConfig(weight=0.3, nlist=2)
+        index_path = f"{tmp}/index.json"
+        pipeline.save(index_path, dense=dense)
+        saved = load_sidecar(postings_path(index_path), chunks_digest(pipeline.chunks), {"dense": IVFIndex.from_part})
+        question = "What are the key assumptions or limitations?"
+        state = DaemonState(index_path)
+        response = state.handle({"command": "ask", "question": question, "index": index_path, "dense": asdict(dense)})
+        fresh = RAGPipeline(chunks=pipeline.chunks, dense=dense)
+        served, rebuilt = (
+            [(h.chunk.chunk_id, h.score, h.dense_score) for h in p.retriever.search(question)]
+            for p in (state.pipeline_for(dense), fresh)
+        )
+        _assert(
+            "dense_sidecar_daemon",
+            bool(saved and "dense" in saved)
+            and response.get("result") == fresh.ask(question).to_dict()
+            and served == rebuilt
+            and any(dense_score for _, _, dense_score in served),
+            f"parts={sorted(saved or {})} hits={len(served)}",
+            results,
+        )
+
+    # A collection pinned by an in-flight upload survives a concurrent load of another collection
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = CollectionManager(f"{tmp}/default.json", f"{tmp}/collections", max_bytes=1)
+        with manager.use("alpha", create=True) as alpha:
+            alpha.pipeline.ingest(["sample_docs/operations_notes.txt"], append=True)
+            manager.resized(alpha)
+            other = threading.Thread(target=manager.get, args=("beta",), kwargs={"create": True})
+            other.start()
+            other.join()
+            during = [c.name for c in manager.loaded()]
+            alpha.pipeline.save(str(alpha.index_path))
+            same = manager.get("alpha")
+        _assert(
+            "collection_pinned_during_upload",
+            same is alpha and during == ["alpha", "beta"],
+            f"loaded_during_upload={during}",
+            results,
+        )
+
+        # Creating collections stops at max_collections
+        capped = CollectionManager(f"{tmp}/default.json", f"{tmp}/capped", max_collections=2)
+        with capped.use("first", create=True) as first:
+            first.pipeline.save(str(first.index_path))
+        try:
+            capped.get("second", create=True)
+            limited = False
+        except CollectionLimit:
+            limited = True
+        _assert("collection_limit", limited, f"names={capped.names()}", results)
+
     # Memory path
     mem_secret = select_high_signal_memory("My API key is abc and password is 1234")
     _assert("memory_secret_filter", len(mem_secret) == 0, "secret blocked", results)
@@ -77,6 +166,20 @@ def main() -> None:
     writes = write_memories(mem)
     _assert("memory_write", isinstance(writes, list), f"writes={len(writes)}", results)
 
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {"user_memory_path": f"{tmp}/USER.md", "company_memory_path": f"{tmp}/COMPANY.md"}
+        first = write_memories([MemoryWrite("USER", "Prefers Friday digests at 7 AM.", 0.9, "test")], **paths)
+        repeat = write_memories([MemoryWrite("USER", "prefers  FRIDAY digests at 7 am.", 0.9, "test")], **paths)
+        loose = [MemoryWrite("USER", "friday  DIGESTS", 0.9, "test")]
+        contained = write_memories(loose, match_contained=True, **paths)
+        kept = write_memories(loose, **paths)
+        _assert(
+            "memory_dedupe_contained",
+            len(first) == 1 and repeat == [] and contained == [] and len(kept) == 1,
+            f"first={len(first)} repeat={len(repeat)} contained={len(contained)} kept={len(kept)}",
+            results,
+        )
+
     # Weather tool
     weather = analyze_open_meteo_timeseries(40.71, -74.01, "2026-02-01", "2026-02-05")
     _assert("weather_tool", bool(weather.explanation), weather.explanation[:100], results)